@@ -39,6 +39,8 @@ from iris.analysis import Aggregator
 from iris.coords import AuxCoord
 from iris.exceptions import CoordinateNotFoundError
 
+from improver.ensemble_copula_coupling.ensemble_copula_coupling_utilities \
+    import interpolate_multiple_rows
 from improver.utilities.cube_checker import find_percentile_coordinate
 from improver.utilities.cube_manipulation import (
     enforce_coordinate_ordering, sort_coord_in_cube, build_coordinate,
@@ -346,6 +348,10 @@ class PercentileBlendingAggregator:
             https://github.com/metoppv/improver/files/1128018/
             Combining_Probabilities.pdf
     """
+    # Approximate number of percentile values within each chunk, when
+    # blending the grid points in chunks, so that the memory used by the
+    # interpolation is bounded.
+    TILE_SIZE = 2**18
 
     def __init__(self):
         """
@@ -400,16 +406,10 @@ class PercentileBlendingAggregator:
         # Flatten the data that is not percentile or coord data
         data = data.reshape(input_shape)
         arr_weights = arr_weights.reshape(input_shape)
-        # Create the resulting data array, which is the shape of the original
-        # data without dimension we are collapsing over
-        result = np.zeros(input_shape[1:], dtype=np.float32)
-        # Loop over the flattened data, i.e. across all the data points in
-        # each slice of the coordinate we are collapsing over, finding the
-        # blended percentile values at each point.
-        for i in range(data.shape[-1]):
-            result[:, i] = (
-                PercentileBlendingAggregator.blend_percentiles(
-                    data[:, :, i], arr_percent, arr_weights[:, :, i]))
+        # Find the blended percentile values at all the data points in
+        # each slice of the coordinate we are collapsing over at once.
+        result = PercentileBlendingAggregator.blend_percentiles(
+            data, arr_percent, arr_weights)
         # Reshape the data and put the percentile dimension
         # back in the right place
         shape = arr_percent.shape + shape
@@ -433,61 +433,128 @@ class PercentileBlendingAggregator:
     @staticmethod
     def blend_percentiles(perc_values, percentiles, weights):
         """ Blend percentiles function, to calculate the weighted blend across
-            a given axis of percentile data for a single grid point.
+            a given axis of percentile data for a single grid point, or for
+            many grid points at once.
 
         Args:
             perc_values (np.array):
                 Array containing the percentile values to blend, with
-                shape: (length of coord to blend, num of percentiles)
+                shape: (length of coord to blend, num of percentiles), or
+                (length of coord to blend, num of percentiles, num of points)
+                to blend many grid points at once.
             percentiles (np.array):
                 Array of percentile values e.g [0, 20.0, 50.0, 70.0, 100.0],
                 same size as the percentile dimension of data.
             weights (np.array):
                 Array of weights, same size as the axis dimension of data,
-                that we will blend over.
+                that we will blend over. The weights may also vary by
+                percentile and by point, with the shape of perc_values.
 
         Returns:
             new_combined_perc (np.array):
                 Array containing the weighted percentile blend data
-                across the chosen coord
+                across the chosen coord, with shape (num of percentiles),
+                or (num of percentiles, num of points).
         """
+        percentiles = np.asarray(percentiles)
+        single_point = np.ndim(perc_values) == 2
+        if single_point:
+            perc_values = perc_values[..., np.newaxis]
         # Find the size of the dimension we want to blend over.
-        num = perc_values.shape[0]
+        num, num_perc, num_points = perc_values.shape
+        weights = np.asarray(weights)
+        # Each point in the axis we are blending over has its own
+        # percentiles multiplied by its weight in the precision used for a
+        # single grid point, where a single weight may be a scalar.
+        self_weight_dtype = np.result_type(
+            percentiles, weights[0] if weights.ndim == 1 else weights)
+        weights = np.broadcast_to(
+            weights.reshape(weights.shape + (1,) * (3 - weights.ndim)),
+            perc_values.shape)
+        # Make the points the leading dimension, so that each row of the
+        # flattened values contains the percentile values for a point.
+        perc_values = np.moveaxis(perc_values, -1, 0)
+        weights = np.moveaxis(weights, -1, 0)
+
+        # Blend the points in chunks, so that the temporary arrays used for
+        # the interpolation are no larger than a chunk.
+        new_combined_perc = np.empty((num_perc, num_points), dtype=np.float32)
+        chunk_length = max(
+            1, PercentileBlendingAggregator.TILE_SIZE // (num * num_perc))
+        for start in range(0, num_points, chunk_length):
+            chunk = slice(start, start + chunk_length)
+            PercentileBlendingAggregator._blend_percentiles_for_points(
+                perc_values[chunk], percentiles, weights[chunk],
+                self_weight_dtype, new_combined_perc[:, chunk].T)
+        if single_point:
+            new_combined_perc = new_combined_perc[:, 0]
+        return new_combined_perc
+
+    @staticmethod
+    def _blend_percentiles_for_points(perc_values, percentiles, weights,
+                                      self_weight_dtype, out):
+        """
+        Calculate the weighted blend of the percentiles at each of a set of
+        grid points.
+
+        Args:
+            perc_values (np.array):
+                Array containing the percentile values to blend, with
+                shape: (num of points, length of coord to blend,
+                num of percentiles).
+            percentiles (np.array):
+                Array of percentile values, same size as the percentile
+                dimension of perc_values.
+            weights (np.array):
+                Array of weights, with the shape of perc_values.
+            self_weight_dtype (np.dtype):
+                Data type in which the percentiles are multiplied by the
+                weight of the point in the axis we are blending over that
+                they belong to.
+            out (np.array):
+                Array of shape (num of points, num of percentiles), into
+                which the blended percentile values are written.
+        """
+        num_points, num, num_perc = perc_values.shape
+        flat_perc_values = perc_values.reshape(num_points, num * num_perc)
+
         # Create an array to store the weighted blending pdf
-        combined_pdf = np.zeros((num, len(percentiles)), dtype=np.float32)
+        combined_pdf = np.zeros((num_points, num, num_perc), dtype=np.float32)
         # Loop over the axis we are blending over finding the values for the
         # probability at each threshold in the pdf, for each of the other
-        # points in the axis we are blending over. Use the values from the
-        # percentiles if we are at the same point, otherwise use linear
-        # interpolation.
+        # points in the axis we are blending over, at all grid points at
+        # once. Use the values from the percentiles if we are at the same
+        # point, otherwise use linear interpolation.
         # Then add the probabilities multiplied by the correct weight to the
         # running total.
-        for i in range(0, num):
-            for j in range(0, num):
-                if i == j:
-                    recalc_values_in_pdf = percentiles
-                else:
-                    recalc_values_in_pdf = np.interp(perc_values[i],
-                                                     perc_values[j],
-                                                     percentiles)
-                # Add the resulting probabilities multiplied by the right
-                # weight to the running total for the combined pdf.
-                combined_pdf[i] += recalc_values_in_pdf*weights[j]
+        # Each row of the interpolation is the percentile values of one of
+        # the points in the axis we are blending over at one grid point.
+        rows = perc_values.reshape(num_points * num, num_perc)
+        for j in range(0, num):
+            recalc_values_in_pdf = interpolate_multiple_rows(
+                rows, np.repeat(perc_values[:, j], num, axis=0), percentiles)
+            recalc_values_in_pdf = recalc_values_in_pdf.reshape(
+                num_points, num, num_perc)
+            recalc_values_in_pdf *= weights[:, j:j+1]
+            recalc_values_in_pdf[:, j] = percentiles*weights[:, j].astype(
+                self_weight_dtype)
+            # Add the resulting probabilities multiplied by the right
+            # weight to the running total for the combined pdf.
+            combined_pdf += recalc_values_in_pdf
 
         # Combine and sort the threshold values for all the points
         # we are blending.
-        combined_perc_thres_data = np.sort(perc_values.flatten())
+        combined_perc_thres_data = np.sort(flat_perc_values, axis=1)
 
         # Combine and sort blended probability values.
-        combined_perc_values = np.sort(combined_pdf.flatten())
+        combined_perc_values = np.sort(
+            combined_pdf.reshape(num_points, num * num_perc), axis=1)
 
         # Find the percentile values from this combined data by interpolating
         # back from probability values to the original percentiles.
-        new_combined_perc = np.interp(percentiles,
-                                      combined_perc_values,
-                                      combined_perc_thres_data).astype(
-                                          np.float32)
-        return new_combined_perc
+        interpolate_multiple_rows(
+            percentiles, combined_perc_values, combined_perc_thres_data,
+            out=out)
 
 
 class MaxProbabilityAggregator:
@@ -35,7 +35,8 @@ Regression (NGR)."""
 
 from improver.argparser import ArgParser
 from improver.ensemble_calibration.ensemble_calibration import (
-    EstimateCoefficientsForEnsembleCalibration)
+    EstimateCoefficientsForEnsembleCalibration,
+    RollingTrainingDataForEnsembleCalibration)
 from improver.utilities.load import load_cube
 from improver.utilities.save import save_netcdf
 
@@ -87,18 +88,73 @@ def main(argv=None):
                              'ensemble mean ("mean") and the ensemble '
                              'realizations ("realizations") are supported as '
                              'options. Default: "mean".')
+    parser.add_argument('--initial_guess_filepath',
+                        metavar='INITIAL_GUESS_FILEPATH',
+                        help='A path to an input NetCDF file containing '
+                             'previously estimated EMOS coefficients, e.g. '
+                             'from the previous day, which are used as the '
+                             'initial guess for the minimisation.')
+    parser.add_argument('--training_data_directory',
+                        metavar='TRAINING_DATA_DIRECTORY',
+                        help='A directory in which the ensemble mean and '
+                             'variance of the historic forecasts and the '
+                             'truth are stored for each validity time. If '
+                             'provided, the historic forecast and truth are '
+                             'added to the stored training data, and the '
+                             'coefficients are estimated from the training '
+                             'data for the latest WINDOW_LENGTH validity '
+                             'times, so only the newest historic forecast '
+                             'and truth need to be provided. The predictor '
+                             'of the mean must be "mean".')
+    parser.add_argument('--window_length', metavar='WINDOW_LENGTH',
+                        type=int, default=30,
+                        help='The number of validity times to keep in the '
+                             'training data directory. Default: 30.')
+    parser.add_argument('--minimisation_method',
+                        metavar='MINIMISATION_METHOD',
+                        choices=['Nelder-Mead', 'BFGS'],
+                        default='Nelder-Mead',
+                        help='The method used to minimise the Continuous '
+                             'Ranked Probability Score. Currently '
+                             '"Nelder-Mead" and "BFGS", which uses the '
+                             'analytic gradient of the score, are supported. '
+                             'Default: "Nelder-Mead".')
+    parser.add_argument('--point_by_point', action='store_true',
+                        default=False,
+                        help='If set, coefficients are estimated separately '
+                             'for each point using the historic forecast and '
+                             'truth at that point, rather than a single set '
+                             'of coefficients for the whole domain.')
+    parser.add_argument('--processes', metavar='PROCESSES', type=int,
+                        default=1,
+                        help='The number of processes used to estimate the '
+                             'coefficients at each point, if '
+                             '--point_by_point is set. Default: 1.')
 
     args = parser.parse_args(args=argv)
 
     historic_forecast = load_cube(args.historic_filepath)
     truth = load_cube(args.truth_filepath)
+    initial_guess = None
+    if args.initial_guess_filepath:
+        initial_guess = load_cube(args.initial_guess_filepath)
 
     # Estimate coefficients using Ensemble Model Output Statistics (EMOS).
     estcoeffs = EstimateCoefficientsForEnsembleCalibration(
         args.distribution, args.cycletime, desired_units=args.units,
-        predictor_of_mean_flag=args.predictor_of_mean)
-    coefficients = (
-        estcoeffs.estimate_coefficients_for_ngr(historic_forecast, truth))
+        predictor_of_mean_flag=args.predictor_of_mean,
+        minimisation_method=args.minimisation_method,
+        point_by_point=args.point_by_point, processes=args.processes)
+    if args.training_data_directory:
+        forecast_mean, forecast_var, truth = (
+            RollingTrainingDataForEnsembleCalibration(
+                args.training_data_directory, args.window_length,
+                desired_units=args.units).process(historic_forecast, truth))
+        coefficients = estcoeffs.estimate_coefficients_from_training_data(
+            forecast_mean, forecast_var, truth, initial_guess=initial_guess)
+    else:
+        coefficients = estcoeffs.estimate_coefficients_for_ngr(
+            historic_forecast, truth, initial_guess=initial_guess)
 
     save_netcdf(coefficients, args.output_filepath)
 
@@ -32,11 +32,14 @@
 This module defines all the "plugins" specific for ensemble calibration.
 
 """
+from concurrent.futures import ProcessPoolExecutor
 import datetime
+import glob
 import numpy as np
+import os
 from scipy import stats
 from scipy.optimize import minimize
-from scipy.stats import norm
+from scipy.special import ndtr
 import warnings
 
 import iris
@@ -44,7 +47,10 @@ from iris.exceptions import CoordinateNotFoundError
 
 from improver.ensemble_calibration.ensemble_calibration_utilities import (
     convert_cube_data_to_2d, check_predictor_of_mean_flag)
+from improver.utilities.cube_checker import check_cube_not_float64
 from improver.utilities.cube_manipulation import enforce_coordinate_ordering
+from improver.utilities.load import load_cube
+from improver.utilities.save import save_netcdf
 from improver.utilities.temporal import (
     cycletime_to_datetime, datetime_to_cycletime, datetime_to_iris_time,
     iris_time_to_datetime)
@@ -64,13 +70,22 @@ class ContinuousRankedProbabilityScoreMinimisers(object):
     Minimisation is performed using the Nelder-Mead algorithm for 200
     iterations to limit the computational expense.
     Note that the BFGS algorithm was initially trialled but had a bug
-    in comparison to comparative results generated in R.
+    in comparison to comparative results generated in R. The BFGS algorithm
+    can be selected, in which case the analytic gradient of the CRPS with
+    respect to the coefficients is supplied to the minimisation, rather than
+    the gradient being estimated using finite differences. The CRPS is then
+    calculated in float64, and the tolerance on the gradient is scaled by
+    the number of training samples, as the CRPS is summed over the samples.
 
     """
 
     # Maximum iterations for minimisation using Nelder-Mead.
     MAX_ITERATIONS = 200
 
+    # Tolerance on the gradient of the CRPS for each training sample, when
+    # the gradient is used in the minimisation.
+    GRADIENT_TOLERANCE = 1e-5
+
     # The tolerated percentage change for the final iteration when
     # performing the minimisation.
     TOLERATED_PERCENTAGE_CHANGE = 5
@@ -79,12 +94,48 @@ class ContinuousRankedProbabilityScoreMinimisers(object):
     # as part of the minimisation.
     BAD_VALUE = np.float64(999999)
 
-    def __init__(self):
+    # Minimisation methods that are supported, and whether the analytic
+    # gradient of the CRPS is supplied to the minimisation.
+    MINIMISATION_METHODS = {"Nelder-Mead": False, "BFGS": True}
+
+    def __init__(self, minimisation_method="Nelder-Mead"):
+        """
+        Initialise the class.
+
+        Kwargs:
+            minimisation_method (str):
+                Method used by scipy.optimize.minimize. Either "Nelder-Mead",
+                which does not use the gradient of the CRPS, or "BFGS", a
+                quasi-Newton method, which uses the analytic gradient of the
+                CRPS with respect to the coefficients.
+
+        Raises:
+            ValueError: If the minimisation method is not supported.
+        """
+        if minimisation_method not in self.MINIMISATION_METHODS:
+            msg = ("The minimisation method {} is not supported. "
+                   "Supported methods are {}".format(
+                       minimisation_method,
+                       sorted(self.MINIMISATION_METHODS)))
+            raise ValueError(msg)
+        self.minimisation_method = minimisation_method
         # Dictionary containing the minimisation functions, which will
         # be used, depending upon the distribution, which is requested.
         self.minimisation_dict = {
             "gaussian": self.normal_crps_minimiser,
             "truncated gaussian": self.truncated_normal_crps_minimiser}
+        # Dictionary containing the functions that calculate the gradient
+        # of each of the minimisation functions.
+        self.gradient_dict = {
+            "gaussian": self.normal_crps_gradient,
+            "truncated gaussian": self.truncated_normal_crps_gradient}
+        # Dictionary containing the functions that calculate the CRPS and
+        # its gradient from the design matrix of the compacted training
+        # data, which are used within the minimisation.
+        self.kernel_dict = {
+            "gaussian": (self._normal_crps, self._normal_crps_gradient),
+            "truncated gaussian": (self._truncated_normal_crps,
+                                   self._truncated_normal_crps_gradient)}
 
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
@@ -126,6 +177,62 @@ class ContinuousRankedProbabilityScoreMinimisers(object):
                 List of optimised coefficients.
                 Order of coefficients is [gamma, delta, alpha, beta].
 
+        """
+        # Ensure predictor_of_mean_flag is valid.
+        check_predictor_of_mean_flag(predictor_of_mean_flag)
+
+        if predictor_of_mean_flag.lower() == "mean":
+            forecast_predictor_data = forecast_predictor.data.flatten()
+            truth_data = truth.data.flatten()
+            forecast_var_data = forecast_var.data.flatten()
+        elif predictor_of_mean_flag.lower() == "realizations":
+            truth_data = truth.data.flatten()
+            forecast_predictor = (
+                enforce_coordinate_ordering(
+                    forecast_predictor, "realization"))
+            forecast_predictor_data = convert_cube_data_to_2d(
+                forecast_predictor)
+            forecast_var_data = forecast_var.data.flatten()
+
+        return self.crps_minimiser_for_data(
+            initial_guess, forecast_predictor_data, truth_data,
+            forecast_var_data, predictor_of_mean_flag, distribution)
+
+    def crps_minimiser_for_data(
+            self, initial_guess, forecast_predictor_data, truth_data,
+            forecast_var_data, predictor_of_mean_flag, distribution):
+        """
+        Function to pass a given minimisation function to the scipy minimize
+        function to estimate optimised values for the coefficients, using
+        arrays of training data. Training samples where any of the data is
+        masked or not finite are removed before the minimisation. If there
+        are no valid training samples, the initial guess is returned.
+
+        Args:
+            initial_guess (list):
+                List of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            forecast_predictor_data (np.ndarray):
+                Data to be used as the predictor, either a 1d array of the
+                ensemble mean or a 2d array of the ensemble realizations,
+                with the realizations as the second dimension.
+            truth_data (np.ndarray):
+                1d array of the data to be used as truth.
+            forecast_var_data (np.ndarray):
+                1d array of the ensemble variance.
+            predictor_of_mean_flag (str):
+                String to specify the input to calculate the calibrated mean.
+                Currently the ensemble mean ("mean") and the ensemble
+                realizations ("realizations") are supported as the predictors.
+            distribution (str):
+                String used to access the appropriate minimisation function
+                within self.minimisation_dict.
+
+        Returns:
+            optimised_coeffs (list):
+                List of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+
         """
         def calculate_percentage_change_in_last_iteration(allvecs):
             """
@@ -156,55 +263,176 @@ class ContinuousRankedProbabilityScoreMinimisers(object):
                 warnings.warn(msg)
 
         try:
-            minimisation_function = self.minimisation_dict[distribution]
+            minimisation_function, gradient_function = (
+                self.kernel_dict[distribution])
         except KeyError as err:
             msg = ("Distribution requested {} is not supported in {}"
                    "Error message is {}".format(
                        distribution, self.minimisation_dict, err))
             raise KeyError(msg)
 
-        # Ensure predictor_of_mean_flag is valid.
-        check_predictor_of_mean_flag(predictor_of_mean_flag)
-
-        if predictor_of_mean_flag.lower() == "mean":
-            forecast_predictor_data = forecast_predictor.data.flatten()
-            truth_data = truth.data.flatten()
-            forecast_var_data = forecast_var.data.flatten()
-        elif predictor_of_mean_flag.lower() == "realizations":
-            truth_data = truth.data.flatten()
-            forecast_predictor = (
-                enforce_coordinate_ordering(
-                    forecast_predictor, "realization"))
-            forecast_predictor_data = convert_cube_data_to_2d(
-                forecast_predictor)
-            forecast_var_data = forecast_var.data.flatten()
-
-        initial_guess = np.array(initial_guess, dtype=np.float32)
-        forecast_predictor_data = forecast_predictor_data.astype(np.float32)
-        forecast_var_data = forecast_var_data.astype(np.float32)
-        truth_data = truth_data.astype(np.float32)
-        sqrt_pi = np.sqrt(np.pi).astype(np.float32)
+        use_gradient = self.MINIMISATION_METHODS[self.minimisation_method]
+        # When the gradient is used, the CRPS and its gradient are
+        # calculated in float64, as the line search of a quasi-Newton method
+        # needs a more precise CRPS than is needed by Nelder-Mead.
+        dtype = np.float64 if use_gradient else np.float32
+        initial_guess = np.array(initial_guess, dtype=dtype)
+        forecast_predictor_data, truth_data, forecast_var_data = (
+            self._compact_training_data(
+                forecast_predictor_data.astype(dtype),
+                truth_data.astype(dtype),
+                forecast_var_data.astype(dtype)))
+        if not len(truth_data):
+            warnings.warn("Minimisation was not performed, as there is no "
+                          "valid training data.")
+            return initial_guess
+        # The design matrix is created once, rather than on every
+        # evaluation of the CRPS.
+        design_matrix = self._design_matrix(
+            forecast_predictor_data, forecast_var_data)
+        sqrt_pi = np.sqrt(np.pi).astype(dtype)
+
+        options = {"maxiter": self.MAX_ITERATIONS, "return_all": True}
+        if use_gradient:
+            # The CRPS is summed over the training samples, so the
+            # tolerance on the gradient is scaled by the number of samples.
+            options["gtol"] = self.GRADIENT_TOLERANCE * len(truth_data)
+        else:
+            gradient_function = None
 
         optimised_coeffs = minimize(
             minimisation_function, initial_guess,
-            args=(forecast_predictor_data, truth_data,
+            args=(design_matrix, truth_data,
                   forecast_var_data, sqrt_pi, predictor_of_mean_flag),
-            method="Nelder-Mead",
-            options={"maxiter": self.MAX_ITERATIONS, "return_all": True})
+            method=self.minimisation_method, jac=gradient_function,
+            options=options)
         if not optimised_coeffs.success:
             msg = ("Minimisation did not result in convergence after "
                    "{} iterations. \n{}".format(
-                       self.MAX_ITERATIONS, optimised_coeffs.message))
+                       optimised_coeffs.nit, optimised_coeffs.message))
             warnings.warn(msg)
-        calculate_percentage_change_in_last_iteration(optimised_coeffs.allvecs)
+        if len(optimised_coeffs.allvecs) > 1:
+            calculate_percentage_change_in_last_iteration(
+                optimised_coeffs.allvecs)
         return optimised_coeffs.x.astype(np.float32)
 
+    @staticmethod
+    def _compact_training_data(forecast_predictor, truth, forecast_var):
+        """
+        Remove the training samples where any of the data is masked or not
+        finite, so that the invalid samples are removed once before the
+        minimisation, rather than on every evaluation of the CRPS.
+
+        Args:
+            forecast_predictor (np.ndarray):
+                Data to be used as the predictor, either a 1d array of the
+                ensemble mean or a 2d array of the ensemble realizations,
+                with the realizations as the second dimension.
+            truth (np.ndarray):
+                1d array of the data to be used as truth.
+            forecast_var (np.ndarray):
+                1d array of the ensemble variance.
+
+        Returns:
+            (tuple) : tuple containing:
+                **forecast_predictor** (np.ndarray):
+                    Predictor data for the valid samples.
+                **truth** (np.ndarray):
+                    Truth data for the valid samples.
+                **forecast_var** (np.ndarray):
+                    Ensemble variance data for the valid samples.
+        """
+        forecast_predictor = np.ma.filled(forecast_predictor, np.nan)
+        truth = np.ma.filled(truth, np.nan)
+        forecast_var = np.ma.filled(forecast_var, np.nan)
+        valid = ContinuousRankedProbabilityScoreMinimisers._valid_samples(
+            forecast_predictor, truth, forecast_var)
+        if valid.all():
+            return forecast_predictor, truth, forecast_var
+        return forecast_predictor[valid], truth[valid], forecast_var[valid]
+
+    @staticmethod
+    def _valid_samples(forecast_predictor, truth, forecast_var):
+        """
+        Find the training samples where none of the data is masked or not
+        finite. The data may have a trailing dimension of points, in which
+        case the valid samples are found at each point.
+
+        Args:
+            forecast_predictor (np.ndarray):
+                Data to be used as the predictor, either the ensemble mean,
+                or the ensemble realizations with the realizations as the
+                second dimension.
+            truth (np.ndarray):
+                Data to be used as truth, with the training samples as the
+                first dimension.
+            forecast_var (np.ndarray):
+                Ensemble variance data, with the shape of truth.
+
+        Returns:
+            valid (np.ndarray):
+                Boolean array with the shape of truth, which is True for the
+                valid training samples.
+        """
+        valid = (np.isfinite(np.ma.filled(truth, np.nan)) &
+                 np.isfinite(np.ma.filled(forecast_var, np.nan)))
+        predictor_valid = np.isfinite(
+            np.ma.filled(forecast_predictor, np.nan))
+        if predictor_valid.ndim > valid.ndim:
+            # All of the realizations must be valid.
+            predictor_valid = predictor_valid.all(axis=1)
+        return valid & predictor_valid
+
+    @staticmethod
+    def _design_matrix(forecast_predictor, forecast_var):
+        """
+        Create the design matrix for the calibrated mean, with a column of
+        ones followed by the predictor(s).
+
+        Args:
+            forecast_predictor (np.ndarray):
+                Data to be used as the predictor,
+                either the ensemble mean or the ensemble realizations.
+            forecast_var (np.ndarray):
+                Ensemble variance data.
+
+        Returns:
+            design_matrix (np.ndarray):
+                2d array with the training samples as the first dimension.
+        """
+        new_col = np.ones(forecast_var.shape, dtype=forecast_var.dtype)
+        return np.column_stack((new_col, forecast_predictor))
+
+    @staticmethod
+    def _normal_cdf_and_pdf(values):
+        """
+        Calculate the cumulative distribution function and probability
+        density function of the standard normal distribution. This gives the
+        same values as scipy.stats.norm, without the overhead of checking
+        the arguments on every evaluation of the CRPS.
+
+        Args:
+            values (np.ndarray):
+                Values at which to evaluate the functions.
+
+        Returns:
+            (tuple) : tuple containing:
+                **normal_cdf** (np.ndarray):
+                    Cumulative distribution function at the values.
+                **normal_pdf** (np.ndarray):
+                    Probability density function at the values.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        return (ndtr(values),
+                np.exp(-values**2 / 2.0) / np.sqrt(2 * np.pi))
+
     def normal_crps_minimiser(
             self, initial_guess, forecast_predictor, truth, forecast_var,
             sqrt_pi, predictor_of_mean_flag):
         """
         Minimisation function to calculate coefficients based on minimising the
-        CRPS for a normal distribution.
+        CRPS for a normal distribution. Training samples where any of the data
+        is not finite are ignored.
 
         Scientific Reference:
         Gneiting, T. et al., 2005.
@@ -235,23 +463,48 @@ class ContinuousRankedProbabilityScoreMinimisers(object):
                 Minimum value for the CRPS achieved.
 
         """
-        if predictor_of_mean_flag.lower() == "mean":
-            beta = initial_guess[2:]
-        elif predictor_of_mean_flag.lower() == "realizations":
-            beta = np.array(
-                [initial_guess[2]]+(initial_guess[3:]**2).tolist(),
-                dtype=np.float32
-            )
+        forecast_predictor, truth, forecast_var = (
+            self._compact_training_data(
+                forecast_predictor, truth, forecast_var))
+        return self._normal_crps(
+            initial_guess, self._design_matrix(
+                forecast_predictor, forecast_var),
+            truth, forecast_var, sqrt_pi, predictor_of_mean_flag)
+
+    def _normal_crps(
+            self, initial_guess, design_matrix, truth, forecast_var,
+            sqrt_pi, predictor_of_mean_flag):
+        """
+        Calculate the CRPS for a normal distribution from the design matrix
+        of training data that has already been compacted, as minimised by
+        normal_crps_minimiser.
 
-        new_col = np.ones(truth.shape, dtype=np.float32)
-        all_data = np.column_stack((new_col, forecast_predictor))
-        mu = np.dot(all_data, beta)
-        sigma = np.sqrt(
-            initial_guess[0]**2 + initial_guess[1]**2 * forecast_var)
+        Args:
+            initial_guess (list):
+                List of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            design_matrix (np.ndarray):
+                Design matrix created by _design_matrix.
+            truth (np.ndarray):
+                Data to be used as truth.
+            forecast_var (np.ndarray):
+                Ensemble variance data.
+            sqrt_pi (np.ndarray):
+                Square root of Pi
+            predictor_of_mean_flag (str):
+                String to specify the input to calculate the calibrated mean.
+
+        Returns:
+            result (float):
+                Minimum value for the CRPS achieved.
+
+        """
+        mu, sigma = self._calculate_mu_and_sigma(
+            initial_guess, design_matrix, forecast_var,
+            predictor_of_mean_flag)
         xz = (truth - mu) / sigma
-        normal_cdf = norm.cdf(xz)
-        normal_pdf = norm.pdf(xz)
-        result = np.nansum(
+        normal_cdf, normal_pdf = self._normal_cdf_and_pdf(xz)
+        result = np.sum(
             sigma * (xz * (2 * normal_cdf - 1) + 2 * normal_pdf - 1 / sqrt_pi))
         if not np.isfinite(np.min(mu/sigma)):
             result = self.BAD_VALUE
@@ -262,7 +515,8 @@ class ContinuousRankedProbabilityScoreMinimisers(object):
             sqrt_pi, predictor_of_mean_flag):
         """
         Minimisation function to calculate coefficients based on minimising the
-        CRPS for a truncated_normal distribution.
+        CRPS for a truncated_normal distribution. Training samples where any of
+        the data is not finite are ignored.
 
         Scientific Reference:
         Thorarinsdottir, T.L. & Gneiting, T., 2010.
@@ -294,33 +548,391 @@ class ContinuousRankedProbabilityScoreMinimisers(object):
                 Minimum value for the CRPS achieved.
 
         """
+        forecast_predictor, truth, forecast_var = (
+            self._compact_training_data(
+                forecast_predictor, truth, forecast_var))
+        return self._truncated_normal_crps(
+            initial_guess, self._design_matrix(
+                forecast_predictor, forecast_var),
+            truth, forecast_var, sqrt_pi, predictor_of_mean_flag)
+
+    def _truncated_normal_crps(
+            self, initial_guess, design_matrix, truth, forecast_var,
+            sqrt_pi, predictor_of_mean_flag):
+        """
+        Calculate the CRPS for a truncated normal distribution from the
+        design matrix of training data that has already been compacted, as
+        minimised by truncated_normal_crps_minimiser.
+
+        Args:
+            initial_guess (list):
+                List of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            design_matrix (np.ndarray):
+                Design matrix created by _design_matrix.
+            truth (np.ndarray):
+                Data to be used as truth.
+            forecast_var (np.ndarray):
+                Ensemble variance data.
+            sqrt_pi (np.ndarray):
+                Square root of Pi
+            predictor_of_mean_flag (str):
+                String to specify the input to calculate the calibrated mean.
+
+        Returns:
+            result (float):
+                Minimum value for the CRPS achieved.
+
+        """
+        mu, sigma = self._calculate_mu_and_sigma(
+            initial_guess, design_matrix, forecast_var,
+            predictor_of_mean_flag)
+        xz = (truth - mu) / sigma
+        normal_cdf, normal_pdf = self._normal_cdf_and_pdf(xz)
+        x0 = mu / sigma
+        normal_cdf_0, _ = self._normal_cdf_and_pdf(x0)
+        normal_cdf_root_two, _ = self._normal_cdf_and_pdf(np.sqrt(2) * x0)
+        result = np.sum(
+            (sigma / normal_cdf_0**2) *
+            (xz * normal_cdf_0 * (2 * normal_cdf + normal_cdf_0 - 2) +
+             2 * normal_pdf * normal_cdf_0 -
+             normal_cdf_root_two / sqrt_pi))
+        if not np.isfinite(np.min(x0)) or (np.min(x0) < -3):
+            result = self.BAD_VALUE
+        return result
+
+    @staticmethod
+    def _calculate_mu_and_sigma(
+            initial_guess, design_matrix, forecast_var,
+            predictor_of_mean_flag):
+        """
+        Calculate the mean and standard deviation of the calibrated
+        distribution at each point from the coefficients.
+
+        Args:
+            initial_guess (list):
+                List of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            design_matrix (np.ndarray):
+                Design matrix created by _design_matrix.
+            forecast_var (np.ndarray):
+                Ensemble variance data.
+            predictor_of_mean_flag (str):
+                String to specify the input to calculate the calibrated mean.
+                Currently the ensemble mean ("mean") and the ensemble
+                realizations ("realizations") are supported as the predictors.
+
+        Returns:
+            (tuple) : tuple containing:
+                **mu** (np.ndarray):
+                    Mean of the calibrated distribution.
+                **sigma** (np.ndarray):
+                    Standard deviation of the calibrated distribution.
+        """
         if predictor_of_mean_flag.lower() == "mean":
             beta = initial_guess[2:]
         elif predictor_of_mean_flag.lower() == "realizations":
             beta = np.array(
                 [initial_guess[2]]+(initial_guess[3:]**2).tolist(),
-                dtype=np.float32
+                dtype=design_matrix.dtype
             )
 
-        new_col = np.ones(truth.shape, dtype=np.float32)
-        all_data = np.column_stack((new_col, forecast_predictor))
-        mu = np.dot(all_data, beta)
+        mu = np.dot(design_matrix, beta)
         sigma = np.sqrt(
             initial_guess[0]**2 + initial_guess[1]**2 * forecast_var)
+        return mu, sigma
+
+    @staticmethod
+    def _chain_crps_gradient(
+            initial_guess, design_matrix, forecast_var, sigma,
+            mu_gradient, sigma_gradient, predictor_of_mean_flag):
+        """
+        Calculate the gradient of the CRPS summed over all points with
+        respect to the coefficients, from the gradient of the CRPS at each
+        point with respect to the mean and standard deviation of the
+        calibrated distribution.
+
+        Args:
+            initial_guess (list):
+                List of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            design_matrix (np.ndarray):
+                Design matrix created by _design_matrix.
+            forecast_var (np.ndarray):
+                Ensemble variance data.
+            sigma (np.ndarray):
+                Standard deviation of the calibrated distribution.
+            mu_gradient (np.ndarray):
+                Gradient of the CRPS at each point with respect to the mean.
+            sigma_gradient (np.ndarray):
+                Gradient of the CRPS at each point with respect to the
+                standard deviation.
+            predictor_of_mean_flag (str):
+                String to specify the input to calculate the calibrated mean.
+                Currently the ensemble mean ("mean") and the ensemble
+                realizations ("realizations") are supported as the predictors.
+
+        Returns:
+            gradient (np.ndarray):
+                Gradient of the CRPS with respect to each coefficient.
+        """
+        # sigma = sqrt(gamma**2 + delta**2 * var) and
+        # mu = alpha + sum(beta * predictor), where for realizations each
+        # beta coefficient is squared. The first column of the design matrix
+        # is a column of ones, so this gives the gradient for alpha and beta.
+        mean_gradient = np.dot(mu_gradient, design_matrix)
+        if predictor_of_mean_flag.lower() == "realizations":
+            mean_gradient[1:] = mean_gradient[1:] * 2 * initial_guess[3:]
+        gradient = np.concatenate((
+            [np.sum(sigma_gradient * initial_guess[0] / sigma),
+             np.sum(sigma_gradient * initial_guess[1] * forecast_var /
+                    sigma)],
+            mean_gradient))
+        return gradient.astype(np.float64)
+
+    def normal_crps_gradient(
+            self, initial_guess, forecast_predictor, truth, forecast_var,
+            sqrt_pi, predictor_of_mean_flag):
+        """
+        Gradient of the CRPS for a normal distribution, as minimised by
+        normal_crps_minimiser, with respect to the coefficients.
+
+        Args:
+            initial_guess (list):
+                List of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            forecast_predictor (np.ndarray):
+                Data to be used as the predictor,
+                either the ensemble mean or the ensemble realizations.
+            truth (np.ndarray):
+                Data to be used as truth.
+            forecast_var (np.ndarray):
+                Ensemble variance data.
+            sqrt_pi (np.ndarray):
+                Square root of Pi
+            predictor_of_mean_flag (str):
+                String to specify the input to calculate the calibrated mean.
+                Currently the ensemble mean ("mean") and the ensemble
+                realizations ("realizations") are supported as the predictors.
+
+        Returns:
+            gradient (np.ndarray):
+                Gradient of the CRPS with respect to each coefficient.
+
+        """
+        forecast_predictor, truth, forecast_var = (
+            self._compact_training_data(
+                forecast_predictor, truth, forecast_var))
+        return self._normal_crps_gradient(
+            initial_guess, self._design_matrix(
+                forecast_predictor, forecast_var),
+            truth, forecast_var, sqrt_pi, predictor_of_mean_flag)
+
+    def _normal_crps_gradient(
+            self, initial_guess, design_matrix, truth, forecast_var,
+            sqrt_pi, predictor_of_mean_flag):
+        """
+        Gradient of the CRPS for a normal distribution, as calculated by
+        _normal_crps, with respect to the coefficients.
+
+        Args:
+            initial_guess (list):
+                List of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            design_matrix (np.ndarray):
+                Design matrix created by _design_matrix.
+            truth (np.ndarray):
+                Data to be used as truth.
+            forecast_var (np.ndarray):
+                Ensemble variance data.
+            sqrt_pi (np.ndarray):
+                Square root of Pi
+            predictor_of_mean_flag (str):
+                String to specify the input to calculate the calibrated mean.
+
+        Returns:
+            gradient (np.ndarray):
+                Gradient of the CRPS with respect to each coefficient.
+
+        """
+        mu, sigma = self._calculate_mu_and_sigma(
+            initial_guess, design_matrix, forecast_var,
+            predictor_of_mean_flag)
+        if not np.isfinite(np.min(mu/sigma)):
+            # The CRPS is set to a constant BAD_VALUE.
+            return np.zeros(len(initial_guess), dtype=np.float64)
         xz = (truth - mu) / sigma
-        normal_cdf = norm.cdf(xz)
-        normal_pdf = norm.pdf(xz)
+        normal_cdf, normal_pdf = self._normal_cdf_and_pdf(xz)
+        mu_gradient = 1 - 2 * normal_cdf
+        sigma_gradient = 2 * normal_pdf - 1 / sqrt_pi
+        return self._chain_crps_gradient(
+            initial_guess, design_matrix, forecast_var, sigma,
+            mu_gradient, sigma_gradient, predictor_of_mean_flag)
+
+    def truncated_normal_crps_gradient(
+            self, initial_guess, forecast_predictor, truth, forecast_var,
+            sqrt_pi, predictor_of_mean_flag):
+        """
+        Gradient of the CRPS for a truncated normal distribution, as
+        minimised by truncated_normal_crps_minimiser, with respect to the
+        coefficients.
+
+        Args:
+            initial_guess (list):
+                List of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            forecast_predictor (np.ndarray):
+                Data to be used as the predictor,
+                either the ensemble mean or the ensemble realizations.
+            truth (np.ndarray):
+                Data to be used as truth.
+            forecast_var (np.ndarray):
+                Ensemble variance data.
+            sqrt_pi (np.ndarray):
+                Square root of Pi
+            predictor_of_mean_flag (str):
+                String to specify the input to calculate the calibrated mean.
+                Currently the ensemble mean ("mean") and the ensemble
+                realizations ("realizations") are supported as the predictors.
+
+        Returns:
+            gradient (np.ndarray):
+                Gradient of the CRPS with respect to each coefficient.
+
+        """
+        forecast_predictor, truth, forecast_var = (
+            self._compact_training_data(
+                forecast_predictor, truth, forecast_var))
+        return self._truncated_normal_crps_gradient(
+            initial_guess, self._design_matrix(
+                forecast_predictor, forecast_var),
+            truth, forecast_var, sqrt_pi, predictor_of_mean_flag)
+
+    def _truncated_normal_crps_gradient(
+            self, initial_guess, design_matrix, truth, forecast_var,
+            sqrt_pi, predictor_of_mean_flag):
+        """
+        Gradient of the CRPS for a truncated normal distribution, as
+        calculated by _truncated_normal_crps, with respect to the
+        coefficients.
+
+        Args:
+            initial_guess (list):
+                List of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            design_matrix (np.ndarray):
+                Design matrix created by _design_matrix.
+            truth (np.ndarray):
+                Data to be used as truth.
+            forecast_var (np.ndarray):
+                Ensemble variance data.
+            sqrt_pi (np.ndarray):
+                Square root of Pi
+            predictor_of_mean_flag (str):
+                String to specify the input to calculate the calibrated mean.
+
+        Returns:
+            gradient (np.ndarray):
+                Gradient of the CRPS with respect to each coefficient.
+
+        """
+        mu, sigma = self._calculate_mu_and_sigma(
+            initial_guess, design_matrix, forecast_var,
+            predictor_of_mean_flag)
         x0 = mu / sigma
-        normal_cdf_0 = norm.cdf(x0)
-        normal_cdf_root_two = norm.cdf(np.sqrt(2) * x0)
-        result = np.nansum(
-            (sigma / normal_cdf_0**2) *
-            (xz * normal_cdf_0 * (2 * normal_cdf + normal_cdf_0 - 2) +
-             2 * normal_pdf * normal_cdf_0 -
-             normal_cdf_root_two / sqrt_pi))
-        if not np.isfinite(np.min(mu/sigma)) or (np.min(mu/sigma) < -3):
-            result = self.BAD_VALUE
-        return result
+        if not np.isfinite(np.min(x0)) or (np.min(x0) < -3):
+            # The CRPS is set to a constant BAD_VALUE.
+            return np.zeros(len(initial_guess), dtype=np.float64)
+        xz = (truth - mu) / sigma
+        normal_cdf, normal_pdf = self._normal_cdf_and_pdf(xz)
+        normal_cdf_0, normal_pdf_0 = self._normal_cdf_and_pdf(x0)
+        normal_cdf_root_two, normal_pdf_root_two = (
+            self._normal_cdf_and_pdf(np.sqrt(2) * x0))
+        # The CRPS is sigma * F(xz, x0), where F is the bracketed term of the
+        # CRPS divided by normal_cdf_0**2. As xz = (truth - mu) / sigma and
+        # x0 = mu / sigma, the gradients with respect to mu and sigma follow
+        # from the partial derivatives of F with respect to xz and x0.
+        bracket = (
+            xz * normal_cdf_0 * (2 * normal_cdf + normal_cdf_0 - 2) +
+            2 * normal_pdf * normal_cdf_0 -
+            normal_cdf_root_two / sqrt_pi)
+        f_value = bracket / normal_cdf_0**2
+        f_gradient_xz = (2 * normal_cdf + normal_cdf_0 - 2) / normal_cdf_0
+        f_gradient_x0 = (
+            (xz * normal_pdf_0 * (2 * normal_cdf + 2 * normal_cdf_0 - 2) +
+             2 * normal_pdf * normal_pdf_0 -
+             np.sqrt(2) * normal_pdf_root_two / sqrt_pi) /
+            normal_cdf_0**2 -
+            2 * bracket * normal_pdf_0 / normal_cdf_0**3)
+        mu_gradient = f_gradient_x0 - f_gradient_xz
+        sigma_gradient = f_value - xz * f_gradient_xz - x0 * f_gradient_x0
+        return self._chain_crps_gradient(
+            initial_guess, design_matrix, forecast_var, sigma,
+            mu_gradient, sigma_gradient, predictor_of_mean_flag)
+
+
+def _estimate_coefficients_for_points(
+        initial_guess, forecast_predictor_data, truth_data,
+        forecast_var_data, predictor_of_mean_flag, distribution,
+        minimisation_method):
+    """
+    Estimate the coefficients separately at each of a set of points, by
+    minimising the CRPS over the training data at each point. This is a
+    module level function, so that it can be run by a process pool.
+
+    Args:
+        initial_guess (np.ndarray):
+            Coefficients used as the initial guess with the coefficients as
+            the first dimension and the points as the second dimension.
+            Order of coefficients is [gamma, delta, alpha, beta].
+        forecast_predictor_data (np.ndarray):
+            Predictor data with the training samples as the first dimension
+            and the points as the last dimension. If the ensemble
+            realizations are the predictor, the realizations are the second
+            dimension.
+        truth_data (np.ndarray):
+            Truth data with the training samples as the first dimension and
+            the points as the second dimension.
+        forecast_var_data (np.ndarray):
+            Ensemble variance data with the training samples as the first
+            dimension and the points as the second dimension.
+        predictor_of_mean_flag (str):
+            String to specify the input to calculate the calibrated mean.
+        distribution (str):
+            Name of the distribution used by the minimiser.
+        minimisation_method (str):
+            Method used by ContinuousRankedProbabilityScoreMinimisers.
+
+    Returns:
+        (tuple) : tuple containing:
+            **optimised_coeffs** (np.ndarray):
+                Coefficients with the coefficients as the first dimension
+                and the points as the second dimension. Points without any
+                valid training data have NaN coefficients.
+            **no_of_points_with_warnings** (int):
+                Number of points at which the minimisation raised a warning.
+    """
+    minimiser = ContinuousRankedProbabilityScoreMinimisers(
+        minimisation_method=minimisation_method)
+    no_of_points = truth_data.shape[-1]
+    optimised_coeffs = np.full(
+        (len(initial_guess), no_of_points), np.nan, dtype=np.float32)
+    no_of_points_with_warnings = 0
+    # Points without any valid training samples are skipped. The invalid
+    # samples at the other points are removed by the minimiser.
+    points_with_valid_samples = minimiser._valid_samples(
+        forecast_predictor_data, truth_data, forecast_var_data).any(axis=0)
+    for index in np.flatnonzero(points_with_valid_samples):
+        # Warnings are counted, rather than raised for every point.
+        with warnings.catch_warnings(record=True) as warning_list:
+            warnings.simplefilter("always")
+            optimised_coeffs[:, index] = minimiser.crps_minimiser_for_data(
+                initial_guess[:, index], forecast_predictor_data[..., index],
+                truth_data[:, index], forecast_var_data[:, index],
+                predictor_of_mean_flag, distribution)
+        if warning_list:
+            no_of_points_with_warnings += 1
+    return optimised_coeffs, no_of_points_with_warnings
 
 
 class EstimateCoefficientsForEnsembleCalibration(object):
@@ -335,8 +947,14 @@ class EstimateCoefficientsForEnsembleCalibration(object):
     # ESTIMATE_COEFFICIENTS_FROM_LINEAR_MODEL_FLAG = False.
     ESTIMATE_COEFFICIENTS_FROM_LINEAR_MODEL_FLAG = True
 
+    # Number of chunks of points per process, when estimating coefficients
+    # for each point, so that the work is balanced between processes.
+    CHUNKS_PER_PROCESS = 4
+
     def __init__(self, distribution, current_cycle, desired_units=None,
-                 predictor_of_mean_flag="mean"):
+                 predictor_of_mean_flag="mean",
+                 minimisation_method="Nelder-Mead", point_by_point=False,
+                 processes=1):
         """
         Create an ensemble calibration plugin that, for Nonhomogeneous Gaussian
         Regression, calculates coefficients based on historical forecasts and
@@ -360,15 +978,38 @@ class EstimateCoefficientsForEnsembleCalibration(object):
                 String to specify the input to calculate the calibrated mean.
                 Currently the ensemble mean ("mean") and the ensemble
                 realizations ("realizations") are supported as the predictors.
+            minimisation_method (str):
+                Method used to minimise the CRPS, either "Nelder-Mead" or
+                "BFGS", which uses the analytic gradient of the CRPS.
+                See ContinuousRankedProbabilityScoreMinimisers.
+            point_by_point (bool):
+                If True, coefficients are estimated separately for each
+                point using the training data at that point, rather than a
+                single set of coefficients for the whole domain.
+            processes (int):
+                Number of processes used to estimate the coefficients at
+                each point, if point_by_point is True. If 1, the points are
+                processed in the current process.
+
+        Raises:
+            ValueError: If the number of processes is less than 1.
 
         """
+        if processes < 1:
+            msg = ("The number of processes must be at least 1, "
+                   "not {}.".format(processes))
+            raise ValueError(msg)
         self.distribution = distribution
         self.current_cycle = current_cycle
         self.desired_units = desired_units
         # Ensure predictor_of_mean_flag is valid.
         check_predictor_of_mean_flag(predictor_of_mean_flag)
         self.predictor_of_mean_flag = predictor_of_mean_flag
-        self.minimiser = ContinuousRankedProbabilityScoreMinimisers()
+        self.minimisation_method = minimisation_method
+        self.minimiser = ContinuousRankedProbabilityScoreMinimisers(
+            minimisation_method=minimisation_method)
+        self.point_by_point = point_by_point
+        self.processes = processes
         # Setting default values for coeff_names. Beta is the final
         # coefficient name in the list, as there can potentially be
         # multiple beta coefficients if the ensemble realizations, rather
@@ -417,9 +1058,12 @@ class EstimateCoefficientsForEnsembleCalibration(object):
            ensemble_calibration/create_coefficients_cube.rst
 
         Args:
-            optimised_coeffs (list):
+            optimised_coeffs (list or np.ndarray):
                 List of optimised coefficients.
                 Order of coefficients is [gamma, delta, alpha, beta].
+                If the coefficients have been estimated for each point, this
+                is an array with the coefficients as the first dimension,
+                followed by the y and x dimensions of the historic forecast.
             historic_forecast (iris.cube.Cube):
                 The cube containing the historic forecast.
 
@@ -430,7 +1074,9 @@ class EstimateCoefficientsForEnsembleCalibration(object):
                 a coefficient_index dimension coordinate where the points
                 of the coordinate are integer values and a
                 coefficient_name auxiliary coordinate where the points of
-                the coordinate are e.g. gamma, delta, alpha, beta.
+                the coordinate are e.g. gamma, delta, alpha, beta. For
+                coefficients estimated for each point, the y and x dimension
+                coordinates of the historic forecast follow.
 
         """
         if self.predictor_of_mean_flag.lower() == "realizations":
@@ -455,6 +1101,12 @@ class EstimateCoefficientsForEnsembleCalibration(object):
             coeff_names, long_name="coefficient_name", units="no_unit")
         dim_coords_and_dims = [(coefficient_index, 0)]
         aux_coords_and_dims = [(coefficient_name, 0)]
+        # Coefficients estimated for each point are followed by the y and x
+        # dimensions of the historic forecast.
+        if np.ndim(optimised_coeffs) > 1:
+            for index, axis in enumerate(["y", "x"]):
+                dim_coords_and_dims.append(
+                    (historic_forecast.coord(axis=axis).copy(), index + 1))
 
         # Create a forecast_reference_time coordinate.
         frt_point = cycletime_to_datetime(self.current_cycle)
@@ -597,7 +1249,249 @@ class EstimateCoefficientsForEnsembleCalibration(object):
                         [1, 1, 0] + np.repeat(1, no_of_realizations).tolist())
         return np.array(initial_guess, dtype=np.float32)
 
-    def estimate_coefficients_for_ngr(self, historic_forecast, truth):
+    def _estimate_coefficients_by_point(
+            self, initial_guess, forecast_predictor, truth, forecast_var):
+        """
+        Estimate the coefficients separately at each point, using the
+        training data at that point. The points are split into chunks,
+        which are processed by a pool of processes, if more than one process
+        has been requested.
+
+        Args:
+            initial_guess (np.ndarray):
+                Coefficients used as the initial guess, either the same
+                coefficients at every point, or an array with the
+                coefficients as the first dimension, followed by the y and x
+                dimensions. Order of coefficients is
+                [gamma, delta, alpha, beta].
+            forecast_predictor (iris.cube.Cube):
+                Cube containing the fields to be used as the predictor,
+                either the ensemble mean or the ensemble realizations.
+            truth (iris.cube.Cube):
+                Cube containing the field, which will be used as truth.
+            forecast_var (iris.cube.Cube):
+                Cube containg the field containing the ensemble variance.
+
+        Returns:
+            optimised_coeffs (np.ndarray):
+                Coefficients with the coefficients as the first dimension,
+                followed by the y and x dimensions.
+        """
+        spatial_coords = [truth.coord(axis="y").name(),
+                          truth.coord(axis="x").name()]
+        grid_shape = (truth.coord(axis="y").shape +
+                      truth.coord(axis="x").shape)
+        no_of_points = int(np.prod(grid_shape))
+
+        def get_data(cube, leading_coord=None):
+            """Get the data with any leading coordinate first and the
+            spatial coordinates last, with masked points set to NaN."""
+            cube = cube.copy()
+            if leading_coord is not None:
+                enforce_coordinate_ordering(cube, leading_coord)
+            enforce_coordinate_ordering(cube, spatial_coords, anchor="end")
+            return np.ma.filled(
+                np.ma.asarray(cube.data, dtype=np.float32), np.nan)
+
+        truth_data = get_data(truth).reshape(-1, no_of_points)
+        forecast_var_data = get_data(forecast_var).reshape(-1, no_of_points)
+        if self.predictor_of_mean_flag.lower() == "mean":
+            forecast_predictor_data = (
+                get_data(forecast_predictor).reshape(-1, no_of_points))
+        elif self.predictor_of_mean_flag.lower() == "realizations":
+            no_of_realizations = len(
+                forecast_predictor.coord("realization").points)
+            forecast_predictor_data = get_data(
+                forecast_predictor, leading_coord="realization").reshape(
+                    no_of_realizations, -1, no_of_points).transpose(1, 0, 2)
+
+        no_of_coeffs = len(initial_guess)
+        initial_guess = np.broadcast_to(
+            initial_guess.reshape(no_of_coeffs, -1),
+            (no_of_coeffs, no_of_points))
+
+        # Contiguous chunks of points, so that each process is only sent
+        # the training data for its own points.
+        no_of_chunks = min(self.processes * self.CHUNKS_PER_PROCESS,
+                           no_of_points)
+        boundaries = np.linspace(
+            0, no_of_points, no_of_chunks + 1).astype(int)
+        args = [(initial_guess[:, start:end],
+                 forecast_predictor_data[..., start:end],
+                 truth_data[:, start:end], forecast_var_data[:, start:end],
+                 self.predictor_of_mean_flag, self.distribution.lower(),
+                 self.minimisation_method)
+                for start, end in zip(boundaries[:-1], boundaries[1:])]
+        if self.processes > 1:
+            with ProcessPoolExecutor(max_workers=self.processes) as executor:
+                futures = [
+                    executor.submit(_estimate_coefficients_for_points, *arg)
+                    for arg in args]
+                results = [future.result() for future in futures]
+        else:
+            results = [_estimate_coefficients_for_points(*arg)
+                       for arg in args]
+
+        optimised_coeffs = np.concatenate(
+            [coeffs for coeffs, _ in results], axis=1)
+        no_of_points_with_warnings = sum(count for _, count in results)
+        if no_of_points_with_warnings:
+            msg = ("The minimisation raised warnings, such as not "
+                   "converging, at {} of {} points.".format(
+                       no_of_points_with_warnings, no_of_points))
+            warnings.warn(msg)
+        return optimised_coeffs.reshape((no_of_coeffs,) + grid_shape)
+
+    def _initial_guess_from_coefficients(
+            self, coefficients_cube, truth, no_of_coeffs):
+        """
+        Get the initial guess from previously estimated coefficients, for
+        example the coefficients estimated on the previous day, so that the
+        minimisation is warm-started.
+
+        Args:
+            coefficients_cube (iris.cube.Cube):
+                Cube containing the previously estimated coefficients, as
+                created by create_coefficients_cube.
+            truth (iris.cube.Cube):
+                Cube containing the field, which will be used as truth.
+            no_of_coeffs (int):
+                Number of coefficients that will be estimated.
+
+        Returns:
+            initial_guess (np.ndarray):
+                Coefficients to be used as the initial guess. If the
+                coefficients were estimated for each point, the coefficients
+                are the first dimension, followed by the y and x dimensions.
+
+        Raises:
+            ValueError: If the number of coefficients does not match the
+                number of coefficients that will be estimated.
+            ValueError: If the coefficients were estimated for each point,
+                but the coefficients will not be estimated for each point.
+            ValueError: If the coefficients were estimated for each point on
+                a different grid to the truth.
+        """
+        if len(coefficients_cube.coord("coefficient_index").points) != (
+                no_of_coeffs):
+            msg = ("The number of coefficients in the initial guess {} must "
+                   "equal the number of coefficients to be estimated "
+                   "{}.".format(
+                       coefficients_cube.coord("coefficient_name").points,
+                       no_of_coeffs))
+            raise ValueError(msg)
+
+        if coefficients_cube.ndim > 1:
+            if not self.point_by_point:
+                msg = ("Coefficients estimated for each point can only be "
+                       "used as the initial guess when the coefficients are "
+                       "estimated for each point.")
+                raise ValueError(msg)
+            spatial_coords = [truth.coord(axis="y"), truth.coord(axis="x")]
+            if [coefficients_cube.coord(axis="y"),
+                    coefficients_cube.coord(axis="x")] != spatial_coords:
+                msg = ("The spatial coordinates of the initial guess must "
+                       "match the spatial coordinates of the truth.")
+                raise ValueError(msg)
+            coefficients_cube = coefficients_cube.copy()
+            enforce_coordinate_ordering(
+                coefficients_cube,
+                ["coefficient_index"] + [coord.name()
+                                         for coord in spatial_coords])
+        return np.array(coefficients_cube.data, dtype=np.float32)
+
+    def _estimate_coefficients(
+            self, forecast_predictor, forecast_var, truth, historic_forecast,
+            no_of_realizations=None, initial_guess=None):
+        """
+        Estimate the coefficients from the forecast predictor and variance,
+        and create the coefficients cube.
+
+        Args:
+            forecast_predictor (iris.cube.Cube):
+                Cube containing the fields to be used as the predictor,
+                either the ensemble mean or the ensemble realizations.
+            forecast_var (iris.cube.Cube):
+                Cube containg the field containing the ensemble variance.
+            truth (iris.cube.Cube):
+                Cube containing the field, which will be used as truth.
+            historic_forecast (iris.cube.Cube):
+                The cube containing the historic forecast, which is used for
+                the metadata of the coefficients cube.
+
+        Kwargs:
+            no_of_realizations (int):
+                Number of realizations, if ensemble realizations are to be
+                used as predictors. Default is None.
+            initial_guess (iris.cube.Cube):
+                Cube containing previously estimated coefficients to be used
+                as the initial guess. Any NaN coefficients are replaced by
+                the initial guess calculated by compute_initial_guess.
+                Default is None, in which case the initial guess is
+                calculated by compute_initial_guess.
+
+        Returns:
+            coefficients_cube (iris.cube.Cube):
+                Cube containing the coefficients estimated using EMOS.
+        """
+        if initial_guess is not None:
+            if self.predictor_of_mean_flag.lower() == "mean":
+                no_of_coeffs = len(self.coeff_names)
+            else:
+                no_of_coeffs = len(self.coeff_names) - 1 + no_of_realizations
+            initial_guess = self._initial_guess_from_coefficients(
+                initial_guess, truth, no_of_coeffs)
+
+        # Computing initial guess for EMOS coefficients, if there is no
+        # initial guess from previously estimated coefficients, or if there
+        # are NaNs in the initial guess.
+        if initial_guess is None or np.any(np.isnan(initial_guess)):
+            computed_initial_guess = self.compute_initial_guess(
+                truth, forecast_predictor, self.predictor_of_mean_flag,
+                self.ESTIMATE_COEFFICIENTS_FROM_LINEAR_MODEL_FLAG,
+                no_of_realizations=no_of_realizations)
+            if initial_guess is None:
+                initial_guess = computed_initial_guess
+            else:
+                computed_initial_guess = computed_initial_guess.reshape(
+                    (-1,) + (1,) * (initial_guess.ndim - 1))
+                initial_guess = np.where(
+                    np.isnan(initial_guess), computed_initial_guess,
+                    initial_guess)
+
+        nan_in_initial_guess = np.any(np.isnan(initial_guess))
+
+        if not nan_in_initial_guess and self.point_by_point:
+            # The coefficients for the whole domain are used as the initial
+            # guess at each point, unless an initial guess for each point
+            # has been provided.
+            optimised_coeffs = self._estimate_coefficients_by_point(
+                initial_guess, forecast_predictor, truth, forecast_var)
+        elif not nan_in_initial_guess:
+            # Need to access the x attribute returned by the
+            # minimisation function.
+            optimised_coeffs = (
+                self.minimiser.crps_minimiser_wrapper(
+                    initial_guess, forecast_predictor,
+                    truth, forecast_var,
+                    self.predictor_of_mean_flag,
+                    self.distribution.lower()))
+        elif self.point_by_point:
+            grid_shape = (truth.coord(axis="y").shape +
+                          truth.coord(axis="x").shape)
+            optimised_coeffs = np.broadcast_to(
+                initial_guess.reshape(
+                    initial_guess.shape + (1,) * (3 - initial_guess.ndim)),
+                (len(initial_guess),) + grid_shape).copy()
+        else:
+            optimised_coeffs = initial_guess
+
+        coefficients_cube = (
+            self.create_coefficients_cube(optimised_coeffs, historic_forecast))
+        return coefficients_cube
+
+    def estimate_coefficients_for_ngr(
+            self, historic_forecast, truth, initial_guess=None):
         """
         Using Nonhomogeneous Gaussian Regression/Ensemble Model Output
         Statistics, estimate the required coefficients from historical
@@ -628,6 +1522,13 @@ class EstimateCoefficientsForEnsembleCalibration(object):
             truth (iris.cube.Cube:
                 The cube containing the truth used for calibration.
 
+        Kwargs:
+            initial_guess (iris.cube.Cube):
+                Cube containing previously estimated coefficients, e.g. from
+                the previous day, to be used as the initial guess for the
+                minimisation. Default is None, in which case the initial
+                guess is calculated.
+
         Returns:
             coefficients_cube (iris.cube.Cube):
                 Cube containing the coefficients estimated using EMOS.
@@ -638,10 +1539,6 @@ class EstimateCoefficientsForEnsembleCalibration(object):
         # Ensure predictor_of_mean_flag is valid.
         check_predictor_of_mean_flag(self.predictor_of_mean_flag)
 
-        # Set default values for whether there are NaN values within the
-        # initial guess.
-        nan_in_initial_guess = False
-
         # Make sure inputs have the same units.
         if self.desired_units:
             historic_forecast.convert_units(self.desired_units)
@@ -665,34 +1562,276 @@ class EstimateCoefficientsForEnsembleCalibration(object):
         forecast_var = historic_forecast.collapsed(
             "realization", iris.analysis.VARIANCE)
 
-        # Computing initial guess for EMOS coefficients
-        # If no initial guess from a previous iteration, or if there
-        # are NaNs in the initial guess, calculate an initial guess.
-        if "initial_guess" not in locals() or nan_in_initial_guess:
-            initial_guess = self.compute_initial_guess(
-                truth, forecast_predictor, self.predictor_of_mean_flag,
-                self.ESTIMATE_COEFFICIENTS_FROM_LINEAR_MODEL_FLAG,
-                no_of_realizations=no_of_realizations)
+        return self._estimate_coefficients(
+            forecast_predictor, forecast_var, truth, historic_forecast,
+            no_of_realizations=no_of_realizations,
+            initial_guess=initial_guess)
 
-        if np.any(np.isnan(initial_guess)):
-            nan_in_initial_guess = True
+    def estimate_coefficients_from_training_data(
+            self, forecast_mean, forecast_var, truth, initial_guess=None):
+        """
+        Using Nonhomogeneous Gaussian Regression/Ensemble Model Output
+        Statistics, estimate the required coefficients from the ensemble
+        mean and variance of the historical forecasts, such as the training
+        data held by RollingTrainingDataForEnsembleCalibration. The ensemble
+        mean is used as the predictor.
 
-        if not nan_in_initial_guess:
-            # Need to access the x attribute returned by the
-            # minimisation function.
-            optimised_coeffs = (
-                self.minimiser.crps_minimiser_wrapper(
-                    initial_guess, forecast_predictor,
-                    truth, forecast_var,
-                    self.predictor_of_mean_flag,
-                    self.distribution.lower()))
-            initial_guess = optimised_coeffs
-        else:
-            optimised_coeffs = initial_guess
+        Args:
+            forecast_mean (iris.cube.Cube):
+                Cube containing the ensemble mean of the historical
+                forecasts.
+            forecast_var (iris.cube.Cube):
+                Cube containing the ensemble variance of the historical
+                forecasts.
+            truth (iris.cube.Cube):
+                The cube containing the truth used for calibration.
 
-        coefficients_cube = (
-            self.create_coefficients_cube(optimised_coeffs, historic_forecast))
-        return coefficients_cube
+        Kwargs:
+            initial_guess (iris.cube.Cube):
+                Cube containing previously estimated coefficients, e.g. from
+                the previous day, to be used as the initial guess for the
+                minimisation. Default is None, in which case the initial
+                guess is calculated.
+
+        Returns:
+            coefficients_cube (iris.cube.Cube):
+                Cube containing the coefficients estimated using EMOS.
+
+        Raises:
+            ValueError: If the ensemble mean is not the predictor of the
+                mean.
+            ValueError: If the units of the forecast mean and truth differ.
+        """
+        if self.predictor_of_mean_flag.lower() != "mean":
+            msg = ("Coefficients can only be estimated from the training "
+                   "data if the ensemble mean is the predictor of the mean, "
+                   "not {}.".format(self.predictor_of_mean_flag))
+            raise ValueError(msg)
+
+        if forecast_mean.units != truth.units:
+            msg = ("The historic forecast units of {} do not match "
+                   "the truth units {}. These units must match, so that "
+                   "the coefficients can be estimated.".format(
+                       forecast_mean.units, truth.units))
+            raise ValueError(msg)
+
+        return self._estimate_coefficients(
+            forecast_mean, forecast_var, truth, forecast_mean,
+            initial_guess=initial_guess)
+
+
+class RollingTrainingDataForEnsembleCalibration(object):
+    """
+    Class to maintain a rolling window of compacted training data for
+    estimating EMOS coefficients. Only the ensemble mean and variance of the
+    historic forecasts and the truth are stored for each validity time, so
+    the full historic forecasts for the window do not need to be reloaded
+    each day.
+
+    """
+    # Template for the names of the files within the store, formatted with
+    # the validity time, as a cycletime, and the name of the training data.
+    FILENAME_TEMPLATE = "{}_emos_training_{}.nc"
+
+    # Names of the training data stored for each validity time.
+    TRAINING_DATA_NAMES = ["forecast_mean", "forecast_variance", "truth"]
+
+    def __init__(self, directory, window_length, desired_units=None):
+        """
+        Create a plugin to maintain a rolling window of training data.
+
+        Args:
+            directory (str):
+                Directory in which the training data for each validity time
+                is stored.
+            window_length (int):
+                Number of validity times to keep in the store. When new
+                training data is added, the oldest validity times are
+                removed from the store.
+
+        Kwargs:
+            desired_units (str or cf_units.Unit):
+                The unit that the training data is stored in. The historical
+                forecast and truth will be converted as required.
+
+        Raises:
+            ValueError: If the window length is less than 1.
+        """
+        if window_length < 1:
+            msg = ("The window length must be at least 1, "
+                   "not {}.".format(window_length))
+            raise ValueError(msg)
+        self.directory = directory
+        self.window_length = window_length
+        self.desired_units = desired_units
+
+    def __repr__(self):
+        """Represent the configured plugin instance as a string."""
+        result = ('<RollingTrainingDataForEnsembleCalibration: '
+                  'directory: {}; '
+                  'window_length: {}; '
+                  'desired_units: {}>')
+        return result.format(
+            self.directory, self.window_length, self.desired_units)
+
+    def _filepath(self, cycletime, name):
+        """Get the filepath of the training data for a validity time."""
+        return os.path.join(
+            self.directory, self.FILENAME_TEMPLATE.format(cycletime, name))
+
+    def stored_validity_times(self):
+        """
+        Find the validity times for which training data is stored.
+
+        Returns:
+            cycletimes (list):
+                Sorted list of the validity times in YYYYMMDDTHHMMZ format.
+        """
+        filepaths = glob.glob(
+            self._filepath("*", self.TRAINING_DATA_NAMES[0]))
+        return sorted(
+            os.path.basename(filepath).split("_")[0]
+            for filepath in filepaths)
+
+    def compact(self, historic_forecast, truth):
+        """
+        Compact the historic forecast into the ensemble mean and variance.
+
+        Args:
+            historic_forecast (iris.cube.Cube):
+                The cube containing the historical forecasts.
+            truth (iris.cube.Cube):
+                The cube containing the truth.
+
+        Returns:
+            (tuple) : tuple containing:
+                **forecast_mean** (iris.cube.Cube):
+                    Cube containing the ensemble mean.
+                **forecast_var** (iris.cube.Cube):
+                    Cube containing the ensemble variance.
+                **truth** (iris.cube.Cube):
+                    Cube containing the truth.
+
+        Raises:
+            ValueError: If the units of the historic forecast and truth
+                differ.
+        """
+        historic_forecast = historic_forecast.copy()
+        truth = truth.copy()
+        if self.desired_units:
+            historic_forecast.convert_units(self.desired_units)
+            truth.convert_units(self.desired_units)
+
+        if historic_forecast.units != truth.units:
+            msg = ("The historic forecast units of {} do not match "
+                   "the truth units {}. These units must match, so that "
+                   "the coefficients can be estimated.".format(
+                       historic_forecast.units, truth.units))
+            raise ValueError(msg)
+
+        forecast_mean = historic_forecast.collapsed(
+            "realization", iris.analysis.MEAN)
+        forecast_var = historic_forecast.collapsed(
+            "realization", iris.analysis.VARIANCE)
+        for cube in [forecast_mean, forecast_var, truth]:
+            check_cube_not_float64(cube, fix=True)
+        return forecast_mean, forecast_var, truth
+
+    def update(self, historic_forecast, truth):
+        """
+        Add the compacted training data for each validity time of the
+        historic forecast to the store, and remove the oldest validity
+        times, so that the store contains at most window_length validity
+        times.
+
+        Args:
+            historic_forecast (iris.cube.Cube):
+                The cube containing the historical forecasts for the
+                newest validity time(s).
+            truth (iris.cube.Cube):
+                The cube containing the truth for the same validity
+                time(s).
+
+        Raises:
+            ValueError: If there is no truth for a validity time of the
+                historic forecast.
+        """
+        def slices_by_validity_time(cube):
+            """Get the slices of the cube for each validity time."""
+            if cube.coord_dims("time"):
+                slices = cube.slices_over("time")
+            else:
+                slices = [cube]
+            return {datetime_to_cycletime(
+                        iris_time_to_datetime(cube_slice.coord("time"))[0]):
+                    cube_slice for cube_slice in slices}
+
+        training_data = [slices_by_validity_time(cube)
+                         for cube in self.compact(historic_forecast, truth)]
+        for cycletime in training_data[0]:
+            if cycletime not in training_data[-1]:
+                msg = ("No truth is available for the historic forecast "
+                       "valid at {}.".format(cycletime))
+                raise ValueError(msg)
+            for name, cubes in zip(self.TRAINING_DATA_NAMES, training_data):
+                save_netcdf(cubes[cycletime],
+                            self._filepath(cycletime, name))
+
+        stored_validity_times = self.stored_validity_times()
+        for cycletime in stored_validity_times[:-self.window_length]:
+            for name in self.TRAINING_DATA_NAMES:
+                os.remove(self._filepath(cycletime, name))
+
+    def load(self):
+        """
+        Load the training data for the validity times within the store.
+
+        Returns:
+            (tuple) : tuple containing:
+                **forecast_mean** (iris.cube.Cube):
+                    Cube containing the ensemble mean.
+                **forecast_var** (iris.cube.Cube):
+                    Cube containing the ensemble variance.
+                **truth** (iris.cube.Cube):
+                    Cube containing the truth.
+
+        Raises:
+            ValueError: If there is no training data within the store.
+        """
+        stored_validity_times = self.stored_validity_times()
+        if not stored_validity_times:
+            msg = "No training data is stored in {}.".format(self.directory)
+            raise ValueError(msg)
+        return tuple(
+            load_cube([self._filepath(cycletime, name)
+                       for cycletime in stored_validity_times],
+                      no_lazy_load=True)
+            for name in self.TRAINING_DATA_NAMES)
+
+    def process(self, historic_forecast, truth):
+        """
+        Add the newest training data to the store and load the training
+        data for the rolling window.
+
+        Args:
+            historic_forecast (iris.cube.Cube):
+                The cube containing the historical forecasts for the
+                newest validity time(s).
+            truth (iris.cube.Cube):
+                The cube containing the truth for the same validity
+                time(s).
+
+        Returns:
+            (tuple) : tuple containing:
+                **forecast_mean** (iris.cube.Cube):
+                    Cube containing the ensemble mean.
+                **forecast_var** (iris.cube.Cube):
+                    Cube containing the ensemble variance.
+                **truth** (iris.cube.Cube):
+                    Cube containing the truth.
+        """
+        self.update(historic_forecast, truth)
+        return self.load()
 
 
 class ApplyCoefficientsFromEnsembleCalibration(object):
@@ -700,6 +1839,10 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
     Class to apply the optimised EMOS coefficients to future dates.
 
     """
+    # Approximate number of points within each tile, when applying the
+    # coefficients in tiles along the leading dimension of the forecast.
+    TILE_SIZE = 2**20
+
     def __init__(
             self, current_forecast, coefficients_cube,
             predictor_of_mean_flag="mean"):
@@ -716,12 +1859,21 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
                 The cube contains a coefficient_index dimension coordinate
                 where the points of the coordinate are integer values and a
                 coefficient_name auxiliary coordinate where the points of
-                the coordinate are e.g. gamma, delta, alpha, beta.
+                the coordinate are e.g. gamma, delta, alpha, beta. If the
+                coefficients were estimated for each point, the cube also
+                has the spatial coordinates of the current forecast.
             predictor_of_mean_flag (str):
                 String to specify the input to calculate the calibrated mean.
                 Currently the ensemble mean ("mean") and the ensemble
                 realizations ("realizations") are supported as the predictors.
 
+        Raises:
+            ValueError: If the forecast_period, time or
+                forecast_reference_time coordinates of the current forecast
+                and coefficients cube differ.
+            ValueError: If the spatial coordinates of coefficients estimated
+                for each point differ from those of the current forecast.
+
         """
         self.current_forecast = current_forecast
         self.coefficients_cube = coefficients_cube
@@ -741,6 +1893,18 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
             except CoordinateNotFoundError:
                 pass
 
+        for axis in ["y", "x"]:
+            if (self.coefficients_cube.coords(axis=axis) and
+                    self.coefficients_cube.coord(axis=axis) !=
+                    self.current_forecast.coord(axis=axis)):
+                msg = ("The {} coordinate of the current forecast cube and "
+                       "the coefficients estimated for each point differs. "
+                       "current forecast: {}, "
+                       "coefficients cube: {}").format(
+                            axis, self.current_forecast.coord(axis=axis),
+                            self.coefficients_cube.coord(axis=axis))
+                raise ValueError(msg)
+
         # Ensure predictor_of_mean_flag is valid.
         check_predictor_of_mean_flag(predictor_of_mean_flag)
         self.predictor_of_mean_flag = predictor_of_mean_flag
@@ -785,9 +1949,57 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
             self._apply_params(forecast_predictors, forecast_vars))
         return calibrated_forecast_predictor, calibrated_forecast_var
 
+    def _apply_coefficients_in_tiles(
+            self, intercept, coefficients, fields, dtype):
+        """
+        Calculate intercept + sum(coefficient * field) over the pairs of
+        coefficients and fields. The calculation is performed in place on
+        tiles along the leading dimension of the fields, so that, apart
+        from the result, only temporary arrays of the size of a tile are
+        created.
+
+        Args:
+            intercept (float or np.ndarray):
+                Intercept, either a single value, or a value for each point.
+            coefficients (list):
+                Coefficients for each field, either single values, or values
+                for each point, which can be broadcast to the fields.
+            fields (list or np.ndarray):
+                Fields to which the coefficients are applied. Each field has
+                the shape of the result.
+            dtype (np.dtype):
+                Data type in which the result is calculated.
+
+        Returns:
+            result (np.ndarray):
+                Result of applying the coefficients to the fields.
+        """
+        shape = np.shape(fields[0])
+        result = np.empty(shape, dtype=dtype)
+        intercept = np.broadcast_to(intercept, shape)
+        coefficients = [np.broadcast_to(coefficient, shape)
+                        for coefficient in coefficients]
+        tile_length = max(
+            1, self.TILE_SIZE // max(1, int(np.prod(shape[1:]))))
+        temporary = np.empty((tile_length,) + shape[1:], dtype=dtype)
+        for start in range(0, shape[0], tile_length):
+            tile = slice(start, start + tile_length)
+            result_tile = result[tile]
+            temporary_tile = temporary[:len(result_tile)]
+            result_tile[...] = intercept[tile]
+            for coefficient, field in zip(coefficients, fields):
+                np.multiply(field[tile], coefficient[tile],
+                            out=temporary_tile, dtype=dtype)
+                result_tile += temporary_tile
+        return result
+
     def _apply_params(self, forecast_predictors, forecast_vars):
         """
         Function to apply EMOS coefficients to all required dates.
+        The coefficients are applied in place to tiles of the forecast, so
+        that the memory used is close to the size of the calibrated
+        fields. Coefficients estimated for each point are applied to the
+        matching point of the forecast.
 
         Args:
             forecast_predictors (iris.cube.Cube):
@@ -807,58 +2019,68 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
                     ensemble variance, either the ensemble mean or
                     the ensemble realizations.
         """
+        coefficients_cube = self.coefficients_cube
+        if coefficients_cube.ndim > 1:
+            # Coefficients estimated for each point are ordered to match the
+            # spatial dimensions at the end of the forecast.
+            coefficients_cube = coefficients_cube.copy()
+            enforce_coordinate_ordering(
+                coefficients_cube,
+                ["coefficient_index",
+                 forecast_predictors.coord(axis="y").name(),
+                 forecast_predictors.coord(axis="x").name()])
         optimised_coeffs = (
-            dict(zip(self.coefficients_cube.coord("coefficient_name").points,
-                     self.coefficients_cube.data)))
+            dict(zip(coefficients_cube.coord("coefficient_name").points,
+                     coefficients_cube.data)))
 
         # Calculate the predicted mean based on whether the coefficients
         # were estimated using the mean as the predictor or using the
         # ensemble realizations as the predictor.
+        forecast_predictor_data = forecast_predictors.data
+        mask = np.ma.getmask(forecast_predictor_data)
         if self.predictor_of_mean_flag.lower() == "mean":
             # Calculate predicted mean = a + b*X, where X is the
             # raw ensemble mean. In this case, b = beta.
-            a_and_b = [optimised_coeffs["alpha"], optimised_coeffs["beta"]]
-            forecast_predictor_flat = forecast_predictors.data.flatten()
-            col_of_ones = (
-                np.ones(forecast_predictor_flat.shape, dtype=np.float32))
-            ones_and_mean = (
-                np.column_stack((col_of_ones, forecast_predictor_flat)))
-            predicted_mean = np.dot(ones_and_mean, a_and_b)
+            betas = [optimised_coeffs["beta"]]
+            predictors = [np.ma.getdata(forecast_predictor_data)]
             calibrated_forecast_predictor = forecast_predictors
         elif self.predictor_of_mean_flag.lower() == "realizations":
             # Calculate predicted mean = a + b*X, where X is the
             # raw ensemble mean. In this case, b = beta^2.
-            beta_values = np.array([], dtype=np.float32)
-            for key in optimised_coeffs.keys():
-                if key.startswith("beta"):
-                    beta_values = np.append(beta_values, optimised_coeffs[key])
-            a_and_b = np.append(optimised_coeffs["alpha"], beta_values**2)
-            forecast_predictor_flat = (
-                convert_cube_data_to_2d(forecast_predictors))
-            forecast_var_flat = forecast_vars.data.flatten()
-            col_of_ones = np.ones(forecast_var_flat.shape, dtype=np.float32)
-            ones_and_mean = (
-                np.column_stack((col_of_ones, forecast_predictor_flat)))
-            predicted_mean = np.dot(ones_and_mean, a_and_b)
+            betas = [optimised_coeffs[key]**2 for key in optimised_coeffs
+                     if key.startswith("beta")]
+            realization_axis, = forecast_predictors.coord_dims("realization")
+            predictors = np.moveaxis(
+                np.ma.getdata(forecast_predictor_data), realization_axis, 0)
+            if mask is not np.ma.nomask:
+                mask = mask.any(axis=realization_axis)
             # Calculate mean of ensemble realizations, as only the
             # calibrated ensemble mean will be returned.
             calibrated_forecast_predictor = (
                 forecast_predictors.collapsed(
                     "realization", iris.analysis.MEAN))
 
-        xlen = len(forecast_predictors.coord(axis="x").points)
-        ylen = len(forecast_predictors.coord(axis="y").points)
-
-        calibrated_forecast_predictor.data = (
-            np.reshape(predicted_mean, (ylen, xlen)))
+        predicted_mean = self._apply_coefficients_in_tiles(
+            optimised_coeffs["alpha"], betas, predictors,
+            np.result_type(forecast_predictor_data.dtype,
+                           coefficients_cube.dtype))
+        if mask is not np.ma.nomask:
+            predicted_mean = np.ma.masked_array(predicted_mean, mask=mask)
+        calibrated_forecast_predictor.data = predicted_mean
 
         calibrated_forecast_var = forecast_vars
         # Calculating the predicted variance, based on the
         # raw variance S^2, where predicted variance = c + dS^2,
         # where c = (gamma)^2 and d = (delta)^2
-        calibrated_forecast_var.data = (
-            optimised_coeffs["gamma"]**2 +
-            optimised_coeffs["delta"]**2 * forecast_vars.data)
+        forecast_var_data = forecast_vars.data
+        predicted_var = self._apply_coefficients_in_tiles(
+            optimised_coeffs["gamma"]**2, [optimised_coeffs["delta"]**2],
+            [np.ma.getdata(forecast_var_data)],
+            np.result_type(forecast_var_data.dtype, coefficients_cube.dtype))
+        if np.ma.is_masked(forecast_var_data):
+            predicted_var = np.ma.masked_array(
+                predicted_var, mask=np.ma.getmask(forecast_var_data))
+        calibrated_forecast_var.data = predicted_var
 
         return calibrated_forecast_predictor, calibrated_forecast_var
 
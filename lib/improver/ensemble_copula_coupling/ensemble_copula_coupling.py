@@ -34,6 +34,7 @@ This module defines the plugins required for Ensemble Copula Coupling.
 """
 import warnings
 import numpy as np
+from scipy.special import ndtr
 from scipy.stats import norm
 
 
@@ -47,13 +48,12 @@ from improver.ensemble_copula_coupling.ensemble_copula_coupling_utilities \
             create_cube_with_percentiles, choose_set_of_percentiles,
             get_bounds_of_distribution,
             insert_lower_and_upper_endpoint_to_1d_array,
-            restore_non_probabilistic_dimensions)
+            interpolate_multiple_rows, restore_non_probabilistic_dimensions)
 from improver.utilities.cube_manipulation import (
     concatenate_cubes, enforce_coordinate_ordering)
 from improver.utilities.cube_checker import (
     find_percentile_coordinate, find_threshold_coordinate,
-    check_for_x_and_y_axes, check_cube_coordinates)
-from improver.utilities.indexing_operations import choose
+    check_for_x_and_y_axes)
 
 
 class RebadgePercentilesAsRealizations(object):
@@ -229,17 +229,14 @@ class ResamplePercentiles(object):
                 original_percentiles, forecast_at_reshaped_percentiles,
                 bounds_pairing))
 
-        forecast_at_interpolated_percentiles = (
-            np.empty(
-                (len(desired_percentiles),
-                 forecast_at_reshaped_percentiles.shape[0]),
-                dtype=np.float32
-            )
-        )
-        for index in range(forecast_at_reshaped_percentiles.shape[0]):
-            forecast_at_interpolated_percentiles[:, index] = np.interp(
-                desired_percentiles, original_percentiles,
-                forecast_at_reshaped_percentiles[index, :])
+        # The original and desired percentiles are the same at every point,
+        # so all points are interpolated at once. As with np.interp at each
+        # point, only the forecast values either side of a desired percentile
+        # contribute to it, so a NaN only affects its neighbouring
+        # percentiles at that point.
+        forecast_at_interpolated_percentiles = interpolate_multiple_rows(
+            desired_percentiles, original_percentiles,
+            forecast_at_reshaped_percentiles).astype(np.float32).T
 
         # Reshape forecast_at_percentiles, so the percentiles dimension is
         # first, and any other dimension coordinates follow.
@@ -473,10 +470,11 @@ class GeneratePercentilesFromProbabilities(object):
             np.empty((len(percentiles), probabilities_for_cdf.shape[0]),
                      dtype=np.float32)
         )
-        for index in range(probabilities_for_cdf.shape[0]):
-            forecast_at_percentiles[:, index] = np.interp(
-                percentiles, probabilities_for_cdf[index, :],
-                threshold_points)
+        # Interpolate for all points at once, writing into the transposed
+        # view of the output array.
+        interpolate_multiple_rows(
+            percentiles, probabilities_for_cdf, threshold_points,
+            out=forecast_at_percentiles.T)
 
         # Convert percentiles back into percentages.
         percentiles = np.array([x*100.0 for x in percentiles],
@@ -652,27 +650,36 @@ class GeneratePercentilesFromMeanAndVariance(object):
                            calibrated_forecast_predictor_data.shape[0]),
                           dtype=np.float32)
 
-        # Loop over percentiles, and use a normal distribution with the mean
-        # and variance to calculate the values at each percentile.
-        for index, percentile in enumerate(percentiles):
-            percentile_list = np.repeat(
-                percentile, len(calibrated_forecast_predictor_data))
-            result[index, :] = norm.ppf(
-                percentile_list, loc=calibrated_forecast_predictor_data,
-                scale=np.sqrt(calibrated_forecast_variance_data))
-            # If percent point function (PPF) returns NaNs, fill in
-            # mean instead of NaN values. NaN will only be generated if the
-            # variance is zero. Therefore, if the variance is zero, the mean
-            # value is used for all gridpoints with a NaN.
-            if np.any(calibrated_forecast_variance_data == 0):
-                nan_index = np.argwhere(np.isnan(result[index, :]))
-                result[index, nan_index] = (
-                    calibrated_forecast_predictor_data[nan_index])
-            if np.any(np.isnan(result)):
-                msg = ("NaNs are present within the result for the {} "
-                       "percentile. Unable to calculate the percent point "
-                       "function.")
-                raise ValueError(msg)
+        # The quantiles of the standard normal distribution are the same at
+        # every point, so are calculated once. The value at each percentile
+        # is then the mean plus the standard deviation multiplied by the
+        # quantile. This is calculated in the precision of the input data,
+        # which is float32 for float32 inputs, one percentile at a time to
+        # limit the size of temporary arrays.
+        standard_normal_quantiles = norm.ppf(percentiles).astype(np.float32)
+        standard_deviation = np.sqrt(calibrated_forecast_variance_data)
+        values = np.empty(
+            standard_deviation.shape,
+            dtype=np.result_type(np.float32, standard_deviation,
+                                 calibrated_forecast_predictor_data))
+        for index, quantile in enumerate(standard_normal_quantiles):
+            np.multiply(standard_deviation, quantile, out=values)
+            values += calibrated_forecast_predictor_data
+            result[index, :] = values
+
+        # NaNs are generated where the variance is zero for the 0th and 100th
+        # percentiles. Therefore, if the variance is zero, the mean value is
+        # used for all gridpoints with a NaN.
+        if np.any(calibrated_forecast_variance_data == 0):
+            nan_index = np.isnan(result)
+            result[nan_index] = np.broadcast_to(
+                calibrated_forecast_predictor_data, result.shape)[nan_index]
+        if np.any(np.isnan(result)):
+            msg = ("NaNs are present within the result for the {} "
+                   "percentile. Unable to calculate the percent point "
+                   "function.".format(
+                       percentiles[np.isnan(result).any(axis=1)] * 100.0))
+            raise ValueError(msg)
 
         # Convert percentiles back into percentages.
         percentiles = [x*100.0 for x in percentiles]
@@ -853,18 +860,29 @@ class GenerateProbabilitiesFromMeanAndVariance(object):
         relative_to_threshold = (
             probability_cube_template.attributes['relative_to_threshold'])
 
-        # Loop over thresholds, and use a normal distribution with the mean
-        # and variance to calculate the probabilties relative to each
-        # threshold.
-        probabilities = np.empty_like(probability_cube_template.data)
-        distribution = norm(loc=mean_values.data,
-                            scale=np.sqrt(variance_values.data))
-        probability_method = distribution.cdf
-        if relative_to_threshold == 'above':
-            probability_method = distribution.sf
-
-        for index, threshold in enumerate(thresholds):
-            probabilities[index, ...] = probability_method(threshold)
+        # Loop over thresholds, and use the cumulative distribution function
+        # of the standard normal distribution to calculate the probabilities
+        # relative to each threshold. A single buffer, in the precision of
+        # the input data, is reused for each threshold.
+        probabilities = np.empty(
+            probability_cube_template.shape, dtype=np.float32)
+        standard_deviation = np.sqrt(variance_values.data)
+        normalised = np.empty(
+            standard_deviation.shape,
+            dtype=np.result_type(np.float32, mean_values.data,
+                                 standard_deviation))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for index, threshold in enumerate(thresholds):
+                if relative_to_threshold == 'above':
+                    np.subtract(mean_values.data, threshold, out=normalised)
+                else:
+                    np.subtract(threshold, mean_values.data, out=normalised)
+                normalised /= standard_deviation
+                probabilities[index, ...] = ndtr(normalised, out=normalised)
+
+        # As for a normal distribution, the probabilities are undefined where
+        # the variance is not positive.
+        probabilities[:, ~(standard_deviation > 0)] = np.nan
 
         probability_cube = probability_cube_template.copy(data=probabilities)
         return probability_cube
@@ -990,7 +1008,8 @@ class EnsembleReordering(object):
         """
         Function to apply Ensemble Copula Coupling. This ranks the
         post-processed forecast realizations based on a ranking determined from
-        the raw forecast realizations.
+        the raw forecast realizations. All times and points are ranked at
+        once, with random values only generated to split tied raw values.
 
         Args:
             post_processed_forecast_percentiles (cube):
@@ -1016,43 +1035,99 @@ class EnsembleReordering(object):
                 point, the ranking of the values within the ensemble matches
                 the ranking from the raw ensemble.
 
+        Raises:
+            ValueError: If the shapes of the raw and post-processed forecast
+                data do not match.
+
         """
-        results = iris.cube.CubeList([])
-        for rawfc, calfc in zip(
-                raw_forecast_realizations.slices_over("time"),
-                post_processed_forecast_percentiles.slices_over("time")):
-            if random_seed is not None:
-                random_seed = int(random_seed)
-            random_seed = np.random.RandomState(random_seed)
-            random_data = random_seed.rand(*rawfc.data.shape)
-            if random_ordering:
-                # Returns the indices that would sort the array.
-                # As these indices are from a random dataset, only an argsort
-                # is used.
-                ranking = np.argsort(random_data, axis=0)
-            else:
-                # Lexsort returns the indices sorted firstly by the
-                # primary key, the raw forecast data (unless random_ordering
-                # is enabled), and secondly by the secondary key, an array of
-                # random data, in order to split tied values randomly.
-                sorting_index = np.lexsort((random_data, rawfc.data), axis=0)
-                # Returns the indices that would sort the array.
-                ranking = np.argsort(sorting_index, axis=0)
-            # Index the post-processed forecast data using the ranking array.
-            # The following uses a custom choose function that reproduces the
-            # required elements of the np.choose method without the limitation
-            # of having < 32 arrays or a leading dimension < 32 in the
-            # input data array. This function allows indexing of a 3d array
-            # using a 3d array.
-            calfc.data = choose(ranking, calfc.data)
-            results.append(calfc)
-        # Ensure we haven't lost any dimensional coordinates with only one
-        # value in.
-        results = results.merge_cube()
-        results = check_cube_coordinates(
-            post_processed_forecast_percentiles, results)
+        if random_seed is not None:
+            random_seed = int(random_seed)
+        random_state = np.random.RandomState(random_seed)
+        raw_data = raw_forecast_realizations.data
+        calibrated_data = post_processed_forecast_percentiles.data
+        if raw_data.shape != calibrated_data.shape:
+            # Allow for length one dimensions, such as time, being scalar
+            # coordinates in only one of the cubes.
+            if ([dim for dim in raw_data.shape if dim != 1] ==
+                    [dim for dim in calibrated_data.shape if dim != 1]):
+                raw_data = raw_data.reshape(calibrated_data.shape)
+        if raw_data.shape != calibrated_data.shape:
+            msg = ("The raw forecast realizations with shape {} do not match "
+                   "the post-processed forecast percentiles with "
+                   "shape {}.".format(raw_data.shape, calibrated_data.shape))
+            raise ValueError(msg)
+
+        # All times and points are ranked at once along the leading
+        # (probabilistic) dimension.
+        if random_ordering:
+            # Returns the indices that would sort the array.
+            # As these indices are from a random dataset, only an argsort
+            # is used.
+            ranking = np.argsort(
+                random_state.rand(*raw_data.shape), axis=0)
+        else:
+            sorting_index = EnsembleReordering._sort_splitting_ties(
+                np.ma.getdata(raw_data), random_state)
+            # Invert the sorting permutation by scattering the ranks into
+            # their sorted positions, rather than with a second argsort.
+            ranks = np.arange(raw_data.shape[0]).reshape(
+                (-1,) + (1,) * (raw_data.ndim - 1))
+            ranking = np.empty_like(sorting_index)
+            np.put_along_axis(
+                ranking, sorting_index,
+                np.broadcast_to(ranks, sorting_index.shape), axis=0)
+        # Index the post-processed forecast data using the ranking array.
+        results = post_processed_forecast_percentiles.copy(
+            data=np.take_along_axis(calibrated_data, ranking, axis=0))
         return results
 
+    @staticmethod
+    def _sort_splitting_ties(data, random_state):
+        """
+        Find the indices that would sort the data along the leading
+        dimension, with tied values ordered randomly.
+
+        A stable sort is used first, and random values are only generated
+        for the values that are tied with another value at the same point.
+        The points that contain ties are then sorted again, using the
+        random values as the secondary key.
+
+        Args:
+            data (numpy.ndarray):
+                Data to be sorted along the leading dimension.
+            random_state (numpy.random.RandomState):
+                Random number generator used to split tied values.
+
+        Returns:
+            sorting_index (numpy.ndarray):
+                Indices that would sort the data along the leading dimension.
+        """
+        sorting_index = np.argsort(data, axis=0, kind="mergesort")
+        if data.shape[0] < 2:
+            return sorting_index
+        sorted_data = np.take_along_axis(data, sorting_index, axis=0)
+        tied = sorted_data[1:] == sorted_data[:-1]
+        tied_points = tied.reshape(tied.shape[0], -1).any(axis=0)
+        if not tied_points.any():
+            return sorting_index
+
+        # Flatten the trailing dimensions to sort only the points with ties.
+        sorting_index = sorting_index.reshape(data.shape[0], -1)
+        sorted_data = sorted_data.reshape(data.shape[0], -1)[:, tied_points]
+        tied = tied.reshape(tied.shape[0], -1)[:, tied_points]
+        is_tied = np.zeros(sorted_data.shape, dtype=bool)
+        is_tied[1:] |= tied
+        is_tied[:-1] |= tied
+        random_data = np.zeros(sorted_data.shape)
+        random_data[is_tied] = random_state.rand(np.count_nonzero(is_tied))
+        # Lexsort returns the indices sorted firstly by the primary key,
+        # the raw forecast data, and secondly by the secondary key, the
+        # random data, in order to split tied values randomly.
+        tie_index = np.lexsort((random_data, sorted_data), axis=0)
+        sorting_index[:, tied_points] = np.take_along_axis(
+            sorting_index[:, tied_points], tie_index, axis=0)
+        return sorting_index.reshape(data.shape)
+
     def process(
             self, post_processed_forecast, raw_forecast,
             random_ordering=False, random_seed=None):
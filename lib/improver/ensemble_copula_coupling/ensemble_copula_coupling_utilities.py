@@ -254,6 +254,116 @@ def insert_lower_and_upper_endpoint_to_1d_array(
     return array_1d
 
 
+def interpolate_multiple_rows(x_vals, xp, fp, out=None):
+    """
+    Linear interpolation, equivalent to applying np.interp to each row of
+    fp in turn. The values to be interpolated to, x_vals, the x-coordinates
+    of the data points, xp, and the y-coordinates of the data points, fp,
+    may each either be shared by every row, or differ for each row.
+
+    If x_vals and xp are both shared by every row, the location of each of
+    x_vals within xp is found once, and used for every row of fp. If only
+    x_vals are shared by every row, the location of each of x_vals within
+    each row of xp is found for all rows at once, by finding the location of
+    each value of xp within the sorted x_vals, and counting the values of xp
+    at or below each of x_vals. Otherwise, the values of xp at or below each
+    of x_vals are counted using a stable sort of each row of xp followed by
+    the same row of x_vals. As np.interp does not check that xp is
+    increasing, any rows in which it is not are interpolated using np.interp,
+    so that the result is the same.
+
+    Args:
+        x_vals (numpy.ndarray):
+            1d array of the values at which to evaluate the interpolation,
+            shared by every row, or 2d array with a row of values for each
+            row.
+        xp (numpy.ndarray):
+            1d array of the x-coordinates of the data points, which are
+            expected to be monotonically increasing, shared by every row, or
+            2d array with the x-coordinates for each row. If xp is 1d, x_vals
+            must also be 1d.
+        fp (numpy.ndarray):
+            1d array of the y-coordinates of the data points, shared by every
+            row, or 2d array with the y-coordinates for each row. At least
+            one of xp and fp must be 2d.
+
+    Keyword Args:
+        out (numpy.ndarray or None):
+            Array of shape (number of rows, number of values in each row of
+            x_vals), into which the result is written. If None, a new
+            float64 array is created.
+
+    Returns:
+        out (numpy.ndarray):
+            2d array containing the interpolated values, with a row for each
+            row of xp or fp and a column for each of x_vals.
+    """
+    x_vals = np.asarray(x_vals, dtype=np.float64)
+    xp = np.asarray(xp, dtype=np.float64)
+    fp = np.asarray(fp, dtype=np.float64)
+    n_rows = xp.shape[0] if xp.ndim == 2 else fp.shape[0]
+    n_xp = xp.shape[-1]
+    n_x = x_vals.shape[-1]
+    fp = np.broadcast_to(fp, (n_rows, n_xp))
+    if out is None:
+        out = np.empty((n_rows, n_x), dtype=np.float64)
+    order = None
+    x_rows = np.broadcast_to(x_vals, (n_rows, n_x))
+    xp_rows = np.broadcast_to(xp, (n_rows, n_xp))
+    not_increasing = np.broadcast_to(
+        (np.diff(xp, axis=-1) < 0).any(axis=-1), (n_rows,))
+
+    if xp.ndim == 1:
+        # The location of each of x_vals within xp is the same for every
+        # row, so only the values of fp differ between rows.
+        n_at_or_below = np.searchsorted(xp, x_vals, side="right")[
+            np.newaxis]
+        xp = xp[np.newaxis]
+    elif x_vals.ndim == 1:
+        order = np.argsort(x_vals, kind="mergesort")
+        x_vals = x_vals[order]
+        # For the sorted values, xp[i, k] <= x_vals[j] exactly when the
+        # number of x_vals less than xp[i, k] is at most j, so a cumulative
+        # count of these numbers gives the number of xp values at or below
+        # each x value.
+        n_less = np.searchsorted(x_vals, xp, side="left")
+        n_less += (np.arange(n_rows) * (n_x + 1))[:, np.newaxis]
+        n_at_or_below = np.bincount(
+            n_less.ravel(), minlength=n_rows * (n_x + 1)).reshape(
+                n_rows, n_x + 1).cumsum(axis=1)[:, :n_x]
+    else:
+        # Values of xp sort before equal values of x_vals, so the number of
+        # values of xp before each of x_vals in the sorted rows is the
+        # number of values of xp at or below it.
+        merged_order = np.argsort(
+            np.concatenate((xp, x_vals), axis=1), axis=1, kind="stable")
+        is_x = merged_order >= n_xp
+        n_at_or_below = np.empty((n_rows, n_x), dtype=np.intp)
+        np.put_along_axis(
+            n_at_or_below, merged_order[is_x].reshape(n_rows, n_x) - n_xp,
+            np.cumsum(~is_x, axis=1)[is_x].reshape(n_rows, n_x), axis=1)
+
+    lower = np.clip(n_at_or_below - 1, 0, max(n_xp - 2, 0))
+    upper = np.minimum(lower + 1, n_xp - 1)
+    xp_lower = np.take_along_axis(xp, lower, axis=1)
+    fp_lower = np.take_along_axis(fp, lower, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = ((np.take_along_axis(fp, upper, axis=1) - fp_lower) /
+                 (np.take_along_axis(xp, upper, axis=1) - xp_lower))
+        result = slope * (x_vals - xp_lower) + fp_lower
+    result = np.where(x_vals == xp_lower, fp_lower, result)
+    # Values outside of the range of xp take the value of the nearest end.
+    result = np.where(n_at_or_below == 0, fp[:, :1], result)
+    result = np.where(n_at_or_below == n_xp, fp[:, -1:], result)
+    if order is None:
+        out[...] = result
+    else:
+        out[:, order] = result
+    for row in np.flatnonzero(not_increasing):
+        out[row] = np.interp(x_rows[row], xp_rows[row], fp[row])
+    return out
+
+
 def restore_non_probabilistic_dimensions(
         array_to_reshape, original_cube, input_probabilistic_dimension_name,
         output_probabilistic_dimension_length):
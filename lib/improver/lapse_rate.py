@@ -31,8 +31,6 @@
 """Module containing lapse rate calculation plugins."""
 
 import numpy as np
-from numpy.linalg import lstsq
-from scipy.ndimage import generic_filter
 
 import iris
 from iris.analysis.maths import multiply
@@ -115,47 +113,6 @@ def apply_gridded_lapse_rate(temperature, lapse_rate, source_orog, dest_orog):
     return iris.cube.CubeList(adjusted_temperature).merge_cube()
 
 
-class SaveNeighbourhood(object):
-    """Saves the neighbourhood around each central point.
-
-    The "generic_filter" module extracts the neighbourhood around each
-    point as "buffer". This buffer is passed to the "SaveNeighbourhood" class.
-    The "filter" function then saves this buffer into the "allbuffers" array.
-
-    """
-    def __init__(self, allbuffers):
-        """Initialise the class.
-
-        Create the global variables that allows the "filter" function
-        to save each extracted buffer into "allbuffers".
-
-        """
-        # Initialises the iterator.
-        self.i = 0
-        # Saves all the buffers into this array.
-        self.allbuffers = allbuffers
-
-    def filter(self, buffer):
-        """Defines filter function to be applied to extracted buffers.
-
-        Saves the contents of the buffer into "allbuffers" array. Therefore
-        a return value isn't required. However "generic_filter"
-        requires a return value - so use zero.
-
-        Args:
-            buffer (array):
-                Array containing neighourbood points.
-
-        Returns:
-            zero (float)
-                Blank return value required by "generic_filter".
-
-        """
-        self.allbuffers[self.i, :] = buffer
-        self.i += 1
-        return 0.0
-
-
 class LapseRate(object):
     """
     Plugin to calculate the lapse rate from orography and temperature
@@ -168,21 +125,17 @@ class LapseRate(object):
     Code methodology:
 
     1) Apply land/sea mask to temperature and orography datasets. Mask sea
-       points as NaN since image processing module does not recognise Numpy
-       masks.
-    2) Extracts neighbourhoods from both datasets:
-       Apply "generic_filter" image processing module to temperature data
-       to extract a neighbourhood for each single point and save this
-       neighbourhood into a larger array.
-       Repeat for orography data.
-       generic_filter mode="constant" ensures that points beyond edges of
-       dataset will be filled with "cval". (NaN in this case)
-    3) For all the stored orography neighbourhoods - take the neighbours around
-       the central point and create a mask where the height difference from
-       the central point is greater than 35m.
-    4) Loop through array of neighbourhoods and take the height and temperature
-       of all grid points and calculate the
-       temperature/height gradient = lapse rate
+       points as NaN so that they are excluded from the calculation.
+    2) Pad both datasets with NaN so that points beyond the edges of the
+       dataset are excluded from the calculation. For each offset within the
+       neighbourhood, take a shifted view of the padded datasets so that
+       each point is aligned with one of its neighbours. The neighbourhood
+       of every point is never stored.
+    3) For each offset, create a mask where the height difference between
+       the neighbour and the central point is greater than 35m.
+    4) Accumulate the sums of the unmasked heights and temperatures over the
+       neighbourhood of each point and calculate the
+       temperature/height gradient = lapse rate in closed form.
     5) Constrain the returned lapse rates between min_lapse_rate and
        max_lapse_rate. These default to > DALR and < -3.0*DALR but are user
        configurable
@@ -235,12 +188,6 @@ class LapseRate(object):
         # central point.
         self.nbhood_size = int((2*nbhood_radius) + 1)
 
-        # generic_filter extracts the neighbourhood and returns a 1D array.
-        # ind_central_point indicates where the central point would be on
-        # this array
-        self.nbhoodarray_size = self.nbhood_size**2
-        self.ind_central_point = int(self.nbhoodarray_size/2)
-
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
         desc = ('<LapseRate: max_height_diff: {}, nbhood_radius: {},'
@@ -249,82 +196,119 @@ class LapseRate(object):
                         self.max_lapse_rate, self.min_lapse_rate))
         return desc
 
-    def _calc_lapse_rate(self, temperature, orography):
-        """Function to calculate the lapse rate.
-
-        This holds the function to determine the local lapse rate at a point by
-        calculating a least-squares fit to local temperature and altitude data
-        to find the local lapse rate.
+    def _calc_lapse_rates(self, temperature, orography):
+        """Function to calculate the lapse rate at every grid point.
+
+        The lapse rate at each point is the gradient of a least-squares fit
+        to the temperature and orography data within the neighbourhood
+        around the point. Rather than extracting every neighbourhood and
+        solving a least-squares problem for each in turn, the arrays are
+        padded with NaN and, for each offset within the neighbourhood, a
+        shifted view of the padded arrays is taken. These
+        views are used to accumulate the sums of x, y, xy and x² over each
+        neighbourhood, from which the gradient of the best fit line is found
+        in closed form. This avoids holding the neighbourhood of every grid
+        point in memory at once.
+
+        The temperature array may have any number of leading dimensions
+        (e.g. realization and time), which are all processed at once. The
+        orography is the same for every leading slice, so the height
+        differences and height difference mask for each offset are only
+        calculated once and broadcast across all of the slices.
+
+        The sums are accumulated relative to the central point of each
+        neighbourhood, which keeps them well-conditioned and means that
+        neighbourhoods with constant values give exactly zero variance.
+        Where all valid orography values within a neighbourhood are equal,
+        the least-squares problem is rank deficient. In this case the
+        minimum-norm solution returned by "numpy.linalg.lstsq" is
+        reproduced.
 
         Args:
-            temperature(1D np.array):
-                Contains the temperature values for the central point and its
-                neighbours.
+            temperature(np.array):
+                Contains the temperature values, with the y and x dimensions
+                last. Points to be excluded from the calculation (e.g. sea
+                points) are set to NaN.
 
-            orography(1D np.array):
-                Contains the height values for the central point and its
-                neighbours.
+            orography(2D np.array):
+                Contains the height values. Neighbouring points where the
+                height difference from the central point is greater than
+                max_height_diff are excluded from the calculation.
 
         Returns:
-            gradient (float):
-                The gradient of the temperature/orography values. This
-                represents the lapse rate.
+            gradient (np.ndarray):
+                Array of the gradient of the temperature/orography values
+                within the neighbourhood of each point, with the same shape
+                as the temperature array. This represents the lapse rate.
 
         """
-
-        # If central point NaN then return blank value.
-        if np.isnan(temperature[self.ind_central_point]):
-            return DALR
-
-        # Remove points where there are NaN temperature values from both arrays
-        # before calculation.
-        y_data = temperature[~np.isnan(temperature)]
-        x_data = orography[~np.isnan(temperature)]
-
-        # Return DALR if standard deviation of both datasets = 0 (where all
-        # points are the same value).
-        if np.isclose(np.std(x_data), 0.0) and np.isclose(np.std(y_data), 0.0):
-            return DALR
-
-        matrix = np.stack([x_data, np.ones(len(x_data))], axis=0).T
-        gradient, _ = lstsq(matrix, y_data, rcond=None)[0]
+        central_temp = temperature.astype(np.float64)
+        central_orog = orography.astype(np.float64)
+
+        # Points beyond the edges of the domain are set to NaN.
+        pad_width = [(self.nbhood_radius, self.nbhood_radius)] * 2
+        padded_temp = np.pad(
+            central_temp, [(0, 0)] * (central_temp.ndim - 2) + pad_width,
+            mode='constant', constant_values=np.nan)
+        padded_orog = np.pad(central_orog, pad_width, mode='constant',
+                             constant_values=np.nan)
+
+        npoints = np.zeros(central_temp.shape, dtype=np.int64)
+        x_sum, y_sum, xx_sum, yy_sum, xy_sum = (
+            np.zeros(central_temp.shape) for _ in range(5))
+
+        ny, nx = central_temp.shape[-2:]
+        for i in range(self.nbhood_size):
+            for j in range(self.nbhood_size):
+                neighbour_temp = padded_temp[..., i:i + ny, j:j + nx]
+                neighbour_orog = padded_orog[i:i + ny, j:j + nx]
+
+                # Orography terms are shared by all leading slices.
+                x_data = neighbour_orog - central_orog
+                with np.errstate(invalid='ignore'):
+                    orog_valid = ~(np.absolute(x_data) >= self.max_height_diff)
+
+                y_data = neighbour_temp - central_temp
+
+                # Exclude NaN temperatures and neighbours where the height
+                # difference from the central point is too large.
+                valid = ~np.isnan(neighbour_temp) & orog_valid
+                if i == j == self.nbhood_radius:
+                    central_valid = valid
+
+                x_data = np.where(valid, x_data, 0.)
+                y_data = np.where(valid, y_data, 0.)
+
+                npoints += valid
+                x_sum += x_data
+                y_sum += y_data
+                xx_sum += x_data * x_data
+                yy_sum += y_data * y_data
+                xy_sum += x_data * y_data
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x_mean = x_sum / npoints
+            y_mean = y_sum / npoints
+            x_var = xx_sum / npoints - x_mean**2
+            y_var = yy_sum / npoints - y_mean**2
+            xy_cov = xy_sum / npoints - x_mean * y_mean
+
+            gradient = xy_cov / x_var
+
+            # Minimum-norm solution where orography is constant.
+            y_mean_abs = y_mean + central_temp
+            rank_deficient = (
+                central_orog * y_mean_abs / (central_orog**2 + 1.))
+            gradient = np.where(x_var > 0., gradient, rank_deficient)
+
+            # Return DALR where the standard deviation of both datasets
+            # is zero or the central point is NaN.
+            constant = (np.isclose(np.sqrt(np.maximum(x_var, 0.)), 0.) &
+                        np.isclose(np.sqrt(np.maximum(y_var, 0.)), 0.))
+        gradient = np.where(constant | ~central_valid, DALR, gradient)
 
         return gradient
 
-    def _create_heightdiff_mask(self, all_orog_subsections):
-        """
-        Function to create a mask for any neighbouring points where the height
-        difference from the central point is greater than max_height_diff.
-
-        Slice through the orography subsection array to remove central
-        points.
-        Extracts the height value of each central point and masks out the
-        neighbouring points where their height difference is greater than
-        the maximum.
-
-        Args:
-            all_orog_subsections(2D np.array):
-               Each row contains the height values of each neighbourhood.
-
-        Returns:
-            height_diff_mask (np.ndarray):
-                A 2D array of boolean values.
-
-        """
-
-        self.all_orog_subsections = all_orog_subsections
-
-        central_points = self.all_orog_subsections[:, self.ind_central_point]
-        central_points = np.swapaxes([central_points], 0, 1)
-
-        height_diff = np.subtract(self.all_orog_subsections, central_points)
-        height_diff = np.absolute(height_diff)
-
-        height_diff_mask = np.where(height_diff >= self.max_height_diff, True,
-                                    False)
-
-        return height_diff_mask
-
     def process(self, temperature_cube, orography_cube, land_sea_mask_cube):
         """Calculates the lapse rate from the temperature and orography cubes.
 
@@ -380,86 +364,40 @@ class LapseRate(object):
         # Fill sea points with NaN values.
         orography_data = np.where(land_sea_mask, orography_data, np.nan)
 
-        # Extract data array dimensions to define output arrays.
-        dataarray_shape = next(temperature_cube.slices([y_coord,
-                                                        x_coord])).shape
-        dataarray_size = dataarray_shape[0] * dataarray_shape[1]
+        # Move the spatial dimensions to the end so that all realizations
+        # and times are processed at once.
+        spatial_dims = [temperature_cube.coord_dims(y_coord)[0],
+                        temperature_cube.coord_dims(x_coord)[0]]
+        temperature_data = np.moveaxis(temperature_cube.data, spatial_dims,
+                                       [-2, -1])
 
-        # Array containing all of the subsections extracted from data array.
-        # Also enforce single precision to speed up calculations.
-        all_temp_subsections = np.zeros(
-            (dataarray_size, self.nbhoodarray_size), dtype=np.float32)
-        all_orog_subsections = np.zeros(
-            (dataarray_size, self.nbhoodarray_size), dtype=np.float32)
+        # Fill sea points with NaN values.
+        temperature_data = np.where(land_sea_mask, temperature_data, np.nan)
+
+        # Find the gradient of the neighbourhood around each point.
+        # The gradient indicates lapse rate - save into another array.
+        lapse_rate_array = self._calc_lapse_rates(
+            temperature_data, orography_data).astype(np.float32)
+
+        # Enforces upper and lower limits on lapse rate values.
+        lapse_rate_array = np.where(lapse_rate_array < self.min_lapse_rate,
+                                    self.min_lapse_rate, lapse_rate_array)
+        lapse_rate_array = np.where(lapse_rate_array > self.max_lapse_rate,
+                                    self.max_lapse_rate, lapse_rate_array)
 
-        # Attempts to extract realizations. If cube doesn't contain the
-        # dimension then place within list.
+        lapse_rate_cube = temperature_cube.copy(
+            data=np.moveaxis(lapse_rate_array, [-2, -1], spatial_dims))
+
+        # A realization dimension of length one is demoted to a scalar
+        # coordinate, consistent with slicing over realizations.
         try:
-            slices_over_realization = temperature_cube.slices_over(
-                "realization")
-        except iris.exceptions.CoordinateNotFoundError:
-            slices_over_realization = [temperature_cube]
-
-        # Creates cube list to hold lapse rate data.
-        lapse_rate_cube_list = iris.cube.CubeList([])
-
-        for temp_slice in slices_over_realization:
-
-            # Create slice to store lapse rate values.
-            lapse_rate_slice = temp_slice
-
-            temperature_data = temp_slice.data
-
-            # Fill sea points with NaN values. Can't use Numpy mask since not
-            # recognised by "generic_filter" function.
-            temperature_data = np.where(land_sea_mask, temperature_data,
-                                        np.nan)
-
-            # Saves all neighbourhoods into "all_temp_subsections".
-            # cval is value given to points outside the array.
-            fnc = SaveNeighbourhood(allbuffers=all_temp_subsections)
-            generic_filter(temperature_data, fnc.filter,
-                           size=self.nbhood_size,
-                           mode='constant', cval=np.nan)
-
-            fnc = SaveNeighbourhood(allbuffers=all_orog_subsections)
-            generic_filter(orography_data, fnc.filter,
-                           size=self.nbhood_size,
-                           mode='constant', cval=np.nan)
-
-            # height_diff_mask is True for points where the height
-            # difference between the central point and its neighbours
-            # is > max_height_diff.
-            height_diff_mask = self._create_heightdiff_mask(
-                all_orog_subsections)
-
-            # Mask points with extreme height differences as NaN.
-            all_orog_subsections = np.where(height_diff_mask, np.nan,
-                                            all_orog_subsections)
-            all_temp_subsections = np.where(height_diff_mask, np.nan,
-                                            all_temp_subsections)
-
-            # Loop through both arrays and find gradient of each subsection.
-            # The gradient indicates lapse rate - save into another array.
-            # TODO: This for loop is the bottleneck in the code and needs to
-            # be parallelised.
-            lapse_rate_array = [self._calc_lapse_rate(temp, orog)
-                                for temp, orog in zip(all_temp_subsections,
-                                                      all_orog_subsections)]
-
-            lapse_rate_array = np.array(
-                lapse_rate_array, dtype=np.float32).reshape(dataarray_shape)
-
-            # Enforces upper and lower limits on lapse rate values.
-            lapse_rate_array = np.where(lapse_rate_array < self.min_lapse_rate,
-                                        self.min_lapse_rate, lapse_rate_array)
-            lapse_rate_array = np.where(lapse_rate_array > self.max_lapse_rate,
-                                        self.max_lapse_rate, lapse_rate_array)
-
-            lapse_rate_slice.data = lapse_rate_array
-            lapse_rate_cube_list.append(lapse_rate_slice)
-
-        lapse_rate_cube = lapse_rate_cube_list.merge_cube()
+            realization_dims = lapse_rate_cube.coord_dims("realization")
+        except CoordinateNotFoundError:
+            realization_dims = ()
+        if (realization_dims and
+                lapse_rate_cube.shape[realization_dims[0]] == 1):
+            lapse_rate_cube = next(
+                lapse_rate_cube.slices_over("realization"))
         lapse_rate_cube.rename('air_temperature_lapse_rate')
         lapse_rate_cube.units = 'K m-1'
 
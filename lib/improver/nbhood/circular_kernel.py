@@ -32,6 +32,7 @@
 
 import numpy as np
 import scipy.ndimage.filters
+import scipy.signal
 
 import iris
 
@@ -45,6 +46,21 @@ from improver.utilities.spatial import (
 # Maximum radius of the neighbourhood width in grid cells.
 MAX_RADIUS_IN_GRID_CELLS = 500
 
+# Minimum radius of the neighbourhood in grid cells at which the kernel is
+# applied using FFT convolution, if the convolution method is "auto". Below
+# this radius, direct correlation is faster.
+MIN_RADIUS_FOR_FFT_IN_GRID_CELLS = 5
+
+# Maximum number of neighbourhood values held in memory at once when
+# calculating percentiles over a neighbourhood. Rows of the grid are
+# processed in blocks, so that this limit is not exceeded.
+MAX_NEIGHBOURHOOD_VALUES_PER_BLOCK = 2**24
+
+# Maximum number of distinct values within a padded field for which
+# neighbourhood percentiles are calculated by counting, if the percentile
+# method is "auto".
+MAX_DISTINCT_VALUES_FOR_COUNTING = 32
+
 
 def circular_kernel(fullranges, ranges, weighted_mode):
     """
@@ -89,6 +105,47 @@ def circular_kernel(fullranges, ranges, weighted_mode):
     return kernel
 
 
+def fft_correlate(data, kernel):
+    """
+    Method to correlate an array with a kernel using FFT convolution. This
+    gives the same result as scipy.ndimage.filters.correlate with
+    mode='nearest', but the cost does not increase with the size of the
+    kernel. Only the dimensions in which the kernel has a length greater than
+    one are transformed, so all slices over the other dimensions are
+    processed at once.
+
+    Args:
+        data (Numpy.array):
+            Array to be correlated with the kernel.
+        kernel (Numpy.array):
+            Array containing the kernel, with the same number of dimensions
+            as the data and an odd length in every dimension. The kernel
+            weights must not be negative.
+
+    Returns:
+        result (Numpy.array):
+            Array with the same shape and dtype as the input data containing
+            the correlated data.
+
+    """
+    halo = [(length - 1) // 2 for length in kernel.shape]
+    axes = [axis for axis, width in enumerate(halo) if width > 0]
+    # Pad the data by repeating the values at the edges, which is equivalent
+    # to the 'nearest' mode of scipy.ndimage.filters.correlate.
+    padded = np.pad(np.asarray(data, dtype=np.float64),
+                    [(width, width) for width in halo], mode='edge')
+    # Convolution with the flipped kernel is correlation with the kernel.
+    result = scipy.signal.fftconvolve(
+        padded, kernel[tuple(slice(None, None, -1) for _ in kernel.shape)],
+        mode='valid', axes=axes)
+    # Remove the rounding errors of the FFT that take the result outside
+    # of the range possible for a kernel with non-negative weights.
+    kernel_total = np.sum(kernel)
+    result = np.clip(result, np.min(padded) * kernel_total,
+                     np.max(padded) * kernel_total)
+    return result.astype(data.dtype)
+
+
 class CircularNeighbourhood(object):
 
     """
@@ -99,7 +156,7 @@ class CircularNeighbourhood(object):
     """
 
     def __init__(self, weighted_mode=True, sum_or_fraction="fraction",
-                 re_mask=False):
+                 re_mask=False, convolution_method="direct", cache=None):
         """
         Initialise class.
 
@@ -121,6 +178,21 @@ class CircularNeighbourhood(object):
                 mask is not applied. Therefore, the neighbourhood processing
                 may result in values being present in areas that were
                 originally masked.
+            convolution_method (string):
+                Identifier for how the kernel is applied to the data.
+                "direct" correlates the data with the kernel directly, which
+                is fastest for small kernels. "fft" uses FFT convolution,
+                which takes the same time for any size of kernel. "auto"
+                uses FFT convolution if the radius is at least
+                MIN_RADIUS_FOR_FFT_IN_GRID_CELLS and the data is finite, and
+                direct correlation otherwise. FFT convolution only matches
+                direct correlation to within floating point rounding, so
+                "direct" is the default.
+                Valid options are "auto", "direct" or "fft".
+            cache (NeighbourhoodResultCache or None):
+                Cache of neighbourhood processed fields to consult before
+                processing each 2D slice, so that identical slices are only
+                processed once. If None, all slices are processed.
         """
         self.weighted_mode = weighted_mode
         if sum_or_fraction not in ["sum", "fraction"]:
@@ -132,6 +204,12 @@ class CircularNeighbourhood(object):
             raise ValueError(msg)
         self.sum_or_fraction = sum_or_fraction
         self.re_mask = re_mask
+        if convolution_method not in ["auto", "direct", "fft"]:
+            msg = ("The {} convolution method is invalid. Valid options are "
+                   "'auto', 'direct' or 'fft'.".format(convolution_method))
+            raise ValueError(msg)
+        self.convolution_method = convolution_method
+        self.cache = cache
 
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
@@ -169,15 +247,55 @@ class CircularNeighbourhood(object):
             fullranges[axis] = ranges[axis_index]
         self.kernel = circular_kernel(fullranges, ranges,
                                       self.weighted_mode)
-        # Smooth the data by applying the kernel.
+        if self.cache is None:
+            cube.data = self._smooth_data(data, self.kernel, ranges)
+            return cube
+
+        # Process each 2D slice that is not already cached, with the y and
+        # x dimensions moved to the end.
+        spatial_dims = axes[::-1]
+        kernel = np.moveaxis(self.kernel, spatial_dims, [-2, -1])
+        kernel = kernel.reshape((1,) + kernel.shape[-2:])
+        config = ("circular", self.weighted_mode, self.sum_or_fraction,
+                  self.convolution_method, tuple(ranges))
+        smoothed_data = self.cache.process_slices(
+            np.moveaxis(data, spatial_dims, [-2, -1]), None, config,
+            lambda slices, _: self._smooth_data(slices, kernel, ranges))
+        cube.data = np.moveaxis(smoothed_data, [-2, -1], spatial_dims)
+        return cube
+
+    def _smooth_data(self, data, kernel, ranges):
+        """
+        Smooth an array by applying a kernel.
+
+        Args:
+            data (np.ndarray):
+                Array to be smoothed.
+            kernel (np.ndarray):
+                Kernel with the same number of dimensions as the data.
+            ranges (Tuple):
+                Number of grid cells in the x and y direction used to create
+                the kernel.
+
+        Returns:
+            smoothed_data (np.ndarray):
+                Array containing the smoothed field.
+        """
         if self.sum_or_fraction is "fraction":
-            total_area = np.sum(self.kernel)
+            total_area = np.sum(kernel)
         elif self.sum_or_fraction is "sum":
             total_area = 1.0
 
-        cube.data = scipy.ndimage.filters.correlate(
-            data, self.kernel, mode='nearest') / total_area
-        return cube
+        use_fft = self.convolution_method == "fft" or (
+            self.convolution_method == "auto" and
+            max(ranges) >= MIN_RADIUS_FOR_FFT_IN_GRID_CELLS and
+            np.isfinite(data).all())
+        if use_fft:
+            smoothed_data = fft_correlate(data, kernel)
+        else:
+            smoothed_data = scipy.ndimage.filters.correlate(
+                data, kernel, mode='nearest')
+        return smoothed_data / total_area
 
     def run(self, cube, radius, mask_cube=None):
         """
@@ -223,7 +341,8 @@ class GeneratePercentilesFromACircularNeighbourhood(object):
     A maximum kernel radius of 500 grid cells is imposed in order to
     avoid computational ineffiency and possible memory errors.
     """
-    def __init__(self, percentiles=DEFAULT_PERCENTILES):
+    def __init__(self, percentiles=DEFAULT_PERCENTILES,
+                 percentile_method="auto"):
         """
         Initialise class.
 
@@ -231,12 +350,30 @@ class GeneratePercentilesFromACircularNeighbourhood(object):
             percentiles (list or float):
                 Percentile values at which to calculate; if not provided uses
                 DEFAULT_PERCENTILES.
+            percentile_method (string):
+                Identifier for how the percentiles within each neighbourhood
+                are calculated. "sort" sorts the values within every
+                neighbourhood. "count" counts the number of values within
+                each neighbourhood that do not exceed each distinct value in
+                the field, which is faster for fields with few distinct
+                values, such as probabilities or quantised precipitation,
+                and the data must not contain NaNs. "auto" counts if the
+                data is finite and has no more than
+                MAX_DISTINCT_VALUES_FOR_COUNTING distinct values, which is
+                also fewer than the number of points within the kernel, and
+                sorts otherwise.
+                Valid options are "auto", "sort" or "count".
 
         """
         try:
             self.percentiles = tuple(percentiles)
         except TypeError:
             self.percentiles = tuple([percentiles])
+        if percentile_method not in ["auto", "sort", "count"]:
+            msg = ("The {} percentile method is invalid. Valid options are "
+                   "'auto', 'sort' or 'count'.".format(percentile_method))
+            raise ValueError(msg)
+        self.percentile_method = percentile_method
 
     def __repr__(self):
         """Represent the configured class instance as a string."""
@@ -360,38 +497,165 @@ class GeneratePercentilesFromACircularNeighbourhood(object):
         ranges_xy[1] = int(np.floor(kernel.shape[1] / 2.0))
         padded = np.pad(slice_2d.data, ranges_xy, mode='mean',
                         stat_length=np.max(ranges_xy))
-        padshape = np.shape(padded)  # Store size to make unflatten easier
-        padded = padded.flatten()
-        # Add 2nd dimension with each point's neighbourhood points along it.
-        # nbhood_slices is a list of numpy arrays where each array contains the
-        # total number of points within the padded array. The number of arrays
-        # is equal to the number of points within the kernel.
-        nbhood_slices = [
-            np.roll(padded, (padshape[1]*j)+i)
+        # Find the offsets within the padded array of the first row and
+        # column of the views, which contain the value at each point within
+        # the kernel for every point in the original array.
+        offsets = [
+            (ranges_xy[0] - j, ranges_xy[1] - i)
             for i in range(-ranges_xy[1], ranges_xy[1]+1)
             for j in range(-ranges_xy[0], ranges_xy[0]+1)
             if kernel[..., i+ranges_xy[1], j+ranges_xy[0]] > 0.]
 
-        # Collapse this dimension into percentiles (a new 2nd dimension)
-        perc_data = np.percentile(
-            nbhood_slices,
-            np.array(self.percentiles, dtype=np.float32),
-            axis=0
-        )
+        if self.percentile_method == "sort":
+            use_counting = False
+        else:
+            distinct_values = np.unique(np.ma.getdata(slice_2d.data))
+            use_counting = self.percentile_method == "count" or (
+                np.isfinite(distinct_values).all() and
+                len(distinct_values) <= MAX_DISTINCT_VALUES_FOR_COUNTING and
+                len(distinct_values) < len(offsets))
+        if use_counting:
+            perc_data = self.percentiles_from_counts(
+                padded, offsets, distinct_values, slice_2d.shape)
+        else:
+            perc_data = self.percentiles_from_sorting(
+                padded, offsets, slice_2d.shape)
 
-        # Convert back to float32 (np.percentile always gives float64 here...)
-        perc_data = perc_data.astype(np.float32)
-
-        # Return to 3D
-        perc_data = perc_data.reshape(
-            len(self.percentiles), padshape[0], padshape[1])
         # Create a cube for these data:
         pctcube = self.make_percentile_cube(slice_2d)
-        # And put in data, removing the padding
-        pctcube.data = perc_data[:, ranges_xy[0]:-ranges_xy[0],
-                                 ranges_xy[1]:-ranges_xy[1]]
+        pctcube.data = perc_data
         return pctcube
 
+    def percentiles_from_sorting(self, padded, offsets, shape):
+        """
+        Calculate the percentiles within each neighbourhood by sorting the
+        values within the neighbourhood.
+
+        Args:
+            padded (Numpy array):
+                2d array padded with a halo of the size of the kernel.
+            offsets (list of tuple):
+                The row and column of the padded array corresponding to the
+                first point of the original array, for each point within the
+                kernel.
+            shape (tuple):
+                The shape of the original array.
+
+        Returns:
+            perc_data (Numpy array):
+                Array containing the percentiles, with the percentile as the
+                leading dimension.
+        """
+        n_rows, n_columns = shape
+        # Process blocks of rows, so that the number of neighbourhood values
+        # held in memory at once is limited, rather than holding a copy of
+        # the whole array for each point within the kernel.
+        block_rows = max(
+            1, MAX_NEIGHBOURHOOD_VALUES_PER_BLOCK // (
+                len(offsets) * n_columns))
+        perc_data = np.empty((len(self.percentiles), n_rows, n_columns),
+                             dtype=np.float32)
+        for first_row in range(0, n_rows, block_rows):
+            last_row = min(first_row + block_rows, n_rows)
+            # Add a leading dimension with each point's neighbourhood
+            # points along it.
+            nbhood_values = np.stack([
+                padded[row_offset + first_row:row_offset + last_row,
+                       column_offset:column_offset + n_columns]
+                for row_offset, column_offset in offsets])
+            # Collapse this dimension into percentiles.
+            perc_data[:, first_row:last_row] = np.percentile(
+                nbhood_values,
+                np.array(self.percentiles, dtype=np.float32),
+                axis=0)
+        return perc_data
+
+    def percentiles_from_counts(self, padded, offsets, distinct_values,
+                                shape):
+        """
+        Calculate the percentiles within each neighbourhood from the number
+        of values within each neighbourhood that do not exceed each of the
+        distinct values within the original array. Each count is found by
+        correlating an indicator field with the kernel using FFT
+        convolution, so the cost depends on the number of distinct values
+        rather than the size of the kernel. The result is the same as
+        sorting the values within each neighbourhood and using linear
+        interpolation between them.
+
+        The neighbourhoods of points within the size of the kernel of the
+        edges of the domain include values from the padding, which may not
+        be amongst the distinct values, so the percentiles at these points
+        are found by sorting.
+
+        Args:
+            padded (Numpy array):
+                2d array padded with a halo of the size of the kernel.
+            offsets (list of tuple):
+                The row and column of the padded array corresponding to the
+                first point of the original array, for each point within the
+                kernel.
+            distinct_values (Numpy array):
+                The sorted distinct values within the original array.
+            shape (tuple):
+                The shape of the original array.
+
+        Returns:
+            perc_data (Numpy array):
+                Array containing the percentiles, with the percentile as the
+                leading dimension.
+        """
+        n_rows, n_columns = shape
+        halo_rows, halo_columns = [
+            (padded_length - length) // 2
+            for padded_length, length in zip(padded.shape, shape)]
+        if n_rows <= 2 * halo_rows or n_columns <= 2 * halo_columns:
+            return self.percentiles_from_sorting(padded, offsets, shape)
+
+        n_points = len(offsets)
+        footprint = np.zeros((2 * halo_rows + 1, 2 * halo_columns + 1))
+        for row_offset, column_offset in offsets:
+            footprint[row_offset, column_offset] = 1.
+        # Find the positions within the sorted values of each neighbourhood
+        # that are interpolated between to give each percentile.
+        positions = (np.array(self.percentiles, dtype=np.float64) / 100. *
+                     (n_points - 1))
+        lower_positions = np.floor(positions).astype(int)
+        upper_positions = np.minimum(lower_positions + 1, n_points - 1)
+        lower_values = np.full((len(positions),) + tuple(shape),
+                               distinct_values[0], dtype=np.float64)
+        upper_values = lower_values.copy()
+        for value, next_value in zip(distinct_values[:-1],
+                                     distinct_values[1:]):
+            # Count the values within each neighbourhood that do not exceed
+            # this value. Where this count does not exceed a position, the
+            # sorted value at that position is at least the next value.
+            counts = np.rint(scipy.signal.fftconvolve(
+                (padded <= value).astype(np.float64), footprint[::-1, ::-1],
+                mode='valid'))
+            for index, (lower, upper) in enumerate(
+                    zip(lower_positions, upper_positions)):
+                lower_values[index][counts <= lower] = next_value
+                upper_values[index][counts <= upper] = next_value
+        fractions = (positions - lower_positions)[:, np.newaxis, np.newaxis]
+        perc_data = lower_values + (upper_values - lower_values) * fractions
+        perc_data = perc_data.astype(np.float32)
+
+        edges = [(0, halo_rows, 0, n_columns),
+                 (n_rows - halo_rows, n_rows, 0, n_columns),
+                 (halo_rows, n_rows - halo_rows, 0, halo_columns),
+                 (halo_rows, n_rows - halo_rows,
+                  n_columns - halo_columns, n_columns)]
+        for first_row, last_row, first_column, last_column in edges:
+            if first_row == last_row or first_column == last_column:
+                continue
+            perc_data[:, first_row:last_row, first_column:last_column] = (
+                self.percentiles_from_sorting(
+                    padded[first_row:last_row + 2 * halo_rows,
+                           first_column:last_column + 2 * halo_columns],
+                    offsets,
+                    (last_row - first_row, last_column - first_column)))
+        return perc_data
+
     def run(self, cube, radius, mask_cube=None):
         """
         Method to apply a circular kernel to the data within the input cube in
@@ -81,6 +81,10 @@ class BaseNeighbourhoodProcessing(object):
                 in hours.
         """
         self.neighbourhood_method = neighbourhood_method
+        # Counters of the 2D slices passed to the process method, and of
+        # those that were skipped as their values are constant.
+        self.n_slices = 0
+        self.n_constant_slices_skipped = 0
 
         if isinstance(radii, list):
             self.radii = [float(x) for x in radii]
@@ -153,6 +157,190 @@ class BaseNeighbourhoodProcessing(object):
                        self.neighbourhood_method))
             raise ValueError(msg)
 
+        if np.isnan(cube.data).any():
+            raise ValueError("Error: NaN detected in input cube data")
+
+        yname = cube.coord(axis='y').name()
+        xname = cube.coord(axis='x').name()
+        spatial_dims = [cube.coord_dims(yname)[0], cube.coord_dims(xname)[0]]
+        self.n_slices += int(
+            np.prod(cube.shape) // np.prod(
+                [cube.shape[dim] for dim in spatial_dims]))
+
+        # Slices with a constant value are only skipped for methods that
+        # return a fraction, for which the result is known without
+        # neighbourhood processing.
+        if getattr(self.neighbourhood_method, "sum_or_fraction",
+                   None) == "fraction":
+            return self._process_skipping_constant_slices(
+                cube, spatial_dims, mask_cube=mask_cube)
+        return self._process_cube(cube, mask_cube=mask_cube)
+
+    def _find_constant_slices(self, data, mask_data=None):
+        """
+        Find the 2D slices of an array in which every point that contributes
+        to the neighbourhood has the same finite value, and the result of a
+        fraction neighbourhood for each of these slices.
+
+        A square neighbourhood ignores points that are masked in the data or
+        where the mask is zero, so the result is the constant value, clipped
+        to the range of the masked data as in the square neighbourhood.
+        Points that do not contribute are masked if re_mask is True.
+        Otherwise the result at these points depends on the neighbourhood,
+        so slices containing them are not treated as constant. Other
+        neighbourhood methods use all points of the data.
+
+        Args:
+            data (np.ndarray or np.ma.MaskedArray):
+                Array with the y and x dimensions last.
+
+        Keyword Args:
+            mask_data (np.ndarray or None):
+                Array to be used as a mask, which must be broadcastable to
+                the shape of the data.
+
+        Returns:
+            (tuple): tuple containing:
+                **is_constant** (np.ndarray):
+                    Boolean array over the leading dimensions of the data,
+                    which is True for each constant slice.
+                **constant_result** (np.ma.MaskedArray):
+                    Array with the shape of the data containing the result
+                    for each constant slice. Other slices are filled with
+                    zeros.
+        """
+        values = np.ma.getdata(data)
+        uses_mask = isinstance(self.neighbourhood_method, SquareNeighbourhood)
+        if not uses_mask or (mask_data is None and not np.ma.is_masked(data)):
+            minimum = np.min(values, axis=(-2, -1), keepdims=True)
+            maximum = np.max(values, axis=(-2, -1), keepdims=True)
+            is_constant = (minimum == maximum) & np.isfinite(minimum)
+            constant_result = np.ma.masked_array(np.broadcast_to(
+                np.where(is_constant, minimum, 0), values.shape))
+            return is_constant[..., 0, 0], constant_result
+
+        mask = np.ones(values.shape)
+        if mask_data is not None:
+            mask[...] = np.ma.getdata(mask_data)
+        mask[np.ma.getmaskarray(data)] = 0.
+        contributes = mask != 0.
+        minimum = np.min(np.where(contributes, values, np.inf),
+                         axis=(-2, -1), keepdims=True)
+        maximum = np.max(np.where(contributes, values, -np.inf),
+                         axis=(-2, -1), keepdims=True)
+        is_constant = ((minimum == maximum) & np.isfinite(minimum) &
+                       (mask >= 0.).all(axis=(-2, -1), keepdims=True))
+        if not self.neighbourhood_method.re_mask:
+            is_constant &= contributes.all(axis=(-2, -1), keepdims=True)
+
+        constant = np.where(is_constant, minimum, 0).astype(values.dtype)
+        masked_data = (constant * mask).astype(values.dtype)
+        constant_result = np.clip(
+            constant, np.min(masked_data, axis=(-2, -1), keepdims=True),
+            np.max(masked_data, axis=(-2, -1), keepdims=True))
+        constant_result = np.ma.masked_array(
+            np.broadcast_to(constant_result, values.shape),
+            mask=np.logical_not(contributes))
+        return is_constant[..., 0, 0], constant_result
+
+    def _process_skipping_constant_slices(self, cube, spatial_dims,
+                                          mask_cube=None):
+        """
+        Apply the neighbourhood processing method to a cube, skipping the 2D
+        slices for which the result of a fraction neighbourhood is known, as
+        every point that contributes to the neighbourhood has the same value.
+
+        Each leading dimension is reduced to the indices with at least one
+        slice that is not constant, and this block of the cube is processed
+        as usual. The constant slices outside the block are filled with
+        their known result.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube to apply a neighbourhood processing method to.
+            spatial_dims (list of int):
+                The y and x dimensions of the cube.
+
+        Keyword Args:
+            mask_cube (Iris.cube.Cube):
+                Cube containing the array to be used as a mask.
+
+        Returns:
+            cube (Iris.cube.Cube):
+                Cube after applying a neighbourhood processing method, so that
+                the resulting field is smoothed.
+        """
+        # Only square neighbourhoods support a mask cube, so other methods
+        # are left to raise an exception.
+        if (mask_cube is not None and not isinstance(
+                self.neighbourhood_method, SquareNeighbourhood)):
+            return self._process_cube(cube, mask_cube=mask_cube)
+        data = np.moveaxis(cube.data, spatial_dims, [-2, -1])
+        if not np.issubdtype(data.dtype, np.floating):
+            return self._process_cube(cube, mask_cube=mask_cube)
+        is_constant, constant_result = self._find_constant_slices(
+            data, mask_data=None if mask_cube is None else mask_cube.data)
+
+        leading_dims = [dim for dim in range(cube.ndim)
+                        if dim not in spatial_dims]
+        block_indices = [
+            np.flatnonzero(~is_constant.all(axis=tuple(
+                other for other in range(is_constant.ndim) if other != axis)))
+            for axis in range(is_constant.ndim)]
+        n_processed = 0
+        if not is_constant.all():
+            n_processed = int(np.prod([len(indices)
+                                       for indices in block_indices]))
+        if n_processed == is_constant.size:
+            return self._process_cube(cube, mask_cube=mask_cube)
+        # A mask cube with leading dimensions cannot be reduced to the block
+        # in the same way as the cube, so the whole cube is processed.
+        if n_processed > 0 and mask_cube is not None and mask_cube.ndim > 2:
+            return self._process_cube(cube, mask_cube=mask_cube)
+
+        result = np.ma.masked_array(
+            np.moveaxis(constant_result, [-2, -1], spatial_dims),
+            dtype=np.result_type(data.dtype, np.float32), copy=True)
+        result.mask = np.ma.getmaskarray(result)
+        metadata = cube.metadata
+        if n_processed > 0:
+            block = cube
+            for dim, indices in zip(leading_dims, block_indices):
+                index = [slice(None)] * cube.ndim
+                index[dim] = indices
+                block = block[tuple(index)]
+            processed_cube = self._process_cube(block, mask_cube=mask_cube)
+            metadata = processed_cube.metadata
+            result = result.astype(processed_cube.dtype)
+            index = [np.arange(length) for length in cube.shape]
+            for dim, indices in zip(leading_dims, block_indices):
+                index[dim] = indices
+            result[np.ix_(*index)] = processed_cube.data
+        self.n_constant_slices_skipped += is_constant.size - n_processed
+        if not result.mask.any():
+            result = result.data
+
+        result_cube = cube.copy(data=result)
+        result_cube.metadata = metadata
+        return result_cube
+
+    def _process_cube(self, cube, mask_cube=None):
+        """
+        Apply the neighbourhood processing method to every slice of a cube.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube to apply a neighbourhood processing method to.
+
+        Keyword Args:
+            mask_cube (Iris.cube.Cube):
+                Cube containing the array to be used as a mask.
+
+        Returns:
+            cube (Iris.cube.Cube):
+                Cube after applying a neighbourhood processing method, so that
+                the resulting field is smoothed.
+        """
         # Check if a dimensional realization coordinate exists. If so, the
         # cube is sliced, so that it becomes a scalar coordinate.
         try:
@@ -162,9 +350,6 @@ class BaseNeighbourhoodProcessing(object):
         else:
             slices_over_realization = cube.slices_over("realization")
 
-        if np.isnan(cube.data).any():
-            raise ValueError("Error: NaN detected in input cube data")
-
         cubes_real = []
         for cube_realization in slices_over_realization:
             if self.lead_times is None:
@@ -177,21 +362,29 @@ class BaseNeighbourhoodProcessing(object):
                 required_radii = self._find_radii(
                     cube_lead_times=fp_coord.points)
 
-                cubes_time = iris.cube.CubeList([])
-                # Find the number of grid cells required for creating the
-                # neighbourhood, and then apply the neighbourhood
-                # processing method to smooth the field.
-                for cube_slice, radius in (
-                        zip(cube_realization.slices_over("time"),
-                            required_radii)):
-                    cube_slice = self.neighbourhood_method.run(
-                        cube_slice, radius, mask_cube=mask_cube)
-                    cubes_time.append(cube_slice)
-                if len(cubes_time) > 1:
-                    cube_new = concatenate_cubes(
-                        cubes_time, coords_to_slice_over=["time"])
+                # Neighbourhood methods that can vary the radius along a
+                # dimension process all times at once.
+                if callable(getattr(self.neighbourhood_method,
+                                    "run_radii_by_slice", None)):
+                    cube_new = self.neighbourhood_method.run_radii_by_slice(
+                        cube_realization, list(required_radii), "time",
+                        mask_cube=mask_cube)
                 else:
-                    cube_new = cubes_time[0]
+                    cubes_time = iris.cube.CubeList([])
+                    # Find the number of grid cells required for creating
+                    # the neighbourhood, and then apply the neighbourhood
+                    # processing method to smooth the field.
+                    for cube_slice, radius in (
+                            zip(cube_realization.slices_over("time"),
+                                required_radii)):
+                        cube_slice = self.neighbourhood_method.run(
+                            cube_slice, radius, mask_cube=mask_cube)
+                        cubes_time.append(cube_slice)
+                    if len(cubes_time) > 1:
+                        cube_new = concatenate_cubes(
+                            cubes_time, coords_to_slice_over=["time"])
+                    else:
+                        cube_new = cubes_time[0]
             cubes_real.append(cube_new)
         if len(cubes_real) > 1:
             combined_cube = concatenate_cubes(
@@ -260,7 +453,7 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
     def __init__(
             self, neighbourhood_method, radii, lead_times=None,
             weighted_mode=True, sum_or_fraction="fraction",
-            re_mask=False):
+            re_mask=False, cache=None):
         """
         Create a neighbourhood processing subclass that applies a smoothing
         to points in a cube.
@@ -298,6 +491,12 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
                 mask is not applied. Therefore, the neighbourhood processing
                 may result in values being present in areas that were
                 originally masked.
+            cache (NeighbourhoodResultCache or None):
+                Cache of neighbourhood processed fields to be consulted by
+                the neighbourhood method, so that identical 2D slices (e.g.
+                thresholded probabilities that are zero everywhere) are only
+                processed once. The same cache may be shared between
+                plugins. If None, all slices are processed.
         """
         super(NeighbourhoodProcessing, self).__init__(
             neighbourhood_method, radii, lead_times=lead_times)
@@ -308,7 +507,7 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
         try:
             method = methods[neighbourhood_method]
             self.neighbourhood_method = method(
-                weighted_mode, sum_or_fraction, re_mask)
+                weighted_mode, sum_or_fraction, re_mask, cache=cache)
         except KeyError:
             msg = ("The neighbourhood_method requested: {} is not a "
                    "supported method. Please choose from: {}".format(
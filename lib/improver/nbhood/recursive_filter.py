@@ -30,13 +30,11 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Module to apply a recursive filter to neighbourhooded data."""
 
-import iris
 import numpy as np
+from scipy.signal import lfilter
 
 from improver.nbhood.square_kernel import SquareNeighbourhood
-from improver.utilities.cube_checker import check_cube_coordinates
-from improver.utilities.pad_spatial import (
-    pad_cube_with_halo, remove_halo_from_cube)
+from improver.utilities.pad_spatial import pad_cube_with_halo
 
 
 class RecursiveFilter(object):
@@ -123,30 +121,50 @@ class RecursiveFilter(object):
                 Bi = new value at gridpoint i, Ai = Old value at gridpoint i
                 Bi-1 = New value at gridpoint i-1
 
+        The recursion steps from one gridpoint to the next along the axis,
+        with each step applied to all of the other gridpoints at once. If
+        the axis is the last axis of the grid, each step would access
+        scattered values, so if alpha is the same at every gridpoint, the
+        recursion is instead applied as a first order IIR filter using
+        scipy.signal.lfilter.
+
         Args:
             grid (numpy array):
-                2D array containing the input data to which the recursive
-                filter will be applied.
+                Array containing the input data to which the recursive
+                filter will be applied. This may be a stack of 2D arrays
+                with any number of leading dimensions, which are all
+                filtered at once.
             alphas (numpy array):
-                Matching 2D array of alpha values that will be used when
-                applying the recursive filter along the specified axis.
+                Array of alpha values that will be used when applying the
+                recursive filter along the specified axis. This must be
+                broadcastable to the shape of the grid.
             axis (integer):
-                Index of the spatial axis (0 or 1) over which to recurse.
+                Index of the spatial axis of the grid over which to recurse.
 
         Returns:
             grid (numpy array):
-                2D array containing the smoothed field after the recursive
+                Array containing the smoothed field after the recursive
                 filter method has been applied to the input array in the
                 forward direction along the specified axis.
         """
-        lim = grid.shape[axis]
-        for i in range(1, lim):
-            if axis == 0:
-                grid[i, :] = ((1. - alphas[i, :]) * grid[i, :] +
-                              alphas[i, :] * grid[i-1, :])
-            if axis == 1:
-                grid[:, i] = ((1. - alphas[:, i]) * grid[:, i] +
-                              alphas[:, i] * grid[:, i-1])
+        alphas = np.broadcast_to(alphas, grid.shape)
+        alpha = alphas.flat[0]
+        if axis % grid.ndim == grid.ndim - 1 and np.all(alphas == alpha):
+            # Use coefficients of the same type as the grid and set the
+            # initial condition of the filter, so that the value at the first
+            # gridpoint is unchanged.
+            numerator = np.array([1. - alpha], dtype=grid.dtype)
+            denominator = np.array([1., -alpha], dtype=grid.dtype)
+            initial_conditions = -denominator[1] * grid[..., :1]
+            grid[...] = lfilter(numerator, denominator, grid,
+                                zi=initial_conditions)[0]
+            return grid
+
+        stepped_grid = np.moveaxis(grid, axis, 0)
+        stepped_alphas = np.moveaxis(alphas, axis, 0)
+        for i in range(1, stepped_grid.shape[0]):
+            stepped_grid[i] = ((1. - stepped_alphas[i]) * stepped_grid[i] +
+                               stepped_alphas[i] * stepped_grid[i-1])
         return grid
 
     @staticmethod
@@ -162,30 +180,31 @@ class RecursiveFilter(object):
                 Bi = new value at gridpoint i, Ai = Old value at gridpoint i
                 Bi+1 = New value at gridpoint i+1
 
+        This is the forward recursion applied to views of the arrays that
+        are reversed along the axis.
+
         Args:
             grid (numpy array):
-                2D array containing the input data to which the recursive
-                filter will be applied.
+                Array containing the input data to which the recursive
+                filter will be applied. This may be a stack of 2D arrays
+                with any number of leading dimensions, which are all
+                filtered at once.
             alphas (numpy array):
-                Matching 2D array of alpha values that will be used when
-                applying the recursive filter along the specified axis.
+                Array of alpha values that will be used when applying the
+                recursive filter along the specified axis. This must be
+                broadcastable to the shape of the grid.
             axis (integer):
-                Index of the spatial axis (0 or 1) over which to recurse.
+                Index of the spatial axis of the grid over which to recurse.
 
         Returns:
             grid (numpy array):
-                2D array containing the smoothed field after the recursive
+                Array containing the smoothed field after the recursive
                 filter method has been applied to the input array in the
                 backwards direction along the specified axis.
         """
-        lim = grid.shape[axis]
-        for i in range(lim-2, -1, -1):
-            if axis == 0:
-                grid[i, :] = ((1. - alphas[i, :]) * grid[i, :] +
-                              alphas[i, :] * grid[i+1, :])
-            if axis == 1:
-                grid[:, i] = ((1. - alphas[:, i]) * grid[:, i] +
-                              alphas[:, i] * grid[:, i+1])
+        alphas = np.broadcast_to(alphas, grid.shape)
+        RecursiveFilter._recurse_forward(
+            np.flip(grid, axis), np.flip(alphas, axis), axis)
         return grid
 
     @staticmethod
@@ -213,19 +232,49 @@ class RecursiveFilter(object):
         """
         x_index, = cube.coord_dims(cube.coord(axis="x").name())
         y_index, = cube.coord_dims(cube.coord(axis="y").name())
-        output = cube.data
+        cube.data = RecursiveFilter._apply_recursion(
+            cube.data, alphas_x.data, alphas_y.data, x_index, y_index,
+            iterations)
+        return cube
 
+    @staticmethod
+    def _apply_recursion(data, alphas_x, alphas_y, x_index, y_index,
+                         iterations):
+        """
+        Method to run the recursive filter on an array.
+
+        Args:
+            data (numpy array):
+                Array containing the input data to which the recursive
+                filter will be applied. This may have any number of
+                dimensions in addition to the x and y dimensions, which are
+                all filtered at once.
+            alphas_x (numpy array):
+                Array of alpha values that will be used when applying the
+                recursive filter along the x-axis. This must be
+                broadcastable to the shape of the data.
+            alphas_y (numpy array):
+                Array of alpha values that will be used when applying the
+                recursive filter along the y-axis. This must be
+                broadcastable to the shape of the data.
+            x_index (integer):
+                Index of the x-axis of the data.
+            y_index (integer):
+                Index of the y-axis of the data.
+            iterations (integer):
+                The number of iterations of the recursive filter
+
+        Returns:
+            data (numpy array):
+                Array containing the smoothed field after the recursive
+                filter method has been applied to the input array.
+        """
         for _ in range(iterations):
-            output = RecursiveFilter._recurse_forward(output, alphas_x.data,
-                                                      x_index)
-            output = RecursiveFilter._recurse_backward(output, alphas_x.data,
-                                                       x_index)
-            output = RecursiveFilter._recurse_forward(output, alphas_y.data,
-                                                      y_index)
-            output = RecursiveFilter._recurse_backward(output, alphas_y.data,
-                                                       y_index)
-            cube.data = output
-        return cube
+            data = RecursiveFilter._recurse_forward(data, alphas_x, x_index)
+            data = RecursiveFilter._recurse_backward(data, alphas_x, x_index)
+            data = RecursiveFilter._recurse_forward(data, alphas_y, y_index)
+            data = RecursiveFilter._recurse_backward(data, alphas_y, y_index)
+        return data
 
     def _set_alphas(self, cube, alpha, alphas_cube):
         """
@@ -286,20 +335,17 @@ class RecursiveFilter(object):
 
         The steps undertaken are:
 
-        1. Split the input cube into slices determined by the co-ordinates in
-           the x and y directions.
-        2. Construct an array of filter parameters (alphas_x and alphas_y) for
-           each cube slice that are used to weight the recursive filter in
-           the x- and y-directions.
-        3. Pad each cube slice with a square-neighbourhood halo and apply
-           the recursive filter for the required number of iterations.
-        4. Remove the halo from the cube slice and append the recursed cube
-           slice to a 'recursed cube'.
-        5. Merge all the cube slices in the 'recursed cube' into a 'new cube'.
-        6. Modify the 'new cube' so that its scalar dimension co-ordinates are
-           consistent with those in the original input cube.
-        7. Return the 'new cube' which now contains the recursively filtered
-           values for the original input cube.
+        1. Construct an array of filter parameters (alphas_x and alphas_y)
+           that are used to weight the recursive filter in the x- and
+           y-directions.
+        2. Move the y and x dimensions of the data to the end, so that all
+           slices over the other dimensions (e.g. realization and threshold)
+           are processed at once.
+        3. Pad the data with a square-neighbourhood halo and apply the
+           recursive filter for the required number of iterations.
+        4. Remove the halo and return the data to the original order of the
+           dimensions within a copy of the input cube, which now contains
+           the recursively filtered values.
 
         Args:
             cube (Iris.cube.Cube):
@@ -327,33 +373,40 @@ class RecursiveFilter(object):
         alphas_x = self._set_alphas(cube_format, self.alpha_x, alphas_x)
         alphas_y = self._set_alphas(cube_format, self.alpha_y, alphas_y)
 
-        recursed_cube = iris.cube.CubeList()
-        for output in cube.slices([cube.coord(axis='y'),
-                                   cube.coord(axis='x')]):
-
-            # Setup cube and mask for processing.
-            # This should set up a mask full of 1.0 if None is provided
-            # and set the data 0.0 where mask is 0.0 or the data is NaN
-            output, mask, nan_array = (
-                SquareNeighbourhood().set_up_cubes_to_be_neighbourhooded(
-                    output, mask_cube))
-            mask = mask.data.squeeze()
-
-            padded_cube = pad_cube_with_halo(
-                output, 2*self.edge_width, 2*self.edge_width)
-
-            new_cube = self._run_recursion(padded_cube, alphas_x, alphas_y,
-                                           self.iterations)
-            new_cube = remove_halo_from_cube(
-                new_cube, 2*self.edge_width, 2*self.edge_width)
-            if self.re_mask:
-                new_cube.data[nan_array.astype(bool)] = np.nan
-                new_cube.data = np.ma.masked_array(new_cube.data,
-                                                   mask=np.logical_not(mask))
-
-            recursed_cube.append(new_cube)
-
-        new_cube = recursed_cube.merge_cube()
-        new_cube = check_cube_coordinates(cube, new_cube)
-
+        spatial_dims = [cube.coord_dims(cube.coord(axis='y'))[0],
+                        cube.coord_dims(cube.coord(axis='x'))[0]]
+        data = np.moveaxis(cube.data, spatial_dims, [-2, -1])
+        mask_data = None
+        if mask_cube is not None:
+            mask_data = np.moveaxis(
+                mask_cube.data,
+                [mask_cube.coord_dims(mask_cube.coord(axis='y'))[0],
+                 mask_cube.coord_dims(mask_cube.coord(axis='x'))[0]],
+                [-2, -1])
+
+        # Setup data and mask for processing.
+        # This should set up a mask full of 1.0 if None is provided
+        # and set the data 0.0 where mask is 0.0 or the data is NaN
+        data, mask, nan_array = (
+            SquareNeighbourhood.set_up_arrays_to_be_neighbourhooded(
+                data, mask_data=mask_data))
+
+        # Pad the y and x dimensions with a halo, as pad_cube_with_halo does
+        # for a 2D cube.
+        width = 2*self.edge_width
+        padded_data = np.pad(
+            data, [(0, 0)]*(data.ndim - 2) + [(width, width)]*2,
+            "mean", stat_length=self.edge_width)
+
+        new_data = self._apply_recursion(
+            padded_data, alphas_x.data, alphas_y.data, -1, -2,
+            self.iterations)
+        end = -width if width != 0 else None
+        new_data = new_data[..., width:end, width:end]
+        if self.re_mask:
+            new_data[nan_array] = np.nan
+            new_data = np.ma.masked_array(new_data, mask=np.logical_not(mask))
+
+        new_cube = cube.copy(
+            data=np.moveaxis(new_data, [-2, -1], spatial_dims))
         return new_cube
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017-2019 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""This module contains a cache of neighbourhood processing results."""
+
+from collections import OrderedDict
+import hashlib
+
+import numpy as np
+
+# Default maximum total size in bytes of the results held within a
+# NeighbourhoodResultCache.
+DEFAULT_MAX_CACHE_BYTES = 2**28
+
+
+class NeighbourhoodResultCache(object):
+
+    """
+    A least recently used cache of neighbourhood processed 2D fields.
+
+    Results are keyed by a digest of the input field, the mask and the
+    configuration of the neighbourhood (e.g. the method and radius), so that
+    identical fields, such as thresholded probabilities that are zero
+    everywhere, are only neighbourhood processed once, whichever realization,
+    time or threshold they belong to. The oldest results are discarded once
+    the total size of the cached results exceeds the maximum number of bytes.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_CACHE_BYTES):
+        """
+        Initialise class.
+
+        Keyword Args:
+            max_bytes (int):
+                Maximum total size in bytes of the results held within the
+                cache.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.duplicates = 0
+        self._results = OrderedDict()
+
+    def __repr__(self):
+        """Represent the configured plugin instance as a string."""
+        result = ('<NeighbourhoodResultCache: max_bytes: {}, nbytes: {}, '
+                  'hits: {}, misses: {}, duplicates: {}>')
+        return result.format(
+            self.max_bytes, self.nbytes, self.hits, self.misses,
+            self.duplicates)
+
+    def __len__(self):
+        """Return the number of results held within the cache."""
+        return len(self._results)
+
+    @staticmethod
+    def make_key(data, mask_data, config):
+        """
+        Create the key for a field from a digest of its data, mask and the
+        configuration of the neighbourhood processing.
+
+        Args:
+            data (np.ndarray or np.ma.MaskedArray):
+                Field to be neighbourhood processed.
+            mask_data (np.ndarray or None):
+                Array to be used as a mask for the field.
+            config (tuple):
+                Hashable description of the neighbourhood processing
+                applied to the field, e.g. the method and number of grid
+                cells.
+
+        Returns:
+            key (tuple):
+                The key for the result within the cache.
+        """
+        digest = hashlib.md5()
+        arrays = [np.ma.getdata(data)]
+        if np.ma.is_masked(data):
+            arrays.append(np.ma.getmaskarray(data))
+        if mask_data is not None:
+            arrays.append(mask_data)
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            digest.update(str((array.shape, array.dtype.str)).encode())
+            digest.update(array.view(np.uint8))
+        return (digest.hexdigest(), config)
+
+    def get(self, key):
+        """
+        Get a cached result, marking it as the most recently used.
+
+        Args:
+            key (tuple):
+                Key returned by make_key.
+
+        Returns:
+            result (np.ndarray or np.ma.MaskedArray or None):
+                The cached result, which must not be modified, or None if
+                the key is not within the cache.
+        """
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        """
+        Add a copy of a result to the cache, discarding the least recently
+        used results if the cache would exceed the maximum number of bytes.
+        Results that are larger than the maximum number of bytes are not
+        cached. A masked result without any masked points is stored as a
+        plain array.
+
+        Args:
+            key (tuple):
+                Key returned by make_key.
+            result (np.ndarray or np.ma.MaskedArray):
+                Neighbourhood processed field.
+        """
+        result = self._normalise(result)
+        result_bytes = self._size_of(result)
+        if key in self._results or result_bytes > self.max_bytes:
+            return
+        while self.nbytes + result_bytes > self.max_bytes:
+            _, oldest = self._results.popitem(last=False)
+            self.nbytes -= self._size_of(oldest)
+        self._results[key] = result.copy()
+        self.nbytes += result_bytes
+
+    @staticmethod
+    def _normalise(result):
+        """
+        Return a result as a plain array if none of its points are masked,
+        so that the type of a result does not depend on the other slices
+        that were processed with it.
+        """
+        if (isinstance(result, np.ma.MaskedArray) and
+                not np.ma.is_masked(result)):
+            return result.data
+        return result
+
+    @staticmethod
+    def _size_of(result):
+        """Return the number of bytes held by a result and its mask."""
+        nbytes = result.nbytes
+        if isinstance(result, np.ma.MaskedArray):
+            nbytes += np.ma.getmaskarray(result).nbytes
+        return nbytes
+
+    def process_slices(self, data, mask_data, config, function):
+        """
+        Neighbourhood process each 2D slice of an array, using the cached
+        results where available. The slices that are not cached are
+        processed with a single call to the function, with each distinct
+        slice processed only once, and the results are added to the cache.
+
+        Slices found in the cache are counted as hits and those processed
+        as misses. Slices repeated within the same array are counted as
+        duplicates, as their result is reused without consulting the cache.
+
+        Args:
+            data (np.ndarray or np.ma.MaskedArray):
+                Array to be neighbourhood processed, with the y and x
+                dimensions last.
+            mask_data (np.ndarray or None):
+                Array to be used as a mask, which must be broadcastable to
+                the shape of the data.
+            config (tuple):
+                Hashable description of the neighbourhood processing
+                applied by the function.
+            function (callable):
+                Function taking a 3D array of slices and the corresponding
+                3D mask (or None), which returns the neighbourhood processed
+                slices.
+
+        Returns:
+            result (np.ndarray or np.ma.MaskedArray):
+                The neighbourhood processed array, with the same shape as
+                the input data. This is a masked array if the result for
+                any slice has masked points, whether the result was cached
+                or processed.
+        """
+        shape_2d = data.shape[-2:]
+        slices = data.reshape((-1,) + shape_2d)
+        mask_slices = None
+        if mask_data is not None:
+            mask_slices = np.broadcast_to(mask_data, data.shape).reshape(
+                (-1,) + shape_2d)
+
+        keys = [self.make_key(
+            slices[index],
+            None if mask_slices is None else mask_slices[index], config)
+                for index in range(len(slices))]
+        results = {}
+        to_process = []
+        for index, key in enumerate(keys):
+            if key in results:
+                self.duplicates += 1
+                continue
+            results[key] = self.get(key)
+            if results[key] is None:
+                to_process.append(index)
+            else:
+                self.hits += 1
+        self.misses += len(to_process)
+
+        if to_process:
+            processed = function(
+                slices[to_process],
+                None if mask_slices is None else mask_slices[to_process])
+            for index, result in zip(to_process, processed):
+                results[keys[index]] = self._normalise(result)
+                self.put(keys[index], result)
+
+        ordered_results = [results[key] for key in keys]
+        if any(isinstance(result, np.ma.MaskedArray)
+               for result in ordered_results):
+            result = np.ma.stack(ordered_results)
+        else:
+            result = np.stack(ordered_results)
+        return result.reshape(data.shape[:-2] + result.shape[-2:])
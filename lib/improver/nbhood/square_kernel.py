@@ -33,11 +33,6 @@
 import iris
 import numpy as np
 
-from improver.utilities.cube_checker import (
-    check_for_x_and_y_axes, check_cube_coordinates)
-from improver.utilities.cube_manipulation import clip_cube_data
-from improver.utilities.pad_spatial import (
-    pad_cube_with_halo, remove_halo_from_cube)
 from improver.utilities.spatial import (
     convert_distance_into_number_of_grid_cells)
 
@@ -52,7 +47,7 @@ class SquareNeighbourhood(object):
     """
 
     def __init__(self, weighted_mode=True, sum_or_fraction="fraction",
-                 re_mask=True):
+                 re_mask=True, cache=None):
         """
         Initialise class.
 
@@ -73,6 +68,10 @@ class SquareNeighbourhood(object):
                 mask is not applied. Therefore, the neighbourhood processing
                 may result in values being present in areas that were
                 originally masked.
+            cache (NeighbourhoodResultCache or None):
+                Cache of neighbourhood processed fields to consult before
+                processing each 2D slice, so that identical slices are only
+                processed once. If None, all slices are processed.
         """
         self.weighted_mode = weighted_mode
         if sum_or_fraction not in ["sum", "fraction"]:
@@ -84,6 +83,7 @@ class SquareNeighbourhood(object):
             raise ValueError(msg)
         self.sum_or_fraction = sum_or_fraction
         self.re_mask = re_mask
+        self.cache = cache
 
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
@@ -93,56 +93,64 @@ class SquareNeighbourhood(object):
                              self.re_mask)
 
     @staticmethod
-    def cumulate_array(cube, iscomplex=False):
+    def create_summed_area_table(data, cells_x, cells_y):
         """
-        Method to calculate the cumulative sum of an m x n array, by first
-        cumulating along the y direction so that the largest values
-        are in the nth row, and then cumulating along the x direction,
-        so that the largest values are in the mth column. Each grid point
-        will contain the cumulative sum from the origin to that grid point.
+        Method to calculate the summed area table of an array, by padding the
+        y and x dimensions with zeros and then cumulating along the y
+        direction and then along the x direction. Each grid point will
+        contain the cumulative sum from the origin of the padded array to
+        that grid point.
+
+        The array is padded with cells_y + 1 rows at the start and cells_y
+        rows at the end of the y dimension, and similarly using cells_x for
+        the x dimension. This means that the neighbourhood sum for every
+        point within the original domain can be found from the table without
+        any wrapping around the edges of the domain. The table can be used
+        to calculate the neighbourhood sum for any neighbourhood up to this
+        size.
+
+        The cumulative sums are calculated in double precision (or complex
+        double precision). The rounding error of a double precision sum is
+        far smaller than the precision of the single precision output, so no
+        further compensation is required.
 
         Args:
-            cube (Iris.cube.Cube):
-                Cube to which the cumulative summing along the y and x
-                direction will be applied. The cube should contain only x and
-                y dimensions, so will generally be a slice of a cube ordered
-                so that y is first in the cube (i.e. axis=0).
-
-        Kwargs:
-            iscomplex (bool):
-                Flag indicating whether cube.data contains complex values.
+            data (np.ndarray):
+                Array to which the cumulative summing along the y and x
+                direction will be applied. The y and x dimensions must be the
+                last two dimensions of the array. Any leading dimensions are
+                cumulated independently.
+            cells_x, cells_y (int):
+                The maximum radius of the neighbourhood in grid points, in
+                the x and y directions (excluding the central grid point),
+                that the table will be used for.
 
         Returns:
-            summed_cube (Iris.cube.Cube):
-                Cube to which the cumulative summing
-                along the y and x direction has been applied.
+            summed_area_table (np.ndarray):
+                Array to which the padding and cumulative summing along the
+                y and x direction has been applied.
         """
-        summed_cube = cube.copy()
-        if iscomplex:
-            data = cube.data.astype(complex)
-        elif cube.name().startswith("probability_of"):
-            # No need for high precision calculation, just between 0 and 1.
-            data = cube.data.astype(np.float32)
+        if np.iscomplexobj(data):
+            dtype = np.complex128
         else:
-            # Go to high precision for safety.
-            data = cube.data.astype(np.longdouble)
-        data_summed_along_y = np.cumsum(data, axis=0)
-        data_summed_along_x = (
-            np.cumsum(data_summed_along_y, axis=1))
-        summed_cube.data = data_summed_along_x
-        return summed_cube
+            dtype = np.float64
+        pad_width = ([(0, 0)] * (data.ndim - 2) +
+                     [(cells_y + 1, cells_y), (cells_x + 1, cells_x)])
+        summed_area_table = np.pad(
+            data.astype(dtype), pad_width, mode='constant')
+        np.cumsum(summed_area_table, axis=-2, out=summed_area_table)
+        np.cumsum(summed_area_table, axis=-1, out=summed_area_table)
+        return summed_area_table
 
     @staticmethod
-    def calculate_neighbourhood(summed_cube,
-                                ymax_xmax_disp, ymin_xmax_disp,
-                                ymin_xmin_disp, ymax_xmin_disp,
-                                n_rows, n_columns):
+    def sum_over_neighbourhood(summed_area_table, cells_x, cells_y,
+                               n_rows, n_columns):
         """
-        Fast vectorised approach to calculating neighbourhood totals.
+        Fast vectorised approach to calculating neighbourhood totals from a
+        summed area table.
 
-        Displacements are calculated as follows for the following input array,
-        where the accumulation has occurred from top to
-        bottom and left to right::
+        For the following summed area table, where the accumulation has
+        occurred from top to bottom and left to right::
 
         | 1 | 2 | 2 | 2 |
         | 1 | 3 | 4 | 4 |
@@ -166,144 +174,54 @@ class SquareNeighbourhood(object):
 
           Neighbourhood sum = 7 - 2 - 2 +1 => 4
 
-        Args:
-            summed_cube (iris.cube.Cube):
-                cube on which to calculate the neighbourhood total.
-            ymax_xmax_disp (int):
-                Displacement from the point at the centre
-                of the neighbourhood.
-                Equivalent to point B in the docstring example.
-            ymax_xmin_disp (int):
-                Displacement from the point at the centre
-                of the neighbourhood.
-                Equivalent to point A in the docstring example.
-            ymin_xmax_disp (int):
-                Displacement from the point at the centre
-                of the neighbourhood.
-                Equivalent to point D in the docstring example.
-            ymin_xmin_disp (int):
-                Displacement from the point at the centre
-                of the neighbourhood.
-                Equivalent to point C in the docstring example.
-            n_rows (int):
-                Number of rows
-            n_columns (int):
-                Number of columns
-
-        Returns:
-            neighbourhood_total (np.array):
-                Array containing the calculated neighbourhood total.
-        """
-        flattened = summed_cube.data.flatten()
-        ymax_xmax_array = np.roll(flattened, -ymax_xmax_disp)
-        ymin_xmax_array = np.roll(flattened, -ymin_xmax_disp)
-        ymin_xmin_array = np.roll(flattened, -ymin_xmin_disp)
-        ymax_xmin_array = np.roll(flattened, -ymax_xmin_disp)
-        neighbourhood_total = (ymax_xmax_array - ymin_xmax_array +
-                               ymin_xmin_array - ymax_xmin_array)
-        neighbourhood_total.resize(n_rows, n_columns)
-        return neighbourhood_total
-
-    def mean_over_neighbourhood(self, summed_cube, summed_mask,
-                                cells_x, cells_y, iscomplex=False):
-        """
-        Method to calculate the average value in a square neighbourhood using
-        the 4-point algorithm to find the total sum over the neighbourhood.
-
-        The output from the cumulate_array method can be used to
-        calculate the sum over a neighbourhood of size
-        (2*cells_x+1)*(2*cells_y+1). This sum is then divided by the area of
-        the neighbourhood to calculate the mean value in the neighbourhood.
-
-        For all points, a fast vectorised approach is taken:
-
-        1. The displacements between the four points used to calculate the
-           neighbourhood total sum and the central grid point are calculated.
-        2. Within the function calculate_neighbourhood...
-           Four copies of the cumulate array output are flattened and rolled
-           by these displacements to align the four terms used in the
-           neighbourhood total sum calculation.
-        3. The neighbourhood total at all points can then be calculated
-           simultaneously in a single vector sum.
-
-        Neighbourhood mean = Neighbourhood sum / Neighbourhood area
-
-        Neighbourhood area = (2 * nb_width +1)^2 if there are no missing
-        points, nb_width is the neighbourhood width, which is equal to 1 for a
-        3x3 neighbourhood.
+        Rather than flattening and rolling copies of the table to align the
+        four points, each of the four terms is taken as a slice of the table
+        offset from the central points, so the only full-size array created
+        is the neighbourhood total.
 
         Args:
-            summed_cube (iris.cube.Cube):
-                Summed Cube to which neighbourhood processing is being
-                applied. Must be passed through cumulate_array method first.
-                The cube should contain only x and y dimensions,
-                so will generally be a slice of a cube.
-            summed_mask (iris.cube.Cube):
-                Summed Mask used to calculate neighbourhood size.
-                Must be passed through cumulate_array method first.
-                The cube should contain only x and y dimensions,
-                so will generally be a slice of a cube.
+            summed_area_table (np.ndarray):
+                Array created by create_summed_area_table, with the y and x
+                dimensions last.
             cells_x, cells_y (int):
                 The radius of the neighbourhood in grid points, in the x and y
-                directions (excluding the central grid point).
-
-        Kwargs:
-            iscomplex (bool):
-                Flag indicating whether cube.data contains complex values.
+                directions (excluding the central grid point). These must not
+                be larger than the values used to create the table.
+            n_rows (int):
+                Number of rows in the original (unpadded) array.
+            n_columns (int):
+                Number of columns in the original (unpadded) array.
 
         Returns:
-            cube (iris.cube.Cube):
-                Cube to which square neighbourhood has been applied.
-        """
-        cube = summed_cube
-        check_for_x_and_y_axes(summed_cube)
-
-        # Calculate displacement factors to find 4-points after flattening the
-        # array.
-        n_rows = len(cube.coord(axis="y").points)
-        n_columns = len(cube.coord(axis="x").points)
-
-        # Displacements from the point at the centre of the neighbourhood.
-        # Equivalent to point B in the docstring example.
-        ymax_xmax_disp = (cells_y*n_columns) + cells_x
-        # Equivalent to point A in the docstring example.
-        ymax_xmin_disp = (cells_y*n_columns) - cells_x - 1
-
-        # Equivalent to point D in the docstring example.
-        ymin_xmax_disp = (-1*(cells_y+1)*n_columns) + cells_x
-        # Equivalent to point C in the docstring example.
-        ymin_xmin_disp = (-1*(cells_y+1)*n_columns) - cells_x - 1
-
-        # Flatten the cube data and create 4 copies of the flattened
-        # array which are rolled to align the 4-points which are needed
-        # for the calculation.
-        neighbourhood_total = self.calculate_neighbourhood(
-            summed_cube, ymax_xmax_disp, ymin_xmax_disp,
-            ymin_xmin_disp, ymax_xmin_disp,
-            n_rows, n_columns)
-
-        if self.sum_or_fraction == "fraction":
-            # Initialise and calculate the neighbourhood area.
-            neighbourhood_area = self.calculate_neighbourhood(
-                summed_mask, ymax_xmax_disp, ymin_xmax_disp,
-                ymin_xmin_disp, ymax_xmin_disp,
-                n_rows, n_columns)
+            neighbourhood_total (np.ndarray):
+                Array containing the calculated neighbourhood total, with the
+                same shape as the original (unpadded) array.
 
-            with np.errstate(invalid='ignore', divide='ignore'):
-                if iscomplex:
-                    cube.data = (neighbourhood_total.astype(complex) /
-                                 neighbourhood_area.astype(complex))
-                else:
-                    cube.data = (neighbourhood_total.astype(float) /
-                                 neighbourhood_area.astype(float))
-                cube.data[~np.isfinite(cube.data)] = np.nan
-        elif self.sum_or_fraction == "sum":
-            if iscomplex:
-                cube.data = neighbourhood_total.astype(complex)
-            else:
-                cube.data = neighbourhood_total.astype(float)
+        Raises:
+            ValueError: If the neighbourhood is larger than the padding
+                within the summed area table.
+        """
+        # Find the padding that was applied when creating the table.
+        pad_y = (summed_area_table.shape[-2] - n_rows - 1) // 2
+        pad_x = (summed_area_table.shape[-1] - n_columns - 1) // 2
+        if cells_x > pad_x or cells_y > pad_y:
+            msg = ("The neighbourhood radius of {} x {} grid cells exceeds "
+                   "the padding of {} x {} grid cells within the summed "
+                   "area table.".format(cells_x, cells_y, pad_x, pad_y))
+            raise ValueError(msg)
 
-        return cube
+        # Rows and columns of the four points, relative to the central point.
+        ymax = slice(pad_y + cells_y + 1, pad_y + cells_y + 1 + n_rows)
+        ymin = slice(pad_y - cells_y, pad_y - cells_y + n_rows)
+        xmax = slice(pad_x + cells_x + 1, pad_x + cells_x + 1 + n_columns)
+        xmin = slice(pad_x - cells_x, pad_x - cells_x + n_columns)
+
+        neighbourhood_total = np.subtract(
+            summed_area_table[..., ymax, xmax],
+            summed_area_table[..., ymax, xmin])
+        neighbourhood_total -= summed_area_table[..., ymin, xmax]
+        neighbourhood_total += summed_area_table[..., ymin, xmin]
+        return neighbourhood_total
 
     @staticmethod
     def set_up_cubes_to_be_neighbourhooded(cube, mask_cube=None):
@@ -356,102 +274,341 @@ class SquareNeighbourhood(object):
             cube.data.dtype)
         return cube, mask, nan_array
 
-    def _pad_and_calculate_neighbourhood(
-            self, cube, mask, grid_cells_x, grid_cells_y):
+    @staticmethod
+    def set_up_arrays_to_be_neighbourhooded(data, mask_data=None):
         """
-        Apply neighbourhood processing consisting of the following steps:
+        Set up an array ready for neighbourhooding the data. This is
+        equivalent to set_up_cubes_to_be_neighbourhooded, but the array may
+        have any number of leading dimensions, which are all set up at once.
+
+        Args:
+            data (np.ndarray or np.ma.MaskedArray):
+                Array that will be checked for whether the data is masked
+                or nan. The y and x dimensions must be the last two
+                dimensions of the array.
 
-        1. Pad a halo around the input cube to allow vectorised
-           neighbourhooding at edgepoints.
-        2. Cumulate the array along the x and y axes.
-        3. Apply neighbourhood processing to the cumulated array.
+        Keyword Args:
+            mask_data (np.ndarray):
+                Array to be used as a mask, which must be broadcastable to
+                the shape of the data.
+
+        Returns:
+            (tuple) : tuple containing:
+                **data** (np.ndarray):
+                    Array with masked or NaN values set to 0.0
+                **mask** (np.ndarray):
+                    Array with masked or NaN values set to 0.0
+                **nan_array** (np.ndarray):
+                    Boolean array to be used to set the values within
+                    the output to be NaN.
+        """
+        if mask_data is None:
+            mask = np.ones(data.shape)
+        else:
+            mask = np.array(np.broadcast_to(mask_data, data.shape),
+                            dtype=np.float64)
+
+        # If there is a mask, set the mask to zero where the data is masked.
+        if isinstance(data, np.ma.MaskedArray):
+            mask[np.ma.getmaskarray(data)] = 0.0
+            data = data.data
+
+        # Set NaN values to 0 in both the data and the mask.
+        nan_array = np.isnan(data)
+        mask[nan_array] = 0.0
+        data = np.where(nan_array, 0.0, data * mask).astype(data.dtype)
+        return data, mask, nan_array
+
+    def _set_up_summed_area_tables(self, data, mask_data,
+                                   max_cells_x, max_cells_y):
+        """
+        Set up the data and mask and create the summed area tables required
+        to calculate neighbourhoods of up to the maximum size.
 
         Args:
-            cube (Iris.cube.Cube):
-                Cube with masked or NaN values set to 0.0
-            mask (Iris.cube.Cube):
-                Cube with masked or NaN values set to 0.0
-            grid_cells_x (Float):
-                The number of grid cells along the x axis used to create a
-                square neighbourhood.
-            grid_cells_y (Float):
-                The number of grid cells along the y axis used to create a
-                square neighbourhood.
+            data (np.ndarray or np.ma.MaskedArray):
+                Array to which the square neighbourhood will be applied,
+                with the y and x dimensions last.
+            mask_data (np.ndarray or None):
+                Array to be used as a mask, which must be broadcastable to
+                the shape of the data.
+            max_cells_x, max_cells_y (int):
+                The largest radius of the neighbourhoods to be calculated in
+                grid points, in the x and y directions.
 
         Returns:
-            neighbourhood_averaged_cube (Iris.cube):
-                Cube containing the smoothed field after the square
-                neighbourhood method has been applied with halo added.
+            arrays (tuple):
+                The data, mask and nan_array returned by
+                set_up_arrays_to_be_neighbourhooded, followed by the summed
+                area tables of the data and of the mask. The summed area
+                table of the mask is None if sum_or_fraction is "sum".
         """
-        # Pad the iris cube with the neighbourhood radius plus 1 grid point.
-        # Since the neighbourhood size is 2*radius + 1, this means that all
-        # grid points within the original domain will have data available for
-        # the full neighbourhood size.  The halo is removed later.
-        padded_cube = pad_cube_with_halo(cube, grid_cells_x+1, grid_cells_y+1,
-                                         halo_mean_data=False)
-        padded_mask = pad_cube_with_halo(mask, grid_cells_x+1, grid_cells_y+1,
-                                         halo_mean_data=False)
-
-        # Check whether cube contains complex values
-        is_complex = np.any(np.iscomplex(cube.data))
-
-        summed_up_cube = self.cumulate_array(padded_cube, is_complex)
-        summed_up_mask = self.cumulate_array(padded_mask)
-        neighbourhood_averaged_cube = (
-            self.mean_over_neighbourhood(summed_up_cube, summed_up_mask,
-                                         grid_cells_x, grid_cells_y,
-                                         is_complex))
-        if neighbourhood_averaged_cube.dtype in [np.float64, np.longdouble]:
-            neighbourhood_averaged_cube.data = (
-                neighbourhood_averaged_cube.data.astype(np.float32))
-        return neighbourhood_averaged_cube
-
-    def _remove_padding_and_mask(
-            self, neighbourhood_averaged_cube,
-            original_cube, mask,
-            grid_cells_x, grid_cells_y):
+        # If the data is masked, the mask will be processed as well as the
+        # original_data * mask array.
+        data, mask, nan_array = self.set_up_arrays_to_be_neighbourhooded(
+            data, mask_data=mask_data)
+
+        data_table = self.create_summed_area_table(
+            data, max_cells_x, max_cells_y)
+        mask_table = None
+        if self.sum_or_fraction == "fraction":
+            mask_table = self.create_summed_area_table(
+                mask, max_cells_x, max_cells_y)
+        return data, mask, nan_array, data_table, mask_table
+
+    def _calculate_neighbourhood(self, arrays, cells_x, cells_y,
+                                 index=Ellipsis):
         """
-        Remove the halo from the padded array and apply the mask, if required.
-        If fraction option set, clip the data so values lie within
-        the range of the original cube.
+        Calculate the neighbourhood processed data from the summed area
+        tables, applying the mask and clipping as required.
 
         Args:
-            neighbourhood_averaged_cube (Iris.cube.Cube):
-                Cube containing the smoothed field after the square
-                neighbourhood method has been applied.
-            original_cube (Iris.cube.Cube or None):
-                The original cube slice.
-            mask (Iris.cube.Cube):
-                The mask cube created by set_up_cubes_to_be_neighbourhooded.
-            grid_cells_x (Float):
-                The number of grid cells along the x axis used to create a
-                square neighbourhood.
-            grid_cells_y (Float):
-                The number of grid cells along the y axis used to create a
-                square neighbourhood.
+            arrays (tuple):
+                The arrays returned by _set_up_summed_area_tables.
+            cells_x, cells_y (int):
+                The radius of the neighbourhood in grid points, in the x and y
+                directions (excluding the central grid point).
+
+        Keyword Args:
+            index (tuple or Ellipsis):
+                Index of the leading dimensions of the arrays to process.
+                By default, all slices are processed.
 
         Returns:
-            neighbourhood_averaged_cube (Iris.cube.Cube):
-                Cube containing the smoothed field after the square
-                neighbourhood method has been applied and halo removed.
+            result (np.ndarray or np.ma.MaskedArray):
+                Array containing the smoothed field after the square
+                neighbourhood method has been applied.
         """
+        data, mask, nan_array, data_table, mask_table = (
+            array if array is None else array[index] for array in arrays)
+        n_rows, n_columns = data.shape[-2:]
+        is_complex = np.any(np.iscomplex(data))
+
+        neighbourhood_total = self.sum_over_neighbourhood(
+            data_table, cells_x, cells_y, n_rows, n_columns)
+
+        if self.sum_or_fraction == "fraction":
+            neighbourhood_area = self.sum_over_neighbourhood(
+                mask_table, cells_x, cells_y, n_rows, n_columns)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                neighbourhood_total /= neighbourhood_area
+            neighbourhood_total[~np.isfinite(neighbourhood_total)] = np.nan
+        if is_complex:
+            result = neighbourhood_total
+        else:
+            result = neighbourhood_total.real.astype(np.float32)
+
         # Correct neighbourhood averages for masked data, which may have been
         # calculated using larger neighbourhood areas than are present in
         # reality.
-        neighbourhood_averaged_cube = remove_halo_from_cube(
-            neighbourhood_averaged_cube, grid_cells_x+1, grid_cells_y+1)
-        if self.re_mask and mask.data.min() < 1.0:
-            neighbourhood_averaged_cube.data = np.ma.masked_array(
-                neighbourhood_averaged_cube.data,
-                mask=np.logical_not(mask.data.squeeze()))
-        # Add clipping
+        if self.re_mask and mask.min() < 1.0:
+            result = np.ma.masked_array(result, mask=np.logical_not(mask))
+        # Clip the data so values lie within the range of each original
+        # slice.
         if self.sum_or_fraction == "fraction":
-            minimum_value = np.nanmin(original_cube.data)
-            maximum_value = np.nanmax(original_cube.data)
-            neighbourhood_averaged_cube = (
-                clip_cube_data(neighbourhood_averaged_cube,
-                               minimum_value, maximum_value))
-        return neighbourhood_averaged_cube
+            minimum_value = np.nanmin(data, axis=(-2, -1), keepdims=True)
+            maximum_value = np.nanmax(data, axis=(-2, -1), keepdims=True)
+            result = np.clip(result, minimum_value, maximum_value)
+        result[nan_array] = np.nan
+        return result
+
+    @staticmethod
+    def _find_grid_cells(cube, radii):
+        """
+        Convert each radius in metres into the number of grid cells in the x
+        and y directions.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube containing the grid on which the neighbourhoods will be
+                calculated.
+            radii (list of float):
+                Radii in metres.
+
+        Returns:
+            grid_cells (list of tuple):
+                The number of grid cells in the x and y directions for each
+                radius.
+        """
+        return [convert_distance_into_number_of_grid_cells(
+            cube, radius, max_distance_in_grid_cells=MAX_RADIUS_IN_GRID_CELLS)
+                for radius in radii]
+
+    def _neighbourhood_arrays(self, data, mask_data, grid_cells):
+        """
+        Apply square neighbourhoods of several sizes to an array.
+
+        If there is no cache, the data is set up and the summed area tables
+        are created once, padded for the largest neighbourhood, and the
+        neighbourhood for each size is found from the same tables. Otherwise
+        only the 2D slices that are not already cached are processed.
+
+        Args:
+            data (np.ndarray or np.ma.MaskedArray):
+                Array to which the square neighbourhoods will be applied,
+                with the y and x dimensions last.
+            mask_data (np.ndarray or None):
+                Array to be used as a mask, which must be broadcastable to
+                the shape of the data.
+            grid_cells (list of tuple):
+                The number of grid cells in the x and y directions for each
+                neighbourhood.
+
+        Returns:
+            results (list of np.ndarray or np.ma.MaskedArray):
+                Arrays containing the smoothed field for each neighbourhood
+                in the order provided.
+        """
+        if self.cache is None:
+            arrays = self._set_up_summed_area_tables(
+                data, mask_data, max(cells[0] for cells in grid_cells),
+                max(cells[1] for cells in grid_cells))
+            return [self._calculate_neighbourhood(arrays, cells_x, cells_y)
+                    for cells_x, cells_y in grid_cells]
+
+        results = []
+        for cells_x, cells_y in grid_cells:
+            config = ("square", self.sum_or_fraction, self.re_mask,
+                      cells_x, cells_y)
+
+            def function(slices, mask_slices, cells_x=cells_x,
+                         cells_y=cells_y):
+                """Neighbourhood process the slices that are not cached."""
+                arrays = self._set_up_summed_area_tables(
+                    slices, mask_slices, cells_x, cells_y)
+                return self._calculate_neighbourhood(
+                    arrays, cells_x, cells_y)
+
+            results.append(self.cache.process_slices(
+                data, mask_data, config, function))
+        return results
+
+    @staticmethod
+    def _find_spatial_dims(cube):
+        """Return the y and x dimensions of a cube."""
+        return [cube.coord_dims(cube.coord(axis='y'))[0],
+                cube.coord_dims(cube.coord(axis='x'))[0]]
+
+    def run_multiple_radii(self, cube, radii, mask_cube=None):
+        """
+        Apply square neighbourhoods of several radii to a cube.
+
+        If there is no cache, the data is set up and the summed area tables
+        are created once, padded for the largest neighbourhood. The
+        neighbourhood for each radius is then found from the same tables.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube containing the array to which the square neighbourhoods
+                will be applied.
+            radii (list of float):
+                Radii in metres for use in specifying the number of grid
+                cells used to create each square neighbourhood.
+
+        Keyword Args:
+            mask_cube (Iris.cube.Cube):
+                Cube containing the array to be used as a mask.
+
+        Returns:
+            neighbourhood_averaged_cubes (Iris.cube.CubeList):
+                Cubes containing the smoothed field after the square
+                neighbourhood method has been applied, one for each radius
+                in the order provided.
+        """
+        grid_cells = self._find_grid_cells(cube, radii)
+        # Move the spatial dimensions to the end, so that all slices can be
+        # processed at once.
+        spatial_dims = self._find_spatial_dims(cube)
+        data = np.moveaxis(cube.data, spatial_dims, [-2, -1])
+        mask_data = None if mask_cube is None else mask_cube.data
+
+        neighbourhood_averaged_cubes = iris.cube.CubeList()
+        for result in self._neighbourhood_arrays(
+                data, mask_data, grid_cells):
+            neighbourhood_averaged_cubes.append(cube.copy(
+                data=np.moveaxis(result, [-2, -1], spatial_dims)))
+        return neighbourhood_averaged_cubes
+
+    def run_radii_by_slice(self, cube, radii, coord_name, mask_cube=None):
+        """
+        Apply a square neighbourhood to a cube, with a different radius for
+        each slice along the dimension of the named coordinate. This allows
+        radii that vary with lead time to be applied to all times at once.
+
+        If there is no cache, the data is set up and the summed area tables
+        are created once for all slices, padded for the largest
+        neighbourhood.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube containing the array to which the square neighbourhoods
+                will be applied.
+            radii (list of float):
+                Radii in metres for use in specifying the number of grid
+                cells used to create a square neighbourhood. There must be
+                one radius for each point of the named coordinate.
+            coord_name (str):
+                Name of the coordinate along which the radius varies. If
+                this is a scalar coordinate, a single radius must be
+                provided.
+
+        Keyword Args:
+            mask_cube (Iris.cube.Cube):
+                Cube containing the array to be used as a mask.
+
+        Returns:
+            neighbourhood_averaged_cube (Iris.cube.Cube):
+                Cube containing the smoothed field after the square
+                neighbourhood method has been applied.
+
+        Raises:
+            ValueError: If the number of radii does not match the number of
+                points of the named coordinate.
+        """
+        coord = cube.coord(coord_name)
+        if len(radii) != len(coord.points):
+            msg = ("The number of radii ({}) does not match the number of "
+                   "points of the {} coordinate ({}).".format(
+                       len(radii), coord_name, len(coord.points)))
+            raise ValueError(msg)
+        coord_dims = cube.coord_dims(coord)
+        if not coord_dims:
+            return self.run(cube, radii[0], mask_cube=mask_cube)
+
+        grid_cells = self._find_grid_cells(cube, radii)
+        spatial_dims = self._find_spatial_dims(cube)
+        data = np.moveaxis(cube.data, spatial_dims, [-2, -1])
+        mask_data = None
+        if mask_cube is not None:
+            mask_data = np.broadcast_to(mask_cube.data, data.shape)
+        if self.cache is None:
+            arrays = self._set_up_summed_area_tables(
+                data, mask_data, max(cells[0] for cells in grid_cells),
+                max(cells[1] for cells in grid_cells))
+
+        # Find the position of the dimension once the y and x dimensions
+        # have been moved to the end.
+        slice_dim = [dim for dim in range(cube.ndim)
+                     if dim not in spatial_dims].index(coord_dims[0])
+        result = None
+        for slice_index, (grid_cells_x, grid_cells_y) in enumerate(
+                grid_cells):
+            index = (slice(None),) * slice_dim + (slice_index,)
+            if self.cache is None:
+                slice_result = self._calculate_neighbourhood(
+                    arrays, grid_cells_x, grid_cells_y, index=index)
+            else:
+                slice_result, = self._neighbourhood_arrays(
+                    data[index],
+                    None if mask_data is None else mask_data[index],
+                    [(grid_cells_x, grid_cells_y)])
+            if result is None:
+                result = np.ma.zeros(data.shape, dtype=slice_result.dtype)
+                result.mask = np.ma.getmaskarray(result)
+            result[index] = slice_result
+        if not result.mask.any():
+            result = result.data
+        return cube.copy(data=np.moveaxis(result, [-2, -1], spatial_dims))
 
     def run(self, cube, radius, mask_cube=None):
         """
@@ -460,11 +617,14 @@ class SquareNeighbourhood(object):
 
         The steps undertaken are:
 
-        1. Set up cubes by determining, if the arrays are masked.
-        2. Pad the input array with a halo and then calculate the neighbourhood
-           of the haloed array.
-        3. Remove the halo from the neighbourhooded array and deal with a mask,
-           if required.
+        1. Set up the data by determining, if the arrays are masked.
+        2. Create a summed area table of the data, padded so that the
+           neighbourhoods at the edges of the domain can be calculated.
+        3. Calculate the neighbourhood totals from the summed area table and
+           deal with a mask, if required.
+
+        All slices over the leading dimensions of the cube (e.g. realization
+        and time) are processed at once.
 
         Args:
             cube (Iris.cube.Cube):
@@ -483,37 +643,4 @@ class SquareNeighbourhood(object):
                 Cube containing the smoothed field after the square
                 neighbourhood method has been applied.
         """
-        # If the data is masked, the mask will be processed as well as the
-        # original_data * mask array.
-        original_attributes = cube.attributes
-        original_methods = cube.cell_methods
-        grid_cells_x, grid_cells_y = (
-            convert_distance_into_number_of_grid_cells(
-                cube, radius,
-                max_distance_in_grid_cells=MAX_RADIUS_IN_GRID_CELLS))
-        result_slices = iris.cube.CubeList()
-        for cube_slice in cube.slices([cube.coord(axis='y'),
-                                       cube.coord(axis='x')]):
-            (cube_slice, mask, nan_array) = (
-                self.set_up_cubes_to_be_neighbourhooded(cube_slice,
-                                                        mask_cube))
-            neighbourhood_averaged_cube = (
-                self._pad_and_calculate_neighbourhood(
-                    cube_slice, mask,
-                    grid_cells_x, grid_cells_y))
-            neighbourhood_averaged_cube = (
-                self._remove_padding_and_mask(
-                    neighbourhood_averaged_cube,
-                    cube_slice, mask,
-                    grid_cells_x, grid_cells_y))
-            neighbourhood_averaged_cube.data[nan_array.astype(bool)] = np.nan
-            result_slices.append(neighbourhood_averaged_cube)
-
-        neighbourhood_averaged_cube = result_slices.merge_cube()
-
-        neighbourhood_averaged_cube.cell_methods = original_methods
-        neighbourhood_averaged_cube.attributes = original_attributes
-
-        neighbourhood_averaged_cube = check_cube_coordinates(
-            cube, neighbourhood_averaged_cube)
-        return neighbourhood_averaged_cube
+        return self.run_multiple_radii(cube, [radius], mask_cube=mask_cube)[0]
@@ -145,13 +145,40 @@ class ApplyNeighbourhoodProcessingWithAMask(object):
             self.lead_times, self.weighted_mode,
             self.sum_or_fraction, self.re_mask)
 
+    def _set_up_band_cube(self, x_y_slice, mask_cube):
+        """
+        Set up a cube with the metadata of a 2D slice of the input cube and
+        an additional leading dimension for the chosen coordinate within the
+        mask_cube, so that every mask can be applied to the slice at once.
+
+        Args:
+            x_y_slice (Iris.cube.Cube):
+                2D slice of the cube to be neighbourhood processed.
+            mask_cube (Iris.cube.Cube):
+                Cube containing the masks, with the chosen coordinate as the
+                leading dimension.
+
+        Returns:
+            band_cube (Iris.cube.Cube):
+                Cube containing a copy of the data of the 2D slice for each
+                point along the chosen coordinate.
+        """
+        band_cubes = iris.cube.CubeList([])
+        for cube_slice in mask_cube.slices_over(self.coord_for_masking):
+            band_cube = x_y_slice.copy()
+            band_cube.add_aux_coord(
+                cube_slice.coord(self.coord_for_masking).copy())
+            band_cubes.append(
+                iris.util.new_axis(band_cube, self.coord_for_masking))
+        return band_cubes.concatenate_cube()
+
     def process(self, cube, mask_cube):
         """
-        1. Iterate over the chosen coordinate within the mask_cube and apply
-           the mask at each iteration to the cube that is to be neighbourhood
-           processed.
-        2. Concatenate the cubes from each iteration together to create a
-           single cube.
+        1. Iterate over the 2D slices of the cube that is to be neighbourhood
+           processed. For each slice, apply every mask along the chosen
+           coordinate within the mask_cube at once, so that the neighbourhood
+           sums for all the masks are calculated in one stacked operation.
+        2. Merge the cubes from each slice together to create a single cube.
 
         Args:
             cube (Iris.cube.Cube):
@@ -171,42 +198,47 @@ class ApplyNeighbourhoodProcessingWithAMask(object):
         """
         yname = cube.coord(axis='y').name()
         xname = cube.coord(axis='x').name()
+        # Order the masks to match the slices with the additional leading
+        # dimension of the chosen coordinate.
+        mask_cube = next(mask_cube.slices(
+            [self.coord_for_masking, mask_cube.coord(axis='y').name(),
+             mask_cube.coord(axis='x').name()]))
+        n_bands, = mask_cube.coord(self.coord_for_masking).shape
+        neighbourhood_plugin = NeighbourhoodProcessing(
+            self.neighbourhood_method, self.radii,
+            lead_times=self.lead_times, weighted_mode=self.weighted_mode,
+            sum_or_fraction=self.sum_or_fraction, re_mask=self.re_mask)
+
         result_slices = iris.cube.CubeList([])
+        band_cube = None
         # Take 2D slices of the input cube for memory issues.
         prev_x_y_slice = None
         for x_y_slice in cube.slices([yname, xname]):
             if (prev_x_y_slice is not None and
                     np.array_equal(prev_x_y_slice.data, x_y_slice.data)):
                 # Use same result as last time!
-                prev_result = result_slices[-1].copy()
-                for coord in x_y_slice.coords(dim_coords=False):
-                    prev_result.coord(coord).points = coord.points.copy()
-                result_slices.append(prev_result)
-                continue
+                output_cube = result_slices[-1].copy()
+            else:
+                if band_cube is None:
+                    band_cube = self._set_up_band_cube(x_y_slice, mask_cube)
+                band_cube = band_cube.copy(
+                    data=x_y_slice.data[np.newaxis].repeat(n_bands, axis=0))
+                for coord in x_y_slice.coords():
+                    if not x_y_slice.coord_dims(coord):
+                        band_cube.replace_coord(coord.copy())
+                output_cube = neighbourhood_plugin.process(
+                    band_cube, mask_cube=mask_cube)
+                exception_coordinates = (
+                    find_dimension_coordinate_mismatch(
+                        x_y_slice, output_cube, two_way_mismatch=False))
+                output_cube = check_cube_coordinates(
+                    x_y_slice, output_cube,
+                    exception_coordinates=exception_coordinates)
+            for coord in x_y_slice.coords():
+                if not x_y_slice.coord_dims(coord):
+                    output_cube.replace_coord(coord.copy())
             prev_x_y_slice = x_y_slice
-
-            cube_slices = iris.cube.CubeList([])
-            # Apply each mask in in mask_cube to the 2D input slice.
-            for cube_slice in mask_cube.slices_over(self.coord_for_masking):
-                output_cube = NeighbourhoodProcessing(
-                    self.neighbourhood_method, self.radii,
-                    lead_times=self.lead_times,
-                    weighted_mode=self.weighted_mode,
-                    sum_or_fraction=self.sum_or_fraction, re_mask=self.re_mask
-                    ).process(x_y_slice, mask_cube=cube_slice)
-                coord_object = cube_slice.coord(self.coord_for_masking).copy()
-                output_cube.add_aux_coord(coord_object)
-                output_cube = iris.util.new_axis(
-                    output_cube, self.coord_for_masking)
-                cube_slices.append(output_cube)
-            concatenated_cube = cube_slices.concatenate_cube()
-            exception_coordinates = (
-                find_dimension_coordinate_mismatch(
-                    x_y_slice, concatenated_cube, two_way_mismatch=False))
-            concatenated_cube = check_cube_coordinates(
-                x_y_slice, concatenated_cube,
-                exception_coordinates=exception_coordinates)
-            result_slices.append(concatenated_cube)
+            result_slices.append(output_cube)
         result = result_slices.merge_cube()
         exception_coordinates = (
             find_dimension_coordinate_mismatch(
@@ -385,35 +417,37 @@ class CollapseMaskedNeighbourhoodCoordinate(object):
                 collapsing the chosen coordinate.
 
         """
-        # Mask out any NaNs in the neighbourhood data so that Iris ignores
-        # them when calculating the weighted mean.
-        cube.data = ma.masked_invalid(cube.data)
         yname = cube.coord(axis='y').name()
         xname = cube.coord(axis='x').name()
 
-        if self.weights.shape != cube.shape:
-            # The input cube may have leading dimensions.
-            first_slice = next(
-                cube.slices([self.coord_masked, yname, xname],
-                            ordered=False))
-            self.renormalize_weights(first_slice)
-        else:
-            self.renormalize_weights(cube)
-        weights = self.weights.data
-
-        # Loop over any extra dimensions
-        cubelist = iris.cube.CubeList([])
-        for slice_3d in cube.slices([self.coord_masked, yname, xname]):
-            collapsed_slice = slice_3d.collapsed(
-                self.coord_masked, iris.analysis.MEAN, weights=weights)
-            cubelist.append(collapsed_slice)
-        result = cubelist.merge_cube()
-        # Promote any scalar coordinates with one point back to dimension
-        # coordinates if they were dimensions in the input cube.
+        # Move the coordinate to be collapsed, followed by the y and x
+        # dimensions, to the end, so that all slices over any leading
+        # dimensions are collapsed at once.
+        collapse_dims = [cube.coord_dims(name)[0]
+                         for name in [self.coord_masked, yname, xname]]
+        data = np.moveaxis(ma.masked_invalid(cube.data), collapse_dims,
+                           [-3, -2, -1])
+        weights = next(self.weights.slices([self.coord_masked, yname, xname]))
+        weights = ma.masked_array(
+            np.broadcast_to(ma.getdata(weights.data), data.shape),
+            mask=np.broadcast_to(ma.getmaskarray(weights.data), data.shape),
+            copy=True)
+
+        # Renormalize the weights for each slice, setting the weights to zero
+        # where the neighbourhood data is NaN. If the weights are masked we
+        # want to retain the mask.
+        invalid = ma.getmaskarray(data) & ~weights.mask
+        weights.data[invalid] = 0.0
+        weights = WeightsUtilities.normalise_weights(weights, axis=-3)
+        weights *= ma.filled(data, 0.0)
+        result_data = ma.sum(weights, axis=-3)
+
         # Take a slice over the coordinate we are collapsing as we do not
         # expect this in the output cube.
         first_slice = next(cube.slices_over([self.coord_masked]))
-        result = check_cube_coordinates(first_slice, result)
+        result = first_slice.copy(data=np.moveaxis(
+            result_data, [-2, -1], [first_slice.coord_dims(yname)[0],
+                                    first_slice.coord_dims(xname)[0]]))
         # Remove references to self.coord_masked in the result cube.
         self.remove_collapsed_coord_refs(result)
         return result
@@ -32,6 +32,8 @@
 
 
 import unittest
+from unittest.mock import patch
+
 import numpy as np
 
 from iris.tests import IrisTest
@@ -300,6 +302,46 @@ class Test_blend_percentiles(IrisTest):
         expected_result = np.array([5.0, 6.0, 7.0])
         self.assertArrayAlmostEqual(result, expected_result)
 
+    def test_many_points(self):
+        """Test blending many points at once."""
+        percentiles = np.array([0, 20, 40, 60, 80, 100], dtype=np.float32)
+        perc_values = np.sort(
+            np.reshape(PERCENTILE_DATA, (3, 4, 6)), axis=-1)
+        perc_values = np.moveaxis(perc_values, -1, 1)
+        weights = np.moveaxis(
+            generate_matching_weights_array(
+                np.array([0.6, 0.3, 0.1]), (4, 6, 3)), (0, 1, 2), (2, 1, 0))
+        result = PercentileBlendingAggregator.blend_percentiles(
+            perc_values, percentiles, weights)
+        expected_result = np.array(
+            [[13.732982, 12.560181, 12.984587, 12.503394],
+             [14.265025, 13.611035, 15.169547, 15.023046],
+             [14.936255, 14.325608, 16.261, 15.667014],
+             [15.285543, 15.360419, 16.990341, 16.291428],
+             [16.18304, 16.453224, 17.309303, 16.469578],
+             [17.458706, 16.97861, 17.408989, 17.481281]])
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(result, expected_result)
+
+    def test_chunks(self):
+        """Test that blending the points in chunks smaller than the number
+           of points gives the same result."""
+        percentiles = np.array([0, 20, 40, 60, 80, 100], dtype=np.float32)
+        perc_values = np.sort(
+            np.reshape(PERCENTILE_DATA, (3, 4, 6)), axis=-1)
+        perc_values = np.moveaxis(perc_values, -1, 1)
+        weights = np.array([0.6, 0.3, 0.1])
+        expected_result = PercentileBlendingAggregator.blend_percentiles(
+            perc_values, percentiles, weights)
+        # Each chunk contains 18 percentile values for each point, so this
+        # blends one point at a time, then three points and one point.
+        for tile_size in [18, 54]:
+            with patch.object(
+                    PercentileBlendingAggregator, "TILE_SIZE", tile_size):
+                result = PercentileBlendingAggregator.blend_percentiles(
+                    perc_values, percentiles, weights)
+            self.assertArrayEqual(result, expected_result)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -81,6 +81,15 @@ class Test__init__(IrisTest):
         with self.assertRaisesRegex(ValueError, msg):
             Plugin(self.current_forecast, self.coefficients_cube)
 
+    def test_mismatching_spatial_coordinates(self):
+        """Test if there is a mismatch in the spatial coordinates of
+        coefficients estimated for each point."""
+        self.coefficients_cube.coord(axis="x").points = (
+            self.coefficients_cube.coord(axis="x").points + 1)
+        msg = "The x coordinate of the current forecast cube"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin(self.current_forecast, self.coefficients_cube)
+
 
 class Test__repr__(IrisTest):
 
@@ -355,6 +364,93 @@ class Test__apply_params(IrisTest):
         self.assertArrayAlmostEqual(forecast_variance.data, data,
                                     decimal=4)
 
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate.",
+                          "invalid escape sequence"],
+        warning_types=[UserWarning, DeprecationWarning])
+    def test_tiles(self):
+        """
+        Test that the calibrated forecasts are the same, if the coefficients
+        are applied in tiles smaller than the forecast.
+        """
+        cube = self.current_temperature_forecast_cube
+        variance_cube = cube.collapsed("realization", iris.analysis.VARIANCE)
+
+        plugin = Plugin(cube, self.coeffs_from_realizations,
+                        predictor_of_mean_flag="realizations")
+        expected_predictor, expected_variance = plugin._apply_params(
+            cube.copy(), variance_cube.copy())
+        plugin.TILE_SIZE = 2
+        forecast_predictor, forecast_variance = plugin._apply_params(
+            cube.copy(), variance_cube.copy())
+        self.assertArrayAlmostEqual(
+            forecast_predictor.data, expected_predictor.data)
+        self.assertArrayAlmostEqual(
+            forecast_variance.data, expected_variance.data)
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate.",
+                          "invalid escape sequence"],
+        warning_types=[UserWarning, DeprecationWarning])
+    def test_coefficients_for_each_point(self):
+        """
+        Test that coefficients estimated for each point are applied to the
+        matching point of the forecast.
+        """
+        cube = self.current_temperature_forecast_cube
+        predictor_cube = cube.collapsed("realization", iris.analysis.MEAN)
+        variance_cube = cube.collapsed("realization", iris.analysis.VARIANCE)
+
+        optimised_coeffs = np.stack(
+            [np.full((3, 3), 0.5), np.arange(9).reshape(3, 3),
+             np.full((3, 3), 2.), np.linspace(0.5, 1.5, 9).reshape(3, 3)])
+        estimator = (
+            EstimateCoefficientsForEnsembleCalibration(
+                "gaussian", "20171110T0000Z", desired_units="Celsius"))
+        coefficients_cube = estimator.create_coefficients_cube(
+            optimised_coeffs, cube)
+        expected_variance = (
+            optimised_coeffs[0]**2 + optimised_coeffs[1]**2 *
+            variance_cube.data)
+        expected_predictor = (
+            optimised_coeffs[2] + optimised_coeffs[3] * predictor_cube.data)
+
+        # Transpose the coefficients, as they are ordered to match the
+        # forecast before being applied.
+        coefficients_cube.transpose([0, 2, 1])
+        plugin = Plugin(cube, coefficients_cube)
+        forecast_predictor, forecast_variance = plugin._apply_params(
+            predictor_cube, variance_cube)
+        self.assertArrayAlmostEqual(
+            forecast_predictor.data, expected_predictor, decimal=4)
+        self.assertArrayAlmostEqual(
+            forecast_variance.data, expected_variance, decimal=4)
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate.",
+                          "invalid escape sequence"],
+        warning_types=[UserWarning, DeprecationWarning])
+    def test_masked_data(self):
+        """
+        Test that points masked in any ensemble realization are masked in
+        the calibrated forecast predictor.
+        """
+        cube = self.current_temperature_forecast_cube
+        mask = np.zeros(cube.shape, dtype=bool)
+        mask[1, 0, 2] = True
+        cube.data = np.ma.masked_array(cube.data, mask=mask)
+        expected_mask = mask.any(axis=0)
+
+        predictor_cube = cube.copy()
+        variance_cube = cube.collapsed("realization", iris.analysis.VARIANCE)
+
+        plugin = Plugin(cube, self.coeffs_from_realizations,
+                        predictor_of_mean_flag="realizations")
+        forecast_predictor, _ = plugin._apply_params(
+            predictor_cube, variance_cube)
+        self.assertArrayEqual(
+            np.ma.getmaskarray(forecast_predictor.data), expected_mask)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -62,6 +62,88 @@ class Test__repr__(IrisTest):
         self.assertEqual(result, msg)
 
 
+class Test__init__(IrisTest):
+
+    """Test the __init__ method."""
+
+    def test_default(self):
+        """Test that Nelder-Mead is the default minimisation method."""
+        plugin = Plugin()
+        self.assertEqual(plugin.minimisation_method, "Nelder-Mead")
+
+    def test_unsupported_method(self):
+        """Test that an unsupported minimisation method raises an error."""
+        msg = "The minimisation method foo is not supported"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin(minimisation_method="foo")
+
+
+class Test__compact_training_data(IrisTest):
+
+    """Test the _compact_training_data method."""
+
+    def setUp(self):
+        """Set up the training data for testing."""
+        self.forecast_predictor = np.array(
+            [[1., 2.], [3., 4.], [5., 6.], [7., 8.]], dtype=np.float32)
+        self.truth = np.array([1.5, 3.5, 5.5, 7.5], dtype=np.float32)
+        self.forecast_var = np.array([0.5, 0.5, 0.5, 0.5], dtype=np.float32)
+
+    def test_all_valid(self):
+        """Test that the training data is returned unchanged, if all of the
+        data is valid."""
+        result = Plugin._compact_training_data(
+            self.forecast_predictor, self.truth, self.forecast_var)
+        self.assertIs(result[0], self.forecast_predictor)
+        self.assertIs(result[1], self.truth)
+        self.assertIs(result[2], self.forecast_var)
+
+    def test_invalid_samples_removed(self):
+        """Test that samples with NaN, infinite or masked values within any
+        of the training data are removed."""
+        self.forecast_predictor[0, 1] = np.nan
+        self.forecast_var[1] = np.inf
+        truth = np.ma.masked_array(
+            self.truth, mask=[False, False, True, False])
+        forecast_predictor, truth, forecast_var = (
+            Plugin._compact_training_data(
+                self.forecast_predictor, truth, self.forecast_var))
+        self.assertArrayEqual(forecast_predictor, [[7., 8.]])
+        self.assertArrayEqual(truth, [7.5])
+        self.assertArrayEqual(forecast_var, [0.5])
+        self.assertNotIsInstance(truth, np.ma.MaskedArray)
+
+
+class Test__valid_samples(IrisTest):
+
+    """Test the _valid_samples method."""
+
+    def test_realizations(self):
+        """Test that a sample is invalid if any realization is invalid."""
+        forecast_predictor = np.array(
+            [[1., 2.], [3., np.nan], [5., 6.]], dtype=np.float32)
+        truth = np.ma.masked_array([1., 3., 5.], mask=[False, False, True])
+        forecast_var = np.array([0.5, 0.5, 0.5], dtype=np.float32)
+        result = Plugin._valid_samples(forecast_predictor, truth, forecast_var)
+        self.assertArrayEqual(result, [True, False, False])
+
+    def test_points(self):
+        """Test that the valid samples are found at each point, if the data
+        has a trailing dimension of points."""
+        forecast_predictor = np.ones((3, 2, 4), dtype=np.float32)
+        forecast_predictor[0, 1, 0] = np.nan
+        truth = np.ones((3, 4), dtype=np.float32)
+        truth[:, 3] = np.nan
+        forecast_var = np.ones((3, 4), dtype=np.float32)
+        forecast_var[2, 1] = np.inf
+        expected = np.ones((3, 4), dtype=bool)
+        expected[0, 0] = False
+        expected[:, 3] = False
+        expected[2, 1] = False
+        result = Plugin._valid_samples(forecast_predictor, truth, forecast_var)
+        self.assertArrayEqual(result, expected)
+
+
 class Test_normal_crps_minimiser(IrisTest):
 
     """
@@ -139,6 +221,34 @@ class Test_normal_crps_minimiser(IrisTest):
         self.assertIsInstance(result, np.float64)
         self.assertAlmostEqual(result, 4886.9467779764836)
 
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_nan_training_data_ignored(self):
+        """
+        Test that training samples containing NaNs are ignored, so that the
+        CRPS matches the CRPS calculated without these samples.
+        """
+        initial_guess = np.array([5, 1, 0, 1], dtype=np.float32)
+        cube = set_up_temperature_cube()
+
+        forecast_predictor_data = cube.collapsed(
+            "realization", iris.analysis.MEAN).data.flatten()
+        forecast_variance_data = cube.collapsed(
+            "realization", iris.analysis.VARIANCE).data.flatten()
+        truth_data = cube.collapsed(
+            "realization", iris.analysis.MAX).data.flatten()
+        sqrt_pi = np.sqrt(np.pi).astype(np.float32)
+
+        plugin = Plugin()
+        expected = plugin.normal_crps_minimiser(
+            initial_guess, forecast_predictor_data, truth_data,
+            forecast_variance_data, sqrt_pi, "mean")
+        result = plugin.normal_crps_minimiser(
+            initial_guess, np.append(forecast_predictor_data, np.nan),
+            np.append(truth_data, 280.), np.append(forecast_variance_data, 1.),
+            sqrt_pi, "mean")
+        self.assertAlmostEqual(result, expected)
+
     @ManageWarnings(
         ignored_messages=["Collapsing a non-contiguous coordinate."])
     def test_basic_mean_predictor_bad_value(self):
@@ -292,6 +402,75 @@ class Test_truncated_normal_crps_minimiser(IrisTest):
         self.assertAlmostEqual(result, plugin.BAD_VALUE)
 
 
+class Test_crps_gradients(IrisTest):
+
+    """
+    Test the gradients of the CRPS for the normal and truncated normal
+    distributions by comparison with finite differences of the CRPS.
+    """
+
+    def setUp(self):
+        """Set up data with a mixture of positive and negative errors."""
+        self.forecast_predictor = np.array(
+            [0.5, 1., 2., 3., 4., 6.], dtype=np.float64)
+        self.truth = np.array(
+            [0.2, 1.8, 1.5, 3.5, 2.5, 7.], dtype=np.float64)
+        self.forecast_variance = np.array(
+            [0.1, 0.5, 0.3, 1., 2., 1.5], dtype=np.float64)
+        self.sqrt_pi = np.sqrt(np.pi)
+        self.initial_guess = np.array([0.8, 0.9, 0.3, 1.1], dtype=np.float64)
+
+    def finite_difference_gradient(self, minimiser):
+        """Calculate the gradient using central differences."""
+        step = 1.e-6
+        gradient = []
+        for index in range(len(self.initial_guess)):
+            offset = np.zeros(len(self.initial_guess))
+            offset[index] = step
+            gradient.append(
+                (minimiser(self.initial_guess + offset,
+                           self.forecast_predictor, self.truth,
+                           self.forecast_variance, self.sqrt_pi, "mean") -
+                 minimiser(self.initial_guess - offset,
+                           self.forecast_predictor, self.truth,
+                           self.forecast_variance, self.sqrt_pi, "mean")) /
+                (2 * step))
+        return np.array(gradient)
+
+    def test_normal(self):
+        """Test the gradient for the normal distribution."""
+        plugin = Plugin()
+        result = plugin.normal_crps_gradient(
+            self.initial_guess, self.forecast_predictor, self.truth,
+            self.forecast_variance, self.sqrt_pi, "mean")
+        expected = self.finite_difference_gradient(
+            plugin.normal_crps_minimiser)
+        self.assertArrayAlmostEqual(result, expected, decimal=5)
+
+    def test_truncated_normal(self):
+        """Test the gradient for the truncated normal distribution."""
+        plugin = Plugin()
+        result = plugin.truncated_normal_crps_gradient(
+            self.initial_guess, self.forecast_predictor, self.truth,
+            self.forecast_variance, self.sqrt_pi, "mean")
+        expected = self.finite_difference_gradient(
+            plugin.truncated_normal_crps_minimiser)
+        self.assertArrayAlmostEqual(result, expected, decimal=5)
+
+    def test_realizations_predictor(self):
+        """Test that there is a gradient for each coefficient, if the
+        ensemble realizations are the predictor."""
+        forecast_predictor = np.column_stack(
+            (self.forecast_predictor, self.forecast_predictor + 1))
+        initial_guess = np.append(self.initial_guess, 0.5)
+        plugin = Plugin()
+        result = plugin.normal_crps_gradient(
+            initial_guess, forecast_predictor, self.truth,
+            self.forecast_variance, self.sqrt_pi, "realizations")
+        self.assertEqual(result.shape, (5,))
+        self.assertTrue(np.isfinite(result).all())
+
+
 class Test_crps_minimiser_wrapper(IrisTest):
 
     """
@@ -328,6 +507,54 @@ class Test_crps_minimiser_wrapper(IrisTest):
         self.assertArrayAlmostEqual(
             result, [-0.059093, -0.099905, 0.008257, 1.009563])
 
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate.",
+                          "Minimisation did not result in convergence"])
+    def test_masked_and_nan_points_ignored(self):
+        """
+        Test that masked and NaN points within the training data are
+        ignored, so that the coefficients match those estimated from the
+        valid points only.
+        """
+        initial_guess = np.array([5, 1, 0, 1], dtype=np.float32)
+        cube = set_up_temperature_cube()
+
+        forecast_predictor = cube.collapsed("realization", iris.analysis.MEAN)
+        forecast_variance = cube.collapsed(
+            "realization", iris.analysis.VARIANCE)
+        truth = cube.collapsed("realization", iris.analysis.MAX)
+        valid = np.ones(truth.shape, dtype=bool)
+        valid[..., 0, 0] = False
+        valid[..., 1, 2] = False
+
+        plugin = Plugin()
+        expected = plugin.crps_minimiser_for_data(
+            initial_guess, forecast_predictor.data[valid], truth.data[valid],
+            forecast_variance.data[valid], "mean", "gaussian")
+        forecast_predictor.data[..., 0, 0] = np.nan
+        mask = np.zeros(truth.shape, dtype=bool)
+        mask[..., 1, 2] = True
+        truth.data = np.ma.masked_array(truth.data, mask=mask)
+        result = plugin.crps_minimiser_wrapper(
+            initial_guess, forecast_predictor, truth, forecast_variance,
+            "mean", "gaussian")
+        self.assertArrayAlmostEqual(result, expected)
+
+    @ManageWarnings(record=True)
+    def test_no_valid_training_data(self, warning_list=None):
+        """
+        Test that a warning is raised and the initial guess is returned, if
+        there is no valid training data.
+        """
+        initial_guess = np.array([5, 1, 0, 1], dtype=np.float32)
+        data = np.full(3, np.nan, dtype=np.float32)
+        plugin = Plugin()
+        result = plugin.crps_minimiser_for_data(
+            initial_guess, data, data, data, "mean", "gaussian")
+        self.assertArrayEqual(result, initial_guess)
+        self.assertTrue(any("there is no valid training data" in
+                            str(item.message) for item in warning_list))
+
     @ManageWarnings(
         ignored_messages=["Collapsing a non-contiguous coordinate.",
                           "Minimisation did not result in convergence"])
@@ -603,6 +830,85 @@ class Test_crps_minimiser_wrapper(IrisTest):
                 initial_guess, forecast_predictor, truth, forecast_variance,
                 predictor_of_mean_flag, distribution)
 
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate.",
+                          "Minimisation did not result in convergence",
+                          "The final iteration resulted in a percentage "
+                          "change"])
+    def test_normal_mean_predictor_bfgs(self):
+        """
+        Test that the BFGS method, using the analytic gradient, reduces the
+        CRPS compared to the initial guess, when the ensemble mean is the
+        predictor.
+        """
+        initial_guess = np.array([5, 1, 0, 1], dtype=np.float32)
+        cube = set_up_temperature_cube()
+
+        forecast_predictor = cube.collapsed("realization", iris.analysis.MEAN)
+        forecast_variance = cube.collapsed(
+            "realization", iris.analysis.VARIANCE)
+        truth = cube.collapsed("realization", iris.analysis.MAX)
+
+        plugin = Plugin(minimisation_method="BFGS")
+        result = plugin.crps_minimiser_wrapper(
+            initial_guess, forecast_predictor, truth, forecast_variance,
+            "mean", "gaussian")
+        self.assertIsInstance(result, np.ndarray)
+        self.assertEqual(result.dtype, np.float32)
+        args = (forecast_predictor.data.flatten(), truth.data.flatten(),
+                forecast_variance.data.flatten(), np.sqrt(np.pi), "mean")
+        self.assertLess(plugin.normal_crps_minimiser(result, *args),
+                        plugin.normal_crps_minimiser(initial_guess, *args))
+
+    @ManageWarnings(record=True)
+    def test_bfgs_converges_for_temperatures(self, warning_list=None):
+        """
+        Test that the BFGS method converges, without a warning, for
+        temperatures in Kelvin, and that the CRPS is no larger than that
+        achieved using Nelder-Mead.
+        """
+        random_state = np.random.RandomState(0)
+        truth = 280 + 3 * random_state.randn(3000)
+        spread = 0.5 + random_state.rand(3000)
+        forecast_predictor = truth + 0.3 + spread * random_state.randn(3000)
+        forecast_variance = spread**2
+        args = [data.astype(np.float32) for data in
+                (forecast_predictor, truth, forecast_variance)]
+        initial_guess = np.array([1, 1, 0, 1], dtype=np.float32)
+
+        result = Plugin(minimisation_method="BFGS").crps_minimiser_for_data(
+            initial_guess, *args, "mean", "gaussian")
+        nelder_mead_result = Plugin().crps_minimiser_for_data(
+            initial_guess, *args, "mean", "gaussian")
+        self.assertFalse(any("Minimisation did not result in convergence"
+                             in str(item.message) for item in warning_list))
+        args = (forecast_predictor, truth, forecast_variance,
+                np.sqrt(np.pi), "mean")
+        self.assertLessEqual(
+            Plugin().normal_crps_minimiser(result, *args),
+            Plugin().normal_crps_minimiser(nelder_mead_result, *args))
+
+    @ManageWarnings(record=True)
+    def test_warning_reports_iterations(self, warning_list=None):
+        """
+        Test that the warning, if the minimisation does not converge,
+        reports the number of iterations performed.
+        """
+        random_state = np.random.RandomState(0)
+        truth = 280 + 3 * random_state.randn(30)
+        forecast_predictor = (truth + random_state.randn(30)).astype(
+            np.float32)
+        forecast_variance = np.ones(30, dtype=np.float32)
+        plugin = Plugin()
+        plugin.MAX_ITERATIONS = 10
+        plugin.crps_minimiser_for_data(
+            [1, 1, 0, 1], forecast_predictor, truth.astype(np.float32),
+            forecast_variance, "mean", "gaussian")
+        warning_msg = ("Minimisation did not result in convergence after "
+                       "10 iterations.")
+        self.assertTrue(any(warning_msg in str(item.message)
+                            for item in warning_list))
+
     @ManageWarnings(
         ignored_messages=["Collapsing a non-contiguous coordinate."])
     def test_truncated_normal_realizations_predictor_keyerror(self):
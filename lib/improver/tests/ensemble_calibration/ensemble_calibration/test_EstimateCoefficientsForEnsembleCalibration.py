@@ -91,6 +91,16 @@ class Test__init__(IrisTest):
                         predictor_of_mean_flag=predictor_of_mean_flag)
         self.assertEqual(plugin.coeff_names, expected)
 
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_invalid_processes(self):
+        """Test that an exception is raised if the number of processes is
+        less than 1."""
+        msg = "The number of processes must be at least 1"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin("gaussian", "20171110T0000Z", point_by_point=True,
+                   processes=0)
+
     @ManageWarnings(
         record=True,
         ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
@@ -384,6 +394,23 @@ class Test_create_coefficients_cube(IrisTest):
             self.optimised_coeffs, self.historic_forecast)
         self.assertEqual(result, self.expected)
 
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_coefficients_for_each_point(self):
+        """Test that the y and x coordinates of the historic forecast are
+        added, if coefficients are provided for each point."""
+        optimised_coeffs = np.ones((4, 3, 3), dtype=np.float32)
+        plugin = Plugin(distribution=self.distribution,
+                        current_cycle=self.current_cycle,
+                        desired_units=self.desired_units)
+        result = plugin.create_coefficients_cube(
+            optimised_coeffs, self.historic_forecast)
+        self.assertEqual(result.shape, (4, 3, 3))
+        self.assertEqual(result.coord_dims(
+            self.historic_forecast.coord(axis="y").name()), (1,))
+        self.assertEqual(result.coord_dims(
+            self.historic_forecast.coord(axis="x").name()), (2,))
+
     @ManageWarnings(
         ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
     def test_mismatching_number_of_coefficients(self):
@@ -828,6 +855,135 @@ class Test_estimate_coefficients_for_ngr(IrisTest):
 
         self.assertArrayAlmostEqual(result.data, data, decimal=5)
 
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES + [
+            "The minimisation raised warnings"],
+        warning_types=WARNING_TYPES + [UserWarning])
+    def test_point_by_point(self):
+        """Ensure that coefficients are estimated for each point, and
+        returned as a cube with the spatial coordinates of the historic
+        forecast."""
+        plugin = Plugin("gaussian", "20171110T0000Z", point_by_point=True)
+        result = plugin.estimate_coefficients_for_ngr(
+            self.historic_temperature_forecast_cube,
+            self.temperature_truth_cube)
+        self.assertEqual(result.shape, (4, 3, 3))
+        self.assertEqual(result.coord_dims("coefficient_name"), (0,))
+        self.assertEqual(
+            result.coord(axis="y"),
+            self.historic_temperature_forecast_cube.coord(axis="y"))
+        self.assertEqual(
+            result.coord(axis="x"),
+            self.historic_temperature_forecast_cube.coord(axis="x"))
+        self.assertTrue(np.isfinite(result.data).all())
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES + [
+            "The minimisation raised warnings"],
+        warning_types=WARNING_TYPES + [UserWarning])
+    def test_point_by_point_processes(self):
+        """Ensure that the coefficients estimated for each point using a
+        pool of processes match those estimated in a single process."""
+        expected = Plugin(
+            "gaussian", "20171110T0000Z",
+            point_by_point=True).estimate_coefficients_for_ngr(
+                self.historic_temperature_forecast_cube.copy(),
+                self.temperature_truth_cube.copy())
+        result = Plugin(
+            "gaussian", "20171110T0000Z", point_by_point=True,
+            processes=2).estimate_coefficients_for_ngr(
+                self.historic_temperature_forecast_cube.copy(),
+                self.temperature_truth_cube.copy())
+        self.assertArrayEqual(result.data, expected.data)
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES + [
+            "The minimisation raised warnings"],
+        warning_types=WARNING_TYPES + [UserWarning])
+    def test_point_by_point_no_valid_training_data(self):
+        """Ensure that the coefficients are NaN at a point without any
+        valid training data, and are estimated at the other points."""
+        truth = self.temperature_truth_cube
+        mask = np.zeros(truth.shape, dtype=bool)
+        mask[..., 0, 0] = True
+        truth.data = np.ma.masked_array(truth.data, mask=mask)
+        plugin = Plugin("gaussian", "20171110T0000Z", point_by_point=True)
+        result = plugin.estimate_coefficients_for_ngr(
+            self.historic_temperature_forecast_cube, truth)
+        self.assertTrue(np.isnan(result.data[:, 0, 0]).all())
+        self.assertTrue(np.isfinite(result.data[:, 1:, 1:]).all())
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_initial_guess_with_nans(self):
+        """Ensure that NaN coefficients within the initial guess are replaced
+        by the calculated initial guess."""
+        plugin = Plugin("gaussian", "20171110T0000Z")
+        expected = plugin.estimate_coefficients_for_ngr(
+            self.historic_temperature_forecast_cube.copy(),
+            self.temperature_truth_cube.copy())
+        initial_guess = expected.copy(
+            np.full(expected.shape, np.nan, dtype=np.float32))
+        result = plugin.estimate_coefficients_for_ngr(
+            self.historic_temperature_forecast_cube.copy(),
+            self.temperature_truth_cube.copy(), initial_guess=initial_guess)
+        self.assertArrayEqual(result.data, expected.data)
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES + [
+            "The minimisation raised warnings"],
+        warning_types=WARNING_TYPES + [UserWarning])
+    def test_initial_guess_for_each_point(self):
+        """Ensure that coefficients estimated for each point can be used as
+        the initial guess when estimating coefficients for each point."""
+        plugin = Plugin("gaussian", "20171110T0000Z", point_by_point=True)
+        initial_guess = plugin.estimate_coefficients_for_ngr(
+            self.historic_temperature_forecast_cube.copy(),
+            self.temperature_truth_cube.copy())
+        result = plugin.estimate_coefficients_for_ngr(
+            self.historic_temperature_forecast_cube,
+            self.temperature_truth_cube, initial_guess=initial_guess)
+        self.assertEqual(result.shape, (4, 3, 3))
+        self.assertTrue(np.isfinite(result.data).all())
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES + [
+            "The minimisation raised warnings"],
+        warning_types=WARNING_TYPES + [UserWarning])
+    def test_initial_guess_for_each_point_not_point_by_point(self):
+        """Test that an exception is raised if coefficients estimated for
+        each point are used as the initial guess for coefficients for the
+        whole domain."""
+        initial_guess = Plugin(
+            "gaussian", "20171110T0000Z",
+            point_by_point=True).estimate_coefficients_for_ngr(
+                self.historic_temperature_forecast_cube.copy(),
+                self.temperature_truth_cube.copy())
+        plugin = Plugin("gaussian", "20171110T0000Z")
+        msg = "Coefficients estimated for each point"
+        with self.assertRaisesRegex(ValueError, msg):
+            plugin.estimate_coefficients_for_ngr(
+                self.historic_temperature_forecast_cube,
+                self.temperature_truth_cube, initial_guess=initial_guess)
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_initial_guess_mismatching_number_of_coefficients(self):
+        """Test that an exception is raised if the number of coefficients in
+        the initial guess does not match the number of coefficients to be
+        estimated."""
+        initial_guess = Plugin(
+            "gaussian", "20171110T0000Z").estimate_coefficients_for_ngr(
+                self.historic_temperature_forecast_cube.copy(),
+                self.temperature_truth_cube.copy())
+        plugin = Plugin("gaussian", "20171110T0000Z",
+                        predictor_of_mean_flag="realizations")
+        msg = "The number of coefficients in the initial guess"
+        with self.assertRaisesRegex(ValueError, msg):
+            plugin.estimate_coefficients_for_ngr(
+                self.historic_temperature_forecast_cube,
+                self.temperature_truth_cube, initial_guess=initial_guess)
+
     @ManageWarnings(
         ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
     def test_non_matching_units(self):
@@ -849,5 +1005,65 @@ class Test_estimate_coefficients_for_ngr(IrisTest):
                 historic_forecast, self.temperature_truth_cube)
 
 
+class Test_estimate_coefficients_from_training_data(IrisTest):
+
+    """Test the estimate_coefficients_from_training_data method."""
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def setUp(self):
+        """Set up the historic forecast, ensemble mean and variance and
+        truth for testing."""
+        self.historic_forecast = _create_historic_forecasts(
+            add_forecast_reference_time_and_forecast_period(
+                set_up_temperature_cube()))
+        self.forecast_mean = self.historic_forecast.collapsed(
+            "realization", iris.analysis.MEAN)
+        self.forecast_var = self.historic_forecast.collapsed(
+            "realization", iris.analysis.VARIANCE)
+        self.truth = _create_truth(
+            add_forecast_reference_time_and_forecast_period(
+                set_up_temperature_cube()))
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_basic(self):
+        """Test that the coefficients match those estimated from the
+        historic forecast."""
+        plugin = Plugin("gaussian", "20171110T0000Z")
+        expected = plugin.estimate_coefficients_for_ngr(
+            self.historic_forecast, self.truth.copy())
+        result = plugin.estimate_coefficients_from_training_data(
+            self.forecast_mean, self.forecast_var, self.truth)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertArrayEqual(result.coord("coefficient_name").points,
+                              expected.coord("coefficient_name").points)
+        self.assertEqual(result.coord("time"), expected.coord("time"))
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_realizations_predictor(self):
+        """Test that an exception is raised if the ensemble realizations are
+        the predictor of the mean."""
+        plugin = Plugin("gaussian", "20171110T0000Z",
+                        predictor_of_mean_flag="realizations")
+        msg = "Coefficients can only be estimated from the training data"
+        with self.assertRaisesRegex(ValueError, msg):
+            plugin.estimate_coefficients_from_training_data(
+                self.forecast_mean, self.forecast_var, self.truth)
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_non_matching_units(self):
+        """Test that an exception is raised if the forecast mean and truth
+        have non matching units."""
+        self.forecast_mean.convert_units("Fahrenheit")
+        plugin = Plugin("gaussian", "20171110T0000Z")
+        msg = "The historic forecast units"
+        with self.assertRaisesRegex(ValueError, msg):
+            plugin.estimate_coefficients_from_training_data(
+                self.forecast_mean, self.forecast_var, self.truth)
+
+
 if __name__ == '__main__':
     unittest.main()
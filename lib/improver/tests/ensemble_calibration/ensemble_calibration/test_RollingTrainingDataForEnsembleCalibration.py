@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017-2019 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""
+Unit tests for the
+`ensemble_calibration.RollingTrainingDataForEnsembleCalibration`
+class.
+
+"""
+import os
+import unittest
+from subprocess import call as Call
+from tempfile import mkdtemp
+
+import iris
+from iris.tests import IrisTest
+
+from improver.ensemble_calibration.ensemble_calibration import (
+    RollingTrainingDataForEnsembleCalibration as Plugin)
+from improver.tests.ensemble_calibration.ensemble_calibration.\
+    helper_functions import (set_up_temperature_cube,
+                             add_forecast_reference_time_and_forecast_period,
+                             _create_historic_forecasts, _create_truth)
+from improver.utilities.warnings_handler import ManageWarnings
+
+IGNORED_MESSAGES = ["Collapsing a non-contiguous coordinate."]
+WARNING_TYPES = [UserWarning]
+
+
+class SetUpCubes(IrisTest):
+
+    """Set up the historic forecast, truth and store for testing."""
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def setUp(self):
+        """Set up the historic forecast and truth for five days, and a
+        directory for the store."""
+        current_forecast = add_forecast_reference_time_and_forecast_period(
+            set_up_temperature_cube())
+        self.historic_forecast = _create_historic_forecasts(current_forecast)
+        self.truth = _create_truth(current_forecast)
+        # Ensure the truth is valid at the same times as the historic
+        # forecast.
+        self.truth.coord("time").points = (
+            self.historic_forecast.coord("time").points)
+        self.directory = mkdtemp()
+        self.expected_validity_times = [
+            "20151118T0700Z", "20151119T0700Z", "20151120T0700Z",
+            "20151121T0700Z", "20151122T0700Z"]
+
+    def tearDown(self):
+        """Remove temporary directories created for testing."""
+        Call(['rm', '-rf', self.directory])
+
+
+class Test__init__(IrisTest):
+
+    """Test the __init__ method."""
+
+    def test_basic(self):
+        """Test that the plugin is initialised."""
+        plugin = Plugin("directory", 30, desired_units="Celsius")
+        self.assertEqual(plugin.directory, "directory")
+        self.assertEqual(plugin.window_length, 30)
+        self.assertEqual(plugin.desired_units, "Celsius")
+
+    def test_window_length_too_short(self):
+        """Test that an exception is raised if the window length is less
+        than 1."""
+        msg = "The window length must be at least 1"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin("directory", 0)
+
+
+class Test__repr__(IrisTest):
+
+    """Test the __repr__ method."""
+
+    def test_basic(self):
+        """Test the string representation of the plugin."""
+        result = str(Plugin("directory", 30))
+        msg = ("<RollingTrainingDataForEnsembleCalibration: "
+               "directory: directory; window_length: 30; "
+               "desired_units: None>")
+        self.assertEqual(result, msg)
+
+
+class Test_compact(SetUpCubes):
+
+    """Test the compact method."""
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_basic(self):
+        """Test that the ensemble mean and variance of the historic forecast
+        are returned with the truth."""
+        forecast_mean, forecast_var, truth = Plugin(
+            self.directory, 5).compact(self.historic_forecast, self.truth)
+        self.assertArrayAlmostEqual(
+            forecast_mean.data, self.historic_forecast.collapsed(
+                "realization", iris.analysis.MEAN).data)
+        self.assertArrayAlmostEqual(
+            forecast_var.data, self.historic_forecast.collapsed(
+                "realization", iris.analysis.VARIANCE).data)
+        self.assertArrayAlmostEqual(truth.data, self.truth.data)
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_unit_conversion(self):
+        """Test that the historic forecast and truth are converted to the
+        desired units, without modifying the input cubes."""
+        forecast_mean, _, truth = Plugin(
+            self.directory, 5, desired_units="Celsius").compact(
+                self.historic_forecast, self.truth)
+        self.assertEqual(forecast_mean.units, "Celsius")
+        self.assertEqual(truth.units, "Celsius")
+        self.assertEqual(self.truth.units, "K")
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_non_matching_units(self):
+        """Test that an exception is raised if the historic forecast and
+        truth have non matching units."""
+        self.truth.convert_units("Celsius")
+        msg = "The historic forecast units"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin(self.directory, 5).compact(
+                self.historic_forecast, self.truth)
+
+
+class Test_update(SetUpCubes):
+
+    """Test the update method."""
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_basic(self):
+        """Test that the training data is stored for each validity time."""
+        plugin = Plugin(self.directory, 5)
+        plugin.update(self.historic_forecast, self.truth)
+        self.assertEqual(plugin.stored_validity_times(),
+                         self.expected_validity_times)
+        for name in ["forecast_mean", "forecast_variance", "truth"]:
+            self.assertTrue(os.path.exists(os.path.join(
+                self.directory,
+                "20151118T0700Z_emos_training_{}.nc".format(name))))
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_oldest_removed(self):
+        """Test that the oldest validity times are removed, so that only
+        the latest window_length validity times are stored."""
+        plugin = Plugin(self.directory, 3)
+        plugin.update(self.historic_forecast, self.truth)
+        self.assertEqual(plugin.stored_validity_times(),
+                         self.expected_validity_times[-3:])
+        self.assertEqual(len(os.listdir(self.directory)), 9)
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_newest_day_appended(self):
+        """Test that adding the newest day to a full store removes the
+        oldest day."""
+        plugin = Plugin(self.directory, 4)
+        plugin.update(self.historic_forecast[:, :4], self.truth[:4])
+        self.assertEqual(plugin.stored_validity_times(),
+                         self.expected_validity_times[:4])
+        plugin.update(self.historic_forecast[:, 4], self.truth[4])
+        self.assertEqual(plugin.stored_validity_times(),
+                         self.expected_validity_times[1:])
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_missing_truth(self):
+        """Test that an exception is raised if there is no truth for a
+        validity time of the historic forecast."""
+        msg = "No truth is available for the historic forecast"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin(self.directory, 5).update(
+                self.historic_forecast, self.truth[:4])
+
+
+class Test_load(SetUpCubes):
+
+    """Test the load method."""
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_basic(self):
+        """Test that the training data for the stored validity times is
+        loaded."""
+        plugin = Plugin(self.directory, 3)
+        plugin.update(self.historic_forecast, self.truth)
+        forecast_mean, forecast_var, truth = plugin.load()
+        expected_mean, expected_var, expected_truth = plugin.compact(
+            self.historic_forecast[:, 2:], self.truth[2:])
+        self.assertArrayAlmostEqual(forecast_mean.data, expected_mean.data)
+        self.assertArrayAlmostEqual(forecast_var.data, expected_var.data)
+        self.assertArrayAlmostEqual(truth.data, expected_truth.data)
+        self.assertArrayAlmostEqual(
+            truth.coord("time").points, expected_truth.coord("time").points)
+
+    def test_no_training_data(self):
+        """Test that an exception is raised if there is no training data
+        in the store."""
+        msg = "No training data is stored"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin(self.directory, 3).load()
+
+
+class Test_process(SetUpCubes):
+
+    """Test the process method."""
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_basic(self):
+        """Test that the newest day is added to the store, and the training
+        data for the rolling window is returned."""
+        plugin = Plugin(self.directory, 3)
+        plugin.update(self.historic_forecast[:, :4], self.truth[:4])
+        forecast_mean, forecast_var, truth = plugin.process(
+            self.historic_forecast[:, 4], self.truth[4])
+        self.assertEqual(forecast_mean.shape, (3, 3, 3))
+        self.assertEqual(forecast_var.shape, (3, 3, 3))
+        self.assertArrayAlmostEqual(truth.data, self.truth[2:].data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -501,6 +501,32 @@ class Test_rank_ecc(IrisTest):
         result = plugin.rank_ecc(calibrated_cube, raw_cube, random_seed=0)
         self.assertArrayAlmostEqual(result.data, result_data)
 
+    def test_all_tied_values_random_seed(self):
+        """
+        Test that the plugin returns a reproducible permutation of the
+        calibrated values at each point, when all raw ensemble realizations
+        are tied.
+        """
+        raw_cube = self.cube.copy()
+        raw_cube.data = np.ones(raw_cube.shape, dtype=np.float32)
+        calibrated_cube = self.cube.copy()
+        plugin = Plugin()
+        result = plugin.rank_ecc(calibrated_cube, raw_cube, random_seed=0)
+        repeat = plugin.rank_ecc(calibrated_cube, raw_cube, random_seed=0)
+        self.assertArrayAlmostEqual(result.data, repeat.data)
+        self.assertArrayAlmostEqual(
+            np.sort(result.data, axis=0),
+            np.sort(calibrated_cube.data, axis=0))
+
+    def test_mismatched_shapes(self):
+        """Test that an error is raised if the raw and post-processed
+        forecasts do not have the same shape."""
+        raw_cube = self.cube[:2].copy()
+        calibrated_cube = self.cube.copy()
+        msg = "do not match the post-processed forecast percentiles"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin().rank_ecc(calibrated_cube, raw_cube)
+
     def test_2d_cube(self):
         """
         Test that the plugin returns the correct cube data for a
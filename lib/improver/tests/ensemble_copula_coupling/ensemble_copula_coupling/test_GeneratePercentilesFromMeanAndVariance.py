@@ -39,6 +39,7 @@ import iris
 from iris.cube import Cube, CubeList
 from iris.tests import IrisTest
 import numpy as np
+from scipy.stats import norm
 
 from improver.ensemble_copula_coupling.ensemble_copula_coupling import (
     GeneratePercentilesFromMeanAndVariance as Plugin)
@@ -240,6 +241,32 @@ class Test__mean_and_variance_to_percentiles(IrisTest):
             current_forecast_predictor, current_forecast_variance, percentiles)
         self.assertIsInstance(result, Cube)
 
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_matches_percent_point_function(self):
+        """
+        Test that the plugin returns the same values as the percent point
+        function of a normal distribution with the mean and variance,
+        including the 0th and 100th percentiles.
+        """
+        cube = self.current_temperature_forecast_cube
+        current_forecast_predictor = cube.collapsed(
+            "realization", iris.analysis.MEAN)
+        current_forecast_variance = cube.collapsed(
+            "realization", iris.analysis.VARIANCE)
+        percentiles = [0, 5, 25, 50, 75, 95, 100]
+        expected = np.array(
+            [norm.ppf(np.float32(percentile / 100.0),
+                      loc=current_forecast_predictor.data,
+                      scale=np.sqrt(current_forecast_variance.data))
+             for percentile in percentiles], dtype=np.float32)
+        plugin = Plugin()
+        result = plugin._mean_and_variance_to_percentiles(
+            current_forecast_predictor, current_forecast_variance,
+            percentiles)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayEqual(result.data, expected)
+
     @ManageWarnings(
         ignored_messages=["Collapsing a non-contiguous coordinate."])
     def test_negative_percentiles(self):
@@ -37,6 +37,7 @@ import unittest
 import iris
 from iris.tests import IrisTest
 import numpy as np
+from scipy.stats import norm
 
 from improver.ensemble_copula_coupling.ensemble_copula_coupling import (
     GenerateProbabilitiesFromMeanAndVariance as Plugin)
@@ -182,6 +183,23 @@ class Test__mean_and_variance_to_probabilities(IrisTest):
             self.means, self.variances, self.template_cube)
         np.testing.assert_allclose(result.data, expected, rtol=1.e-4)
 
+    def test_varying_mean_and_variance(self):
+        """Test that the probabilities match the normal distribution for
+        varying means and variances, as float32, and are NaN where the
+        variance is zero."""
+        self.means.data = np.linspace(8, 12, 9).reshape(3, 3)
+        self.variances.data = np.linspace(0, 4, 9).reshape(3, 3)
+        thresholds = find_threshold_coordinate(self.template_cube).points
+        expected = norm.sf(
+            thresholds[:, np.newaxis, np.newaxis], loc=self.means.data,
+            scale=np.sqrt(self.variances.data))
+        result = Plugin()._mean_and_variance_to_probabilities(
+            self.means, self.variances, self.template_cube)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertTrue(np.isnan(result.data[:, 0, 0]).all())
+        np.testing.assert_allclose(
+            result.data[:, 1:], expected[:, 1:], rtol=1.e-5)
+
 
 class Test_process(IrisTest):
 
@@ -460,6 +460,50 @@ class Test__interpolate_percentiles(IrisTest):
             cube, percentiles, bounds_pairing, self.perc_coord)
         self.assertArrayAlmostEqual(result.data, data)
 
+    def test_matches_interpolation_at_each_point(self):
+        """
+        Test that the result matches interpolating the forecast values at
+        each point separately, and that the data is float32.
+        """
+        cube = self.percentile_cube
+        percentiles = [0, 5, 25, 60, 95, 100]
+        bounds_pairing = (-40, 50)
+        original_percentiles = [0, 10, 50, 90, 100]
+        expected = np.empty((len(percentiles),) + cube.shape[1:])
+        for index in np.ndindex(cube.shape[1:]):
+            forecast = [-40] + list(cube.data[(slice(None),) + index]) + [50]
+            expected[(slice(None),) + index] = np.interp(
+                percentiles, original_percentiles, forecast)
+        plugin = Plugin()
+        result = plugin._interpolate_percentiles(
+            cube, percentiles, bounds_pairing, self.perc_coord)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(result.data, expected, decimal=5)
+
+    def test_nan_only_affects_neighbouring_percentiles(self):
+        """
+        Test that a NaN in the forecast at one percentile only affects the
+        interpolated percentiles either side of it, at that point only.
+        """
+        cube = self.percentile_cube
+        cube.data[2, 0, 1, 1] = np.nan
+        percentiles = [5, 30, 70, 90, 95]
+        bounds_pairing = (-40, 50)
+        original_percentiles = [0, 10, 50, 90, 100]
+        expected = np.empty((len(percentiles),) + cube.shape[1:])
+        for index in np.ndindex(cube.shape[1:]):
+            forecast = [-40] + list(cube.data[(slice(None),) + index]) + [50]
+            expected[(slice(None),) + index] = np.interp(
+                percentiles, original_percentiles, forecast)
+        plugin = Plugin()
+        result = plugin._interpolate_percentiles(
+            cube, percentiles, bounds_pairing, self.perc_coord)
+        self.assertArrayEqual(
+            np.isnan(result.data[:, 0, 1, 1]),
+            [False, False, True, True, True])
+        self.assertEqual(np.count_nonzero(np.isnan(result.data)), 3)
+        self.assertArrayAlmostEqual(result.data, expected, decimal=5)
+
     def test_check_data_spot_forecasts(self):
         """
         Test that the plugin returns an Iris.cube.Cube with the expected
@@ -45,7 +45,7 @@ from improver.ensemble_copula_coupling.ensemble_copula_coupling_utilities \
     import (choose_set_of_percentiles, create_cube_with_percentiles,
             insert_lower_and_upper_endpoint_to_1d_array,
             concatenate_2d_array_with_2d_array_endpoints,
-            get_bounds_of_distribution,
+            get_bounds_of_distribution, interpolate_multiple_rows,
             restore_non_probabilistic_dimensions)
 from improver.tests.ensemble_calibration.ensemble_calibration. \
     helper_functions import (
@@ -420,6 +420,101 @@ class Test_insert_lower_and_upper_endpoint_to_1d_array(IrisTest):
                 percentiles, -100, 10000)
 
 
+class Test_interpolate_multiple_rows(IrisTest):
+
+    """Test the interpolate_multiple_rows function."""
+
+    def setUp(self):
+        """Set up rows of monotonically increasing values, including tied
+        values and values outside the range of the x values."""
+        self.x_vals = np.array([0.5, 0., 0.25, 1., 0.75, 0.1])
+        self.xp = np.array([[0., 0.2, 0.6, 1.],
+                            [0., 0., 0.5, 1.],
+                            [0., 0.3, 1., 1.],
+                            [0.2, 0.4, 0.6, 0.8]])
+        self.fp = np.array([250., 270., 280., 300.])
+
+    def test_basic(self):
+        """Test that the result matches applying np.interp to each row."""
+        expected = np.array(
+            [np.interp(self.x_vals, row, self.fp) for row in self.xp])
+        result = interpolate_multiple_rows(self.x_vals, self.xp, self.fp)
+        self.assertIsInstance(result, np.ndarray)
+        self.assertEqual(result.dtype, np.float64)
+        self.assertArrayEqual(result, expected)
+
+    def test_out(self):
+        """Test that the result is written into a float32 array, when
+        provided, such as the transposed view of an array."""
+        expected = np.array(
+            [np.interp(self.x_vals, row, self.fp) for row in self.xp],
+            dtype=np.float32)
+        out = np.empty((len(self.x_vals), len(self.xp)), dtype=np.float32)
+        result = interpolate_multiple_rows(
+            self.x_vals, self.xp, self.fp, out=out.T)
+        self.assertArrayEqual(out.T, expected)
+        self.assertArrayEqual(result, expected)
+
+    def test_x_vals_and_fp_for_each_row(self):
+        """Test that the result matches applying np.interp to each row, if
+        the values to be interpolated to and from differ for each row."""
+        x_vals = np.array([[0.5, 0., 0.25, 1.],
+                           [0.75, 0.1, 0.5, 0.],
+                           [1., 1., 0.3, -1.],
+                           [0.6, 0.9, 0.2, 0.1]])
+        fp = np.array([[250., 270., 280., 300.],
+                       [1., 2., 3., 4.],
+                       [5., 5., 7., 9.],
+                       [0., 10., 20., 30.]])
+        expected = np.array(
+            [np.interp(x_row, xp_row, fp_row)
+             for x_row, xp_row, fp_row in zip(x_vals, self.xp, fp)])
+        result = interpolate_multiple_rows(x_vals, self.xp, fp)
+        self.assertArrayEqual(result, expected)
+
+    def test_x_vals_for_each_row(self):
+        """Test that the result matches applying np.interp to each row, if
+        the values to be interpolated to differ for each row, and the
+        values to be interpolated from are shared by every row."""
+        x_vals = np.array([[0.5, 0., 0.25, 1., 0.75, 0.1]] * 4)
+        x_vals[1] = x_vals[1, ::-1]
+        expected = np.array(
+            [np.interp(x_row, xp_row, self.fp)
+             for x_row, xp_row in zip(x_vals, self.xp)])
+        result = interpolate_multiple_rows(x_vals, self.xp, self.fp)
+        self.assertArrayEqual(result, expected)
+
+    def test_xp_shared_by_every_row(self):
+        """Test that the result matches applying np.interp to each row, if
+        the x-coordinates are shared by every row, and that a NaN in one row
+        of fp only affects the values interpolated from it in that row."""
+        xp = np.array([0., 0.2, 0.6, 1.])
+        fp = np.array([[250., 270., 280., 300.],
+                       [1., 2., np.nan, 4.],
+                       [5., 5., 7., 9.]])
+        expected = np.array([np.interp(self.x_vals, xp, row) for row in fp])
+        result = interpolate_multiple_rows(self.x_vals, xp, fp)
+        self.assertArrayEqual(
+            np.isnan(result),
+            [[False] * 6, [True, False, True, False, True, False],
+             [False] * 6])
+        self.assertArrayEqual(result, expected)
+
+    def test_xp_not_increasing(self):
+        """Test that the result matches applying np.interp to each row, if
+        the x-coordinates are not increasing in some rows."""
+        x_vals = np.array([[0.5, 0., 0.25, 1., 0.75, 0.1]] * 4)
+        xp = self.xp.copy()
+        xp[1] = [0.6, 0.2, 0.9, 0.4]
+        xp[3] = xp[3, ::-1]
+        expected = np.array(
+            [np.interp(x_row, xp_row, self.fp)
+             for x_row, xp_row in zip(x_vals, xp)])
+        for values in [x_vals, x_vals[0]]:
+            result = interpolate_multiple_rows(values, xp, self.fp)
+            self.assertArrayEqual(result, expected)
+
+
 class Test_restore_non_probabilistic_dimensions(IrisTest):
 
     """Test the restore_non_probabilistic_dimensions."""
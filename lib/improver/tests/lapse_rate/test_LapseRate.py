@@ -54,6 +54,38 @@ def reset_cube_data(temperature_cube, orography_cube, land_sea_mask_cube):
     land_sea_mask_cube.data[:] = 1
 
 
+def calc_lapse_rates_by_point(plugin, temperature, orography):
+    """Calculate the lapse rates as a reference for the vectorised
+    calculation, by extracting the neighbourhood around each point and
+    solving a least-squares problem for each in turn."""
+    radius = plugin.nbhood_radius
+    padded_temp = np.pad(temperature, radius, mode='constant',
+                         constant_values=np.nan)
+    padded_orog = np.pad(orography, radius, mode='constant',
+                         constant_values=np.nan)
+    result = np.empty(temperature.shape)
+    for i, j in np.ndindex(temperature.shape):
+        temp = padded_temp[i:i + plugin.nbhood_size,
+                           j:j + plugin.nbhood_size].flatten()
+        orog = padded_orog[i:i + plugin.nbhood_size,
+                           j:j + plugin.nbhood_size].flatten()
+        # Exclude neighbours where the height difference from the central
+        # point is too large, and NaN temperatures.
+        with np.errstate(invalid='ignore'):
+            valid = ~(np.absolute(orog - orography[i, j]) >=
+                      plugin.max_height_diff) & ~np.isnan(temp)
+        y_data = temp[valid]
+        x_data = orog[valid]
+        if (not valid[len(valid) // 2] or
+                (np.isclose(np.std(x_data), 0.0) and
+                 np.isclose(np.std(y_data), 0.0))):
+            result[i, j] = DALR
+            continue
+        matrix = np.stack([x_data, np.ones(len(x_data))], axis=0).T
+        result[i, j] = np.linalg.lstsq(matrix, y_data, rcond=None)[0][0]
+    return result
+
+
 class Test__repr__(IrisTest):
     """Test the repr method."""
 
@@ -65,69 +97,100 @@ class Test__repr__(IrisTest):
         self.assertEqual(result, msg)
 
 
-class Test__calc_lapse_rate(IrisTest):
-    """Test the _calc_lapse_rate function."""
+class Test__calc_lapse_rates(IrisTest):
+    """Test the _calc_lapse_rates function."""
 
     def setUp(self):
         """Sets up arrays."""
 
-        self.temperature = np.array([280.06, 279.97, 279.90, 280.15, 280.03,
-                                     279.96, 280.25, 280.33, 280.27])
-        self.orography = np.array([174.67, 179.87, 188.46, 155.84, 169.58,
-                                   185.05, 134.90, 144.00, 157.89])
+        self.temperature = np.array([[280.06, 279.97, 279.90],
+                                     [280.15, 280.03, 279.96],
+                                     [280.25, 280.33, 280.27]])
+        self.orography = np.array([[174.67, 179.87, 188.46],
+                                   [155.84, 169.58, 185.05],
+                                   [134.90, 144.00, 157.89]])
 
     def test_returns_expected_values(self):
-        """Test that the function returns expected lapse rate. """
+        """Test that the function returns expected lapse rate at the point
+        with a complete neighbourhood. """
 
         expected_out = -0.00765005774676
-        result = LapseRate(nbhood_radius=1)._calc_lapse_rate(self.temperature,
-                                                             self.orography)
-        self.assertArrayAlmostEqual(result, expected_out)
+        result = LapseRate(max_height_diff=100, nbhood_radius=1)\
+            ._calc_lapse_rates(self.temperature, self.orography)
+        self.assertArrayAlmostEqual(result[1, 1], expected_out)
 
     def test_handles_nan(self):
         """Test that the function returns DALR value when central point
-           is NaN."""
-
-        self.temperature[4] = np.nan
-        expected_out = DALR
-        result = LapseRate(nbhood_radius=1)._calc_lapse_rate(self.temperature,
-                                                             self.orography)
+           is NaN, and excludes NaN neighbours from the fit."""
+
+        self.temperature[1, 1] = np.nan
+        self.temperature[0, 0] = np.nan
+        plugin = LapseRate(max_height_diff=100, nbhood_radius=1)
+        expected_out = calc_lapse_rates_by_point(
+            plugin, self.temperature, self.orography)
+        result = plugin._calc_lapse_rates(self.temperature, self.orography)
+        self.assertEqual(result[1, 1], DALR)
         self.assertArrayAlmostEqual(result, expected_out)
 
-
-class Test__create_heightdiff_mask(IrisTest):
-    """Test the _create_heightdiff_mask function."""
-
-    def setUp(self):
-        """Sets up arrays."""
-
-        self.orography = np.array([[35, 40, 20, 10, 0, 10, 20, -30, -40],
-                                   [35, 40, 20, 10, 0, 10, 20, -30, -40]])
-
-    def test_returns_expected_values(self):
-        """Test that the function returns True at points where the height
-           difference to the central pixel is greater than 35m."""
-
-        expected_out = np.array(
-            [[True, True, False, False, False, False, False, False, True],
-             [True, True, False, False, False, False, False, False, True]])
-
-        result = LapseRate(nbhood_radius=1)._create_heightdiff_mask(
-            self.orography)
+    def test_constant_values(self):
+        """Test that the function returns DALR where both temperature and
+           orography are constant, and matches the minimum-norm
+           least-squares solution where only the orography is constant."""
+
+        self.orography[:] = 10.
+        self.temperature[:, 1:] = 280.
+        plugin = LapseRate(nbhood_radius=1)
+        expected_out = calc_lapse_rates_by_point(
+            plugin, self.temperature, self.orography)
+        result = plugin._calc_lapse_rates(self.temperature, self.orography)
+        self.assertArrayEqual(result[:, 2], DALR)
         self.assertArrayAlmostEqual(result, expected_out)
 
-    def test_change_height_thresh(self):
-        """Test that the function performs as expected when the height
-           difference threshold has been changed."""
+    def test_matches_least_squares_by_point(self):
+        """Test that the function matches the point-by-point least-squares
+           calculation for random fields containing NaNs and large height
+           differences."""
+
+        random_state = np.random.RandomState(0)
+        temperature = random_state.uniform(270, 290, (10, 12))
+        orography = random_state.uniform(0, 100, (10, 12))
+        temperature[random_state.uniform(size=temperature.shape) < 0.2] = (
+            np.nan)
+        plugin = LapseRate(nbhood_radius=2)
+        expected_out = calc_lapse_rates_by_point(
+            plugin, temperature, orography)
+        result = plugin._calc_lapse_rates(temperature, orography)
+        self.assertArrayAlmostEqual(result, expected_out)
 
-        expected_out = np.array(
-            [[False, True, False, False, False, False, False, False, True],
-             [False, True, False, False, False, False, False, False, True]])
+    def test_height_difference_excluded(self):
+        """Test that neighbours where the height difference from the central
+           point is at least max_height_diff are excluded from the fit."""
 
-        result = LapseRate(max_height_diff=40,
-                           nbhood_radius=1)._create_heightdiff_mask(
-            self.orography)
+        self.orography[0, 0] = self.orography[1, 1] + 40.
+        plugin = LapseRate(max_height_diff=40, nbhood_radius=1)
+        expected_out = calc_lapse_rates_by_point(
+            plugin, self.temperature, self.orography)
+        result = plugin._calc_lapse_rates(self.temperature, self.orography)
         self.assertArrayAlmostEqual(result, expected_out)
+        included = LapseRate(max_height_diff=41, nbhood_radius=1)\
+            ._calc_lapse_rates(self.temperature, self.orography)
+        self.assertNotAlmostEqual(result[1, 1], included[1, 1])
+
+    def test_leading_dimensions(self):
+        """Test that a temperature array with leading dimensions is
+           processed in the same way as each 2D slice individually."""
+
+        random_state = np.random.RandomState(0)
+        temperature = random_state.uniform(270, 290, (3, 2, 10, 12))
+        orography = random_state.uniform(0, 100, (10, 12))
+        temperature[0, 1, 3, 4] = np.nan
+        plugin = LapseRate(nbhood_radius=2)
+        result = plugin._calc_lapse_rates(temperature, orography)
+        self.assertEqual(result.shape, temperature.shape)
+        for index in np.ndindex(temperature.shape[:2]):
+            expected_out = plugin._calc_lapse_rates(
+                temperature[index], orography)
+            self.assertArrayAlmostEqual(result[index], expected_out)
 
 
 class Test_process(IrisTest):
@@ -571,6 +634,37 @@ class Test_process(IrisTest):
                                                     self.land_sea_mask)
         self.assertArrayAlmostEqual(result.data, expected_out)
 
+    @ManageWarnings(
+        ignored_messages=["invalid value encountered in greater_equal"],
+        warning_types=[RuntimeWarning])
+    def test_multiple_realizations(self):
+        """Test that all realizations are processed, giving the same results
+        as processing each realization individually."""
+
+        temperature = set_up_variable_cube(
+            np.zeros((3, 5, 5), dtype=np.float32), spatial_grid='equalarea')
+        temperature.data[:, :, 0:2] = 0.4
+        temperature.data[:, :, 2] = 0.3
+        temperature.data[:, :, 3] = 0.2
+        temperature.data[:, :, 4] = 0.1
+        temperature.data[1] *= 2.
+        temperature.data[2, 2, 2] = np.nan
+        self.orography.data[:, 2] = 10
+        self.orography.data[:, 3] = 20
+        self.orography.data[:, 4] = 40
+
+        result = LapseRate(nbhood_radius=1).process(temperature,
+                                                    self.orography,
+                                                    self.land_sea_mask)
+        self.assertEqual(result.shape, (3, 5, 5))
+        self.assertEqual(result.coord_dims("realization"), (0,))
+        for index, temp_slice in enumerate(
+                temperature.slices_over("realization")):
+            expected_out = LapseRate(nbhood_radius=1).process(
+                temp_slice, self.orography, self.land_sea_mask)
+            self.assertArrayAlmostEqual(result.data[index],
+                                        expected_out.data)
+
     @ManageWarnings(
         ignored_messages=["invalid value encountered in greater_equal"],
         warning_types=[RuntimeWarning])
@@ -38,6 +38,7 @@ from iris.tests import IrisTest
 import numpy as np
 
 from improver.nbhood.circular_kernel import CircularNeighbourhood
+from improver.nbhood.result_cache import NeighbourhoodResultCache
 from improver.tests.nbhood.nbhood.test_BaseNeighbourhoodProcessing import (
     SINGLE_POINT_RANGE_2_CENTROID_FLAT, SINGLE_POINT_RANGE_3_CENTROID,
     SINGLE_POINT_RANGE_5_CENTROID, set_up_cube)
@@ -55,6 +56,13 @@ class Test__init__(IrisTest):
         with self.assertRaisesRegex(ValueError, msg):
             CircularNeighbourhood(sum_or_fraction=sum_or_fraction)
 
+    def test_convolution_method(self):
+        """Test that a ValueError is raised if an invalid option is passed
+        in for convolution_method."""
+        msg = "nonsense convolution method is invalid"
+        with self.assertRaisesRegex(ValueError, msg):
+            CircularNeighbourhood(convolution_method="nonsense")
+
 
 class Test__repr__(IrisTest):
 
@@ -316,6 +324,76 @@ class Test_apply_circular_kernel(IrisTest):
                 weighted_mode=True).apply_circular_kernel(cube, ranges))
         self.assertArrayAlmostEqual(result.data, expected)
 
+    def test_fft_matches_direct(self):
+        """Test that the FFT and direct convolution methods give the same
+        result for random data, in fraction and sum modes."""
+        cube = set_up_cube(num_time_points=2)
+        random_state = np.random.RandomState(0)
+        cube.data = random_state.uniform(
+            size=cube.shape).astype(np.float32)
+        ranges = (6, 6)
+        for sum_or_fraction in ["fraction", "sum"]:
+            expected = CircularNeighbourhood(
+                sum_or_fraction=sum_or_fraction,
+                convolution_method="direct").apply_circular_kernel(
+                    cube.copy(), ranges)
+            result = CircularNeighbourhood(
+                sum_or_fraction=sum_or_fraction,
+                convolution_method="fft").apply_circular_kernel(
+                    cube.copy(), ranges)
+            self.assertEqual(result.dtype, np.float32)
+            self.assertArrayAlmostEqual(result.data, expected.data,
+                                        decimal=4)
+
+    def test_default_is_direct(self):
+        """Test that by default the kernel is applied by direct correlation,
+        so that the result is unchanged for a large range."""
+        cube = set_up_cube(num_time_points=2)
+        random_state = np.random.RandomState(0)
+        cube.data = random_state.uniform(
+            size=cube.shape).astype(np.float32)
+        ranges = (6, 6)
+        expected = CircularNeighbourhood(
+            convolution_method="direct").apply_circular_kernel(
+                cube.copy(), ranges)
+        result = CircularNeighbourhood().apply_circular_kernel(
+            cube.copy(), ranges)
+        self.assertArrayEqual(result.data, expected.data)
+
+    def test_auto_with_nan(self):
+        """Test that the automatic choice of convolution method does not
+        spread a NaN beyond the neighbourhood, for a large range."""
+        cube = set_up_cube(num_grid_points=32)
+        cube.data[0, 0, 2, 2] = np.nan
+        ranges = (5, 5)
+        result = CircularNeighbourhood(
+            convolution_method="auto").apply_circular_kernel(cube, ranges)
+        self.assertTrue(np.isnan(result.data[0, 0, 2, 2]))
+        self.assertFalse(np.isnan(result.data[0, 0, 20:, 20:]).any())
+
+    def test_cache(self):
+        """Test that the result with a cache matches the result without,
+        that identical slices are only processed once, and that the y and
+        x dimensions may be in either order."""
+        cube = set_up_cube(
+            zero_point_indices=[(0, 0, 10, 10), (0, 2, 10, 10)],
+            num_time_points=3)
+        cube.data[0, 1, 7, 7] = 0.
+        ranges = (3, 3)
+        for transpose in [[0, 1, 2, 3], [0, 1, 3, 2]]:
+            cube_transposed = cube.copy()
+            cube_transposed.transpose(transpose)
+            expected = CircularNeighbourhood().apply_circular_kernel(
+                cube_transposed.copy(), ranges)
+            cache = NeighbourhoodResultCache()
+            result = CircularNeighbourhood(
+                cache=cache).apply_circular_kernel(
+                    cube_transposed.copy(), ranges)
+            self.assertArrayAlmostEqual(result.data, expected.data)
+            self.assertEqual(cache.misses, 2)
+            self.assertEqual(cache.hits, 0)
+            self.assertEqual(cache.duplicates, 1)
+
 
 class Test_run(IrisTest):
 
@@ -34,6 +34,7 @@ plugin."""
 
 
 import unittest
+from unittest.mock import patch
 
 import iris
 from iris.cube import Cube
@@ -42,11 +43,24 @@ import numpy as np
 
 from improver.constants import DEFAULT_PERCENTILES
 from improver.nbhood.circular_kernel import (
-    GeneratePercentilesFromACircularNeighbourhood)
+    GeneratePercentilesFromACircularNeighbourhood, circular_kernel)
 from improver.tests.nbhood.nbhood.test_BaseNeighbourhoodProcessing import (
     set_up_cube, set_up_cube_lat_long)
 
 
+class Test__init__(IrisTest):
+
+    """Test the init method."""
+
+    def test_percentile_method(self):
+        """Test that a ValueError is raised if an invalid option is passed
+        in for percentile_method."""
+        msg = "nonsense percentile method is invalid"
+        with self.assertRaisesRegex(ValueError, msg):
+            GeneratePercentilesFromACircularNeighbourhood(
+                percentile_method="nonsense")
+
+
 class Test__repr__(IrisTest):
 
     """Test the repr method."""
@@ -311,6 +325,59 @@ class Test_pad_and_unpad_cube(IrisTest):
                     slice_2d, kernel))
         self.assertArrayAlmostEqual(result.data, expected)
 
+    def test_processed_in_blocks(self):
+        """Test that the result is unchanged when the number of
+        neighbourhood values held in memory at once is limited, so that the
+        rows are processed in several blocks of differing sizes."""
+        cube = set_up_cube(
+            zero_point_indices=[(0, 0, 0, 0), (0, 0, 3, 5), (0, 0, 7, 2)],
+            num_grid_points=9)
+        slice_2d = cube[0, 0, :, :]
+        slice_2d.data[4, :] = np.linspace(0., 1., 9)
+        kernel = np.array(
+            [[0., 1., 0.],
+             [1., 1., 1.],
+             [0., 1., 0.]])
+        plugin = GeneratePercentilesFromACircularNeighbourhood(
+            percentiles=np.array([10, 50, 90]))
+        expected = plugin.pad_and_unpad_cube(slice_2d, kernel)
+        with patch("improver.nbhood.circular_kernel."
+                   "MAX_NEIGHBOURHOOD_VALUES_PER_BLOCK", 100):
+            result = plugin.pad_and_unpad_cube(slice_2d, kernel)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayEqual(result.data, expected.data)
+
+    def test_counting_matches_sorting(self):
+        """Test that calculating the percentiles by counting gives the same
+        result as sorting, for a field with few distinct values and a
+        kernel that is small compared with the domain."""
+        cube = set_up_cube(num_grid_points=20)
+        slice_2d = cube[0, 0, :, :]
+        random_state = np.random.RandomState(0)
+        slice_2d.data = (random_state.randint(0, 5, size=(20, 20)) /
+                         4.).astype(np.float32)
+        kernel = circular_kernel((3, 3), (3, 3), False)
+        percentiles = [0, 10, 25, 50, 75, 90, 100]
+        expected = GeneratePercentilesFromACircularNeighbourhood(
+            percentiles=percentiles,
+            percentile_method="sort").pad_and_unpad_cube(slice_2d, kernel)
+        result = GeneratePercentilesFromACircularNeighbourhood(
+            percentiles=percentiles,
+            percentile_method="count").pad_and_unpad_cube(slice_2d, kernel)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
+    def test_counting_kernel_larger_than_domain(self):
+        """Test that calculating the percentiles by counting gives the same
+        result as sorting, if the kernel is larger than the domain."""
+        slice_2d = self.cube[0, 0, :, :]
+        kernel = circular_kernel((3, 3), (3, 3), False)
+        expected = GeneratePercentilesFromACircularNeighbourhood(
+            percentile_method="sort").pad_and_unpad_cube(slice_2d, kernel)
+        result = GeneratePercentilesFromACircularNeighbourhood(
+            percentile_method="count").pad_and_unpad_cube(slice_2d, kernel)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
 
 class Test_run(IrisTest):
 
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017-2019 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+"""Unit tests for the nbhood.circular_kernel.fft_correlate function."""
+
+import unittest
+
+from iris.tests import IrisTest
+import numpy as np
+import scipy.ndimage.filters
+
+from improver.nbhood.circular_kernel import circular_kernel, fft_correlate
+
+
+class Test_fft_correlate(IrisTest):
+
+    """Test correlating an array with a kernel using FFT convolution."""
+
+    def setUp(self):
+        """Set up random data with a leading dimension."""
+        random_state = np.random.RandomState(0)
+        self.data = random_state.uniform(size=(2, 20, 24)).astype(np.float32)
+
+    def test_matches_direct_correlation(self):
+        """Test that the result matches direct correlation with the
+        'nearest' mode, including at the edges of the domain."""
+        kernel = circular_kernel((0, 6, 6), (6, 6), True)
+        expected = scipy.ndimage.filters.correlate(
+            self.data.astype(np.float64), kernel, mode='nearest')
+        result = fft_correlate(self.data, kernel)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(result, expected, decimal=4)
+
+    def test_asymmetric_kernel(self):
+        """Test that an asymmetric kernel is correlated, rather than
+        convolved, with the data."""
+        kernel = np.zeros((1, 3, 5))
+        kernel[0, 0, 4] = 1.
+        kernel[0, 1, 1] = 0.5
+        expected = scipy.ndimage.filters.correlate(
+            self.data.astype(np.float64), kernel, mode='nearest')
+        result = fft_correlate(self.data, kernel)
+        self.assertArrayAlmostEqual(result, expected, decimal=5)
+
+    def test_kernel_larger_than_domain(self):
+        """Test that a kernel larger than the domain gives the same result
+        as direct correlation."""
+        data = self.data[:, :4, :4]
+        kernel = circular_kernel((0, 5, 5), (5, 5), False)
+        expected = scipy.ndimage.filters.correlate(
+            data.astype(np.float64), kernel, mode='nearest')
+        result = fft_correlate(data, kernel)
+        self.assertArrayAlmostEqual(result, expected, decimal=4)
+
+    def test_within_range_of_data(self):
+        """Test that a constant field is unchanged by the rounding errors of
+        the FFT, so that the result does not exceed the range of the
+        data."""
+        data = np.ones((16, 16), dtype=np.float32)
+        kernel = circular_kernel((8, 8), (8, 8), False)
+        result = fft_correlate(data, kernel) / np.sum(kernel)
+        self.assertTrue(np.all(result <= 1.))
+        self.assertArrayAlmostEqual(result, data)
+
+
+if __name__ == '__main__':
+    unittest.main()
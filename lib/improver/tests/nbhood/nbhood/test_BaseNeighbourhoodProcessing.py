@@ -533,6 +533,33 @@ class Test_process(IrisTest):
         result = plugin.process(cube)
         self.assertArrayAlmostEqual(result.data, expected)
 
+    def test_radii_varying_with_lead_time_square_check_data(self):
+        """
+        Test that the expected data is produced when the radius varies with
+        lead time and a square neighbourhood is used, so that all times are
+        processed at once.
+        """
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 7, 7), (0, 1, 7, 7,), (0, 2, 7, 7)),
+            num_time_points=3)
+        expected = np.ones_like(cube.data)
+        expected[0, 0, 6:9, 6:9] = 8. / 9.
+        expected[0, 1, 5:10, 5:10] = 24. / 25.
+        expected[0, 2, 4:11, 4:11] = 48. / 49.
+
+        iris.util.promote_aux_coord_to_dim_coord(cube, "time")
+        time_points = cube.coord("time").points
+        fp_points = [2, 3, 4]
+        cube = add_forecast_reference_time_and_forecast_period(
+            cube, time_point=time_points, fp_point=fp_points)
+        radii = [2000, 6000]
+        lead_times = [2, 4]
+        neighbourhood_method = SquareNeighbourhood()
+        plugin = NBHood(neighbourhood_method, radii, lead_times)
+        result = plugin.process(cube)
+        self.assertArrayAlmostEqual(result.data, expected)
+        self.assertEqual(result.coord_dims("time"), cube.coord_dims("time"))
+
     def test_use_mask_cube_occurrences_not_masked(self):
         """Test that the plugin returns an iris.cube.Cube with the correct
         data array if a mask cube is used and the mask cube does not mask
@@ -614,6 +641,88 @@ class Test_process(IrisTest):
             cube, mask_cube)
         self.assertArrayAlmostEqual(result.data, expected)
 
+    def test_constant_slices_skipped(self):
+        """Test that slices with a constant value are skipped, and that the
+        result matches processing each slice separately."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 7, 7),), num_time_points=3)
+        cube.data[0, 1] = 0.
+        for neighbourhood_method in [CircularNeighbourhood(),
+                                     SquareNeighbourhood()]:
+            plugin = NBHood(neighbourhood_method, self.RADIUS)
+            result = plugin.process(cube.copy())
+            self.assertEqual(plugin.n_slices, 3)
+            self.assertEqual(plugin.n_constant_slices_skipped, 2)
+            self.assertEqual(result.metadata, cube.metadata)
+            self.assertEqual(result.dtype, np.float32)
+            for index in range(3):
+                expected = NBHood(neighbourhood_method, self.RADIUS).process(
+                    cube[0, index].copy())
+                self.assertArrayEqual(result.data[0, index], expected.data)
+
+    def test_all_slices_constant(self):
+        """Test that no slices are processed if every slice has a constant
+        value, including a single 2D slice."""
+        cube = set_up_cube(zero_point_indices=(), num_time_points=3)
+        cube.data[0, 1] = 0.
+        plugin = NBHood(SquareNeighbourhood(), self.RADIUS)
+        result = plugin.process(cube.copy())
+        self.assertEqual(plugin.n_constant_slices_skipped, 3)
+        self.assertEqual(result.metadata, cube.metadata)
+        self.assertArrayEqual(result.data, cube.data)
+        plugin = NBHood(SquareNeighbourhood(), self.RADIUS)
+        result = plugin.process(cube[0, 1].copy())
+        self.assertEqual(plugin.n_constant_slices_skipped, 1)
+        self.assertArrayEqual(result.data, cube.data[0, 1])
+
+    def test_masked_constant_slices(self):
+        """Test that slices that are constant where they are not masked are
+        skipped if re_mask is True, and that the result matches processing
+        each slice separately, with the masked points masked."""
+        cube = set_up_cube(zero_point_indices=(), num_time_points=3)
+        cube.data[0, 1] = 0.
+        cube.data[0, 2, 7, 7] = 0.
+        cube.data = np.ma.masked_array(cube.data, mask=False)
+        cube.data.mask[0, 0, 3, 3] = True
+        mask_cube = cube[0, 0].copy(data=np.ones((16, 16)))
+        mask_cube.data[10:12, 10:12] = 0.
+        plugin = NBHood(SquareNeighbourhood(re_mask=True), self.RADIUS)
+        result = plugin.process(cube.copy(), mask_cube=mask_cube)
+        self.assertEqual(plugin.n_constant_slices_skipped, 2)
+        for index in range(3):
+            expected = SquareNeighbourhood(re_mask=True).run(
+                cube[0, index].copy(), self.RADIUS, mask_cube=mask_cube)
+            self.assertArrayEqual(result.data.mask[0, index],
+                                  expected.data.mask)
+            self.assertArrayEqual(result.data[0, index].compressed(),
+                                  expected.data.compressed())
+        self.assertTrue(result.data.mask[0, 0, 3, 3])
+        self.assertTrue(result.data.mask[0, 1, 10:12, 10:12].all())
+
+    def test_masked_constant_slices_not_skipped(self):
+        """Test that slices with masked points are not skipped if re_mask is
+        False, as the result at the masked points depends on the
+        neighbourhood."""
+        cube = set_up_cube(zero_point_indices=(), num_time_points=3)
+        mask_cube = cube[0, 0].copy(data=np.ones((16, 16)))
+        mask_cube.data[10:12, 10:12] = 0.
+        plugin = NBHood(SquareNeighbourhood(re_mask=False), self.RADIUS)
+        result = plugin.process(cube, mask_cube=mask_cube)
+        self.assertEqual(plugin.n_constant_slices_skipped, 0)
+        self.assertArrayEqual(result.data, cube.data)
+
+    def test_constant_slices_not_skipped(self):
+        """Test that constant slices are not skipped if the sum over the
+        neighbourhood is required, as the result is not the constant
+        value."""
+        cube = set_up_cube(zero_point_indices=(), num_time_points=3)
+        plugin = NBHood(SquareNeighbourhood(sum_or_fraction="sum"),
+                        self.RADIUS)
+        result = plugin.process(cube)
+        self.assertEqual(plugin.n_constant_slices_skipped, 0)
+        self.assertEqual(plugin.n_slices, 3)
+        self.assertTrue((result.data > 1.).all())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -38,6 +38,7 @@ from iris.tests import IrisTest
 import numpy as np
 
 from improver.nbhood.nbhood import NeighbourhoodProcessing as NBHood
+from improver.nbhood.result_cache import NeighbourhoodResultCache
 from improver.tests.nbhood.nbhood.test_BaseNeighbourhoodProcessing import (
     set_up_cube)
 
@@ -134,6 +135,23 @@ class Test_process(IrisTest):
         self.assertIsInstance(result, Cube)
         self.assertArrayAlmostEqual(result.data, expected)
 
+    def test_cache(self):
+        """Test that a cache shared between plugins is consulted by both
+        the square and circular neighbourhood methods, and that identical
+        realizations are only processed once by each method."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2), (1, 0, 2, 2)),
+            num_grid_points=5, num_realization_points=2)
+        cache = NeighbourhoodResultCache()
+        for neighbourhood_method in ['square', 'circular']:
+            expected = NBHood(neighbourhood_method, 2000).process(cube)
+            result = NBHood(
+                neighbourhood_method, 2000, cache=cache).process(cube)
+            self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.hits, 2)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -218,6 +218,37 @@ class Test__recurse_forward(Test_RecursiveFilter):
         self.assertIsInstance(result, np.ndarray)
         self.assertArrayAlmostEqual(result, expected_result)
 
+    def test_varying_alphas(self):
+        """Test that the expected result is returned when the alphas vary
+        along the axis, so the recursion steps between gridpoints."""
+        grid = np.array([[1., 0., 0., 2.],
+                         [0., 1., 0., 0.]], dtype=np.float32)
+        alphas = np.array([[0.5, 0.5, 0.25, 0.5],
+                           [0.1, 0.2, 0.3, 0.4]])
+        expected_result = np.array(
+            [[1., 0.5, 0.125, 1.0625],
+             [0., 0.8, 0.24, 0.096]])
+        result = RecursiveFilter()._recurse_forward(grid, alphas, 1)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(result, expected_result)
+
+    def test_stack_of_slices(self):
+        """Test that a stack of 2D arrays is filtered at once, with the
+        same result as filtering each 2D array, for uniform and varying
+        alphas."""
+        grid = np.stack([self.cube.data[0], self.cube.data[0].T ** 2])
+        varying_alphas = self.alphas_cube.data.copy()
+        varying_alphas[1:3, 2:4] = 0.8
+        for alphas in [self.alphas_cube.data, varying_alphas]:
+            for axis in [0, 1]:
+                expected_result = np.stack([
+                    RecursiveFilter()._recurse_forward(
+                        grid_slice.copy(), alphas, axis)
+                    for grid_slice in grid])
+                result = RecursiveFilter()._recurse_forward(
+                    grid.copy(), alphas, axis + 1)
+                self.assertArrayAlmostEqual(result, expected_result)
+
 
 class Test__recurse_backward(Test_RecursiveFilter):
 
@@ -251,6 +282,19 @@ class Test__recurse_backward(Test_RecursiveFilter):
         self.assertIsInstance(result, np.ndarray)
         self.assertArrayAlmostEqual(result, expected_result)
 
+    def test_varying_alphas(self):
+        """Test that the expected result is returned when the alphas vary
+        along the axis, so the recursion steps between gridpoints."""
+        grid = np.array([[2., 0., 0., 1.],
+                         [0., 0., 1., 0.]], dtype=np.float32)
+        alphas = np.array([[0.5, 0.25, 0.5, 0.5],
+                           [0.4, 0.3, 0.2, 0.1]])
+        expected_result = np.array(
+            [[1.0625, 0.125, 0.5, 1.],
+             [0.096, 0.24, 0.8, 0.]])
+        result = RecursiveFilter()._recurse_backward(grid, alphas, 1)
+        self.assertArrayAlmostEqual(result, expected_result)
+
 
 class Test__run_recursion(Test_RecursiveFilter):
 
@@ -403,6 +447,48 @@ class Test_process(Test_RecursiveFilter):
             ["realization", "longitude", "latitude"])
         self.assertArrayAlmostEqual(result.data[0], expected_result)
 
+    def test_multiple_slices(self):
+        """Test that all slices of a cube with several realizations are
+        filtered at once, giving the same result as filtering each
+        realization separately, and that the coordinates of the input cube
+        are retained."""
+        data = np.stack([self.cube.data[0], self.cube.data[0].T ** 2,
+                         np.roll(self.cube.data[0], 1, axis=0)])
+        cube = set_up_variable_cube(
+            data, name="precipitation_amount", units="kg m^-2 s^-1")
+        cube.data[1, 0, 4] = np.nan
+        plugin = RecursiveFilter(alpha_x=self.alpha_x, alpha_y=0.25,
+                                 iterations=2)
+        result = plugin.process(cube)
+        self.assertEqual(result.coords(), cube.coords())
+        for index, cube_slice in enumerate(cube.slices_over("realization")):
+            expected = plugin.process(cube_slice)
+            self.assertArrayAlmostEqual(result.data[index], expected.data)
+
+    def test_mask_applied_to_each_slice(self):
+        """Test that a mask cube and masked data are applied to the slices
+        they refer to, and that the mask cube is not modified."""
+        data = np.stack([self.cube.data[0], self.cube.data[0]])
+        cube = set_up_variable_cube(
+            data, name="precipitation_amount", units="kg m^-2 s^-1")
+        mask = np.zeros(cube.shape, dtype=bool)
+        mask[0, 2, 1] = True
+        cube.data = np.ma.masked_array(cube.data, mask=mask)
+        mask_cube = cube[0].copy(data=np.ones((5, 5), dtype=np.float32))
+        mask_cube.data[2, 3] = 0.
+        plugin = RecursiveFilter(alpha_x=self.alpha_x, alpha_y=self.alpha_y,
+                                 iterations=self.iterations, re_mask=True)
+        original_mask_data = mask_cube.data.copy()
+        result = plugin.process(cube, mask_cube=mask_cube)
+        self.assertArrayEqual(mask_cube.data, original_mask_data)
+        expected_mask = np.zeros(cube.shape, dtype=bool)
+        expected_mask[:, 2, 3] = True
+        expected_mask[0, 2, 1] = True
+        self.assertArrayEqual(result.data.mask, expected_mask)
+        self.assertFalse(np.allclose(result.data[0], result.data[1]))
+        expected = plugin.process(cube[1], mask_cube=mask_cube.copy())
+        self.assertArrayAlmostEqual(result.data[1], expected.data)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017-2019 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+"""Unit tests for the nbhood.result_cache.NeighbourhoodResultCache plugin."""
+
+import unittest
+
+import unittest
+
+from iris.tests import IrisTest
+import numpy as np
+
+from improver.nbhood.result_cache import (
+    DEFAULT_MAX_CACHE_BYTES, NeighbourhoodResultCache)
+
+
+class Test__init__(IrisTest):
+
+    """Test the __init__ method of NeighbourhoodResultCache."""
+
+    def test_default(self):
+        """Test the default maximum size and that the cache is empty."""
+        plugin = NeighbourhoodResultCache()
+        self.assertEqual(plugin.max_bytes, DEFAULT_MAX_CACHE_BYTES)
+        self.assertEqual(plugin.nbytes, 0)
+        self.assertEqual(len(plugin), 0)
+
+
+class Test__repr__(IrisTest):
+
+    """Test the repr method."""
+
+    def test_basic(self):
+        """Test that the __repr__ returns the expected string."""
+        result = str(NeighbourhoodResultCache(max_bytes=100))
+        msg = ('<NeighbourhoodResultCache: max_bytes: 100, nbytes: 0, '
+               'hits: 0, misses: 0, duplicates: 0>')
+        self.assertEqual(result, msg)
+
+
+class Test_make_key(IrisTest):
+
+    """Test the make_key method."""
+
+    def setUp(self):
+        """Set up a field."""
+        self.data = np.zeros((3, 4), dtype=np.float32)
+
+    def test_identical_fields(self):
+        """Test that identical fields have the same key, whether or not they
+        are contiguous."""
+        other = np.zeros((3, 8), dtype=np.float32)[:, ::2]
+        self.assertEqual(
+            NeighbourhoodResultCache.make_key(self.data, None, ("a", 1)),
+            NeighbourhoodResultCache.make_key(other, None, ("a", 1)))
+
+    def test_differences(self):
+        """Test that the key differs if the data, dtype, shape, mask or
+        configuration differ."""
+        make_key = NeighbourhoodResultCache.make_key
+        key = make_key(self.data, None, ("a", 1))
+        changed_data = self.data.copy()
+        changed_data[1, 1] = 1.
+        masked_data = np.ma.masked_array(self.data, mask=False)
+        masked_data.mask[0, 0] = True
+        others = [
+            make_key(changed_data, None, ("a", 1)),
+            make_key(self.data.astype(np.float64), None, ("a", 1)),
+            make_key(self.data.reshape(4, 3), None, ("a", 1)),
+            make_key(masked_data, None, ("a", 1)),
+            make_key(self.data, np.ones((3, 4)), ("a", 1)),
+            make_key(self.data, None, ("a", 2))]
+        for other in others:
+            self.assertNotEqual(key, other)
+
+
+class Test_get_and_put(IrisTest):
+
+    """Test the get and put methods."""
+
+    def setUp(self):
+        """Set up a cache that can hold two 4x4 float32 fields."""
+        self.plugin = NeighbourhoodResultCache(max_bytes=128)
+        self.field = np.ones((4, 4), dtype=np.float32)
+
+    def test_basic(self):
+        """Test that a copy of a result is cached and returned."""
+        self.plugin.put("key", self.field)
+        self.field[0, 0] = 0.
+        result = self.plugin.get("key")
+        self.assertArrayEqual(result, np.ones((4, 4)))
+        self.assertEqual(self.plugin.nbytes, 64)
+        self.assertIsNone(self.plugin.get("other"))
+
+    def test_least_recently_used_discarded(self):
+        """Test that the least recently used result is discarded when the
+        cache would exceed the maximum number of bytes."""
+        self.plugin.put("first", self.field)
+        self.plugin.put("second", self.field)
+        self.plugin.get("first")
+        self.plugin.put("third", self.field)
+        self.assertEqual(len(self.plugin), 2)
+        self.assertEqual(self.plugin.nbytes, 128)
+        self.assertIsNone(self.plugin.get("second"))
+        self.assertIsNotNone(self.plugin.get("first"))
+
+    def test_masked_result(self):
+        """Test that the mask of a result is included in its size."""
+        mask = np.zeros(self.field.shape, dtype=bool)
+        mask[0, 0] = True
+        self.plugin.put("key", np.ma.masked_array(self.field, mask=mask))
+        self.assertEqual(self.plugin.nbytes, 80)
+        self.assertIsInstance(self.plugin.get("key"), np.ma.MaskedArray)
+
+    def test_unmasked_masked_result(self):
+        """Test that a masked result without any masked points is stored as
+        a plain array."""
+        self.plugin.put("key", np.ma.masked_array(self.field, mask=False))
+        self.assertEqual(self.plugin.nbytes, 64)
+        self.assertNotIsInstance(self.plugin.get("key"), np.ma.MaskedArray)
+
+    def test_result_too_large(self):
+        """Test that a result larger than the cache is not cached."""
+        self.plugin.put("key", np.ones((6, 6), dtype=np.float32))
+        self.assertEqual(len(self.plugin), 0)
+        self.assertEqual(self.plugin.nbytes, 0)
+
+
+class Test_process_slices(IrisTest):
+
+    """Test the process_slices method."""
+
+    def setUp(self):
+        """Set up an array of slices, some of which are identical, and a
+        function that records the slices it processes."""
+        random_state = np.random.RandomState(0)
+        self.data = np.zeros((2, 3, 4, 5), dtype=np.float32)
+        self.data[0, 1] = random_state.uniform(size=(4, 5))
+        self.data[1, 2] = random_state.uniform(size=(4, 5))
+        self.processed = []
+
+        def function(slices, mask_slices):
+            """Double each slice, recording the number processed."""
+            self.processed.append(len(slices))
+            if mask_slices is not None:
+                slices = slices * mask_slices
+            return slices * 2.
+
+        self.function = function
+
+    def test_distinct_slices_processed_once(self):
+        """Test that each distinct slice is only processed once, and that
+        the results are returned in the original shape."""
+        plugin = NeighbourhoodResultCache()
+        result = plugin.process_slices(self.data, None, ("a",), self.function)
+        self.assertArrayAlmostEqual(result, self.data * 2.)
+        self.assertEqual(self.processed, [3])
+        self.assertEqual(plugin.misses, 3)
+        self.assertEqual(plugin.hits, 0)
+        self.assertEqual(plugin.duplicates, 3)
+
+    def test_cached_slices_not_processed(self):
+        """Test that slices cached by a previous call are not processed,
+        and that only the slices found in the cache are counted as hits."""
+        plugin = NeighbourhoodResultCache()
+        plugin.process_slices(self.data[0], None, ("a",), self.function)
+        result = plugin.process_slices(self.data, None, ("a",), self.function)
+        self.assertArrayAlmostEqual(result, self.data * 2.)
+        self.assertEqual(self.processed, [2, 1])
+        self.assertEqual(plugin.misses, 3)
+        self.assertEqual(plugin.hits, 2)
+        self.assertEqual(plugin.duplicates, 4)
+
+    def test_mask(self):
+        """Test that the mask is passed to the function for each slice and
+        that slices with different masks are processed separately."""
+        mask_data = np.ones((2, 1, 4, 5))
+        mask_data[1, :, 0, 0] = 0.
+        plugin = NeighbourhoodResultCache()
+        result = plugin.process_slices(
+            self.data, mask_data, ("a",), self.function)
+        self.assertArrayAlmostEqual(result, self.data * mask_data * 2.)
+        self.assertEqual(self.processed, [4])
+
+    def test_masked_results(self):
+        """Test that masked results are returned as a masked array."""
+        def function(slices, _):
+            """Mask the first point of each slice."""
+            result = np.ma.masked_array(slices, mask=False)
+            result.mask[:, 0, 0] = True
+            return result
+
+        result = NeighbourhoodResultCache().process_slices(
+            self.data, None, ("a",), function)
+        self.assertIsInstance(result, np.ma.MaskedArray)
+        self.assertTrue(result.mask[..., 0, 0].all())
+        self.assertEqual(np.sum(result.mask), 6)
+
+    def test_result_type_independent_of_batch(self):
+        """Test that a cached result is returned as a plain array if none
+        of its points are masked, although it was processed with masked
+        slices, and that it is combined with masked results."""
+        def function(slices, _):
+            """Mask the slices that are zero, returning a masked array if
+            any point is masked."""
+            result = slices * 2.
+            if (slices == 0).any():
+                result = np.ma.masked_array(result, mask=(slices == 0))
+            return result
+
+        plugin = NeighbourhoodResultCache()
+        plugin.process_slices(self.data[0], None, ("a",), function)
+        result = plugin.process_slices(
+            self.data[0, 1:2], None, ("a",), function)
+        self.assertNotIsInstance(result, np.ma.MaskedArray)
+        self.assertArrayAlmostEqual(result, self.data[0, 1:2] * 2.)
+        result = plugin.process_slices(self.data, None, ("a",), function)
+        self.assertIsInstance(result, np.ma.MaskedArray)
+        self.assertArrayEqual(result.mask, self.data == 0)
+        self.assertArrayAlmostEqual(result.data, self.data * 2.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -34,14 +34,14 @@
 import unittest
 
 import iris
-from iris.coords import CellMethod, DimCoord
+from iris.coords import CellMethod
 from iris.cube import Cube
 from iris.tests import IrisTest
 
 import numpy as np
 
+from improver.nbhood.result_cache import NeighbourhoodResultCache
 from improver.nbhood.square_kernel import SquareNeighbourhood
-from improver.wind_calculations.wind_direction import WindDirection
 from improver.tests.nbhood.nbhood.test_NeighbourhoodProcessing import (
     set_up_cube)
 
@@ -72,164 +72,110 @@ class Test__repr__(IrisTest):
         self.assertEqual(result, msg)
 
 
-class Test_cumulate_array(IrisTest):
+class Test_create_summed_area_table(IrisTest):
 
-    """Test for cumulating an array in the y and x dimension."""
+    """Test for creating a padded summed area table in the y and x
+    dimensions."""
 
     def test_basic(self):
         """
-        Test that the y-dimension and x-dimension accumulation produces the
-        intended result. A 2d cube is passed in.
+        Test that the padding and the y-dimension and x-dimension
+        accumulation produce the intended result. A 2d array is passed in.
         """
-        data = np.array([[1., 2., 3., 4., 5.],
-                         [2., 4., 6., 8., 10.],
-                         [3., 6., 8., 11., 14.],
-                         [4., 8., 11., 15., 19.],
-                         [5., 10., 14., 19., 24.]])
-        cube = set_up_cube(
-            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
-            num_grid_points=5)
-        cube = iris.util.squeeze(cube)
-        result_cube = SquareNeighbourhood().cumulate_array(cube)
-        self.assertIsInstance(result_cube, Cube)
-        self.assertArrayAlmostEqual(result_cube.data, data)
-
+        data = np.ones((3, 3), dtype=np.float32)
+        data[1, 1] = 0.
+        expected = np.array(
+            [[0., 0., 0., 0., 0., 0.],
+             [0., 0., 0., 0., 0., 0.],
+             [0., 0., 1., 2., 3., 3.],
+             [0., 0., 2., 3., 5., 5.],
+             [0., 0., 3., 5., 8., 8.],
+             [0., 0., 3., 5., 8., 8.]])
+        result = SquareNeighbourhood.create_summed_area_table(data, 1, 1)
+        self.assertEqual(result.dtype, np.float64)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_different_cells_x_and_y(self):
+        """Test that the y and x dimensions are padded by the number of
+        grid cells in each direction."""
+        data = np.ones((3, 4))
+        result = SquareNeighbourhood.create_summed_area_table(data, 2, 1)
+        self.assertEqual(result.shape, (6, 9))
+        self.assertEqual(result[-1, -1], 12.)
+
+    def test_leading_dimensions(self):
+        """Test that leading dimensions are cumulated independently."""
+        data = np.ones((2, 3, 3, 3))
+        data[1, 2] = 2.
+        result = SquareNeighbourhood.create_summed_area_table(data, 1, 1)
+        self.assertEqual(result.shape, (2, 3, 6, 6))
+        self.assertEqual(result[0, 0, -1, -1], 9.)
+        self.assertEqual(result[1, 2, -1, -1], 18.)
 
-class Test_calculate_neighbourhood(IrisTest):
+    def test_complex(self):
+        """Test that complex data is cumulated as complex values."""
+        data = np.ones((3, 3), dtype=np.complex64) * (1 + 1j)
+        result = SquareNeighbourhood.create_summed_area_table(data, 1, 1)
+        self.assertEqual(result.dtype, np.complex128)
+        self.assertEqual(result[-1, -1], 9 + 9j)
 
-    """ Test calculating neighbourhood """
 
-    def setUp(self):
-        """Set up cube and expected results for tests."""
-
-        # This array is the output from cumulate_array when a 3x3 array of 1's
-        # with a 0 at the centre point (1,1) is passed in.
-        # A Halo has been added to the data.
-        self.data = np.array(
-            [[0., 0., 0., 0., 0., 0., 0.],
-             [0., 0., 0., 0., 0., 0., 0.],
-             [0., 0., 1., 2., 3., 3., 3.],
-             [0., 0., 2., 3., 5., 5., 5.],
-             [0., 0., 3., 5., 8., 8., 8.],
-             [0., 0., 3., 5., 8., 8., 8.],
-             [0., 0., 3., 5., 8., 8., 8.]])
-        self.cube = Cube(self.data, long_name='test')
-        self.x_coord = DimCoord([0, 1, 2, 3, 4, 5, 6],
-                                standard_name='longitude')
-        self.y_coord = DimCoord([0, 1, 2, 3, 4, 5, 6],
-                                standard_name='latitude')
-        self.cube.add_dim_coord(self.x_coord, 1)
-        self.cube.add_dim_coord(self.y_coord, 0)
-        cells_x = cells_y = 1
-        self.n_rows = 7
-        self.n_columns = 7
-        self.ymax_xmax_disp = (cells_y*self.n_columns) + cells_x
-        self.ymax_xmin_disp = (cells_y*self.n_columns) - cells_x - 1
-        self.ymin_xmax_disp = (-1*(cells_y+1)*self.n_columns) + cells_x
-        self.ymin_xmin_disp = (-1*(cells_y+1)*self.n_columns) - cells_x - 1
+class Test_sum_over_neighbourhood(IrisTest):
 
-    def test_basic(self):
-        """ Test that calculate neighbourhood returns correct values """
-        expected = np.array(
-            [[8., 5., -5., -8., -5., -3., 8.],
-             [8., 6., -3., -5., -3., -2., 5.],
-             [5., 7., 3., 5., 3., 2., -5.],
-             [-5., -2., 5., 8., 5., 3., -8.],
-             [-8., -6., 3., 5., 3., 2., -5.],
-             [-5., -4., 2., 3., 2., 1., -3.],
-             [-3., -6., -5., -8., -5., -3., 8.]])
-        result = (
-            SquareNeighbourhood().calculate_neighbourhood(self.cube,
-                                                          self.ymax_xmax_disp,
-                                                          self.ymin_xmax_disp,
-                                                          self.ymin_xmin_disp,
-                                                          self.ymax_xmin_disp,
-                                                          self.n_rows,
-                                                          self.n_columns))
-        self.assertArrayEqual(result, expected)
-
-
-class Test_mean_over_neighbourhood(IrisTest):
-
-    """Test for calculating mean value in neighbourhood."""
+    """Test for calculating neighbourhood totals from a summed area
+    table."""
 
     def setUp(self):
-        """Set up cube and expected results for tests."""
-
-        # This array is the output from cumulate_array when a 3x3 array of 1's
-        # with a 0 at the centre point (1,1) is passed in.
-        # A Halo has been added to the data.
-        self.data = np.array(
-            [[0., 0., 0., 0., 0., 0., 0.],
-             [0., 0., 0., 0., 0., 0., 0.],
-             [0., 0., 1., 2., 3., 3., 3.],
-             [0., 0., 2., 3., 5., 5., 5.],
-             [0., 0., 3., 5., 8., 8., 8.],
-             [0., 0., 3., 5., 8., 8., 8.],
-             [0., 0., 3., 5., 8., 8., 8.]])
-        self.cube = Cube(self.data, long_name='test')
-        self.x_coord = DimCoord([0, 1, 2, 3, 4, 5, 6],
-                                standard_name='longitude')
-        self.y_coord = DimCoord([0, 1, 2, 3, 4, 5, 6],
-                                standard_name='latitude')
-        self.cube.add_dim_coord(self.x_coord, 1)
-        self.cube.add_dim_coord(self.y_coord, 0)
-        self.mask = self.cube.copy()
-        self.mask.rename('mask_data')
-        # This array is the output from cumulate_array when a 3x3 array of 1's
-        # A Halo of missing points has been added to the data.
-        self.mask.data = np.array(
-            [[0., 0., 0., 0., 0., 0., 0.],
-             [0., 0., 0., 0., 0., 0., 0.],
-             [0., 0., 1., 2., 3., 3., 3.],
-             [0., 0., 2., 4., 6., 6., 6.],
-             [0., 0., 3., 6., 9., 9., 9.],
-             [0., 0., 3., 6., 9., 9., 9.],
-             [0., 0., 3., 6., 9., 9., 9.]])
-        self.nan_mask = np.zeros(self.cube.data.shape, dtype=int)
-        self.width = 1
-        self.expected = np.array(
-            [[0.88888889, 0.83333333, 0.83333333, 0.88888889,
-              0.83333333, 1.0, 0.88888889],
-             [0.88888889, 0.85714286, 0.75000000, 0.83333333,
-              0.75000000, 1.0, 0.83333333],
-             [0.83333333, 0.87500000, 0.75000000, 0.83333333,
-              0.75000000, 1.0, 0.83333333],
-             [0.83333333, 0.66666667, 0.83333333, 0.88888889,
-              0.83333333, 1.0, 0.88888889],
-             [0.88888889, 0.85714286, 0.75000000, 0.83333333,
-              0.75000000, 1.0, 0.83333333],
-             [0.83333333, 0.80000000, 1.00000000, 1.00000000,
-              1.00000000, 1.0, 1.00000000],
-             [1.00000000, 1.00000000, 0.83333333, 0.88888889,
-              0.83333333, 1.0, 0.88888889]])
-
-    def test_basic_fraction(self):
-        """Test cube with correct data is produced when mean over
-           neighbourhood is calculated where the sum_or_fraction option is
-           set to "fraction"."""
-        result = SquareNeighbourhood().mean_over_neighbourhood(
-            self.cube, self.mask, self.width, self.width)
-        self.assertIsInstance(result, Cube)
-        self.assertArrayAlmostEqual(result.data, self.expected)
+        """Set up a summed area table for a 5x5 array of 1's with a 0 at the
+        centre point, padded for a neighbourhood radius of 2 grid cells."""
+        self.data = np.ones((5, 5))
+        self.data[2, 2] = 0.
+        self.table = SquareNeighbourhood.create_summed_area_table(
+            self.data, 2, 2)
 
-    def test_basic_sum(self):
-        """Test cube with correct data is produced when mean over
-           neighbourhood is calculated where the sum_or_fraction option is
-           set to "sum"."""
+    def test_basic(self):
+        """Test that the neighbourhood totals are correct, including at the
+        edges of the domain, where the neighbourhood is truncated."""
         expected = np.array(
-            [[8., 5., -5., -8., -5., -3., 8.],
-             [8., 6., -3., -5., -3., -2., 5.],
-             [5., 7., 3., 5., 3., 2., -5.],
-             [-5., -2., 5., 8., 5., 3., -8.],
-             [-8., -6., 3., 5., 3., 2., -5.],
-             [-5., -4., 2., 3., 2., 1., -3.],
-             [-3., -6., -5., -8., -5., -3., 8.]])
-        result = SquareNeighbourhood(
-            sum_or_fraction="sum").mean_over_neighbourhood(
-                self.cube, self.mask, self.width, self.width)
-        self.assertIsInstance(result, Cube)
-        self.assertArrayAlmostEqual(result.data, expected)
+            [[4., 6., 6., 6., 4.],
+             [6., 8., 8., 8., 6.],
+             [6., 8., 8., 8., 6.],
+             [6., 8., 8., 8., 6.],
+             [4., 6., 6., 6., 4.]])
+        result = SquareNeighbourhood.sum_over_neighbourhood(
+            self.table, 1, 1, 5, 5)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_matches_direct_sum(self):
+        """Test that the totals match a direct sum over each neighbourhood
+        for random data and differing radii in the x and y directions."""
+        random_state = np.random.RandomState(0)
+        data = random_state.uniform(size=(2, 7, 9))
+        table = SquareNeighbourhood.create_summed_area_table(data, 3, 2)
+        padded = np.pad(data, ((0, 0), (2, 2), (3, 3)), mode='constant')
+        expected = np.zeros(data.shape)
+        for i in range(7):
+            for j in range(9):
+                expected[:, i, j] = np.sum(
+                    padded[:, i:i + 5, j:j + 7], axis=(-2, -1))
+        result = SquareNeighbourhood.sum_over_neighbourhood(
+            table, 3, 2, 7, 9)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_smaller_neighbourhood(self):
+        """Test that a table can be used for a neighbourhood smaller than
+        the padding."""
+        result = SquareNeighbourhood.sum_over_neighbourhood(
+            self.table, 0, 0, 5, 5)
+        self.assertArrayAlmostEqual(result, self.data)
+
+    def test_neighbourhood_too_large(self):
+        """Test that an error is raised if the neighbourhood is larger than
+        the padding within the table."""
+        msg = "exceeds the padding"
+        with self.assertRaisesRegex(ValueError, msg):
+            SquareNeighbourhood.sum_over_neighbourhood(
+                self.table, 3, 2, 5, 5)
 
 
 class Test_set_up_cubes_to_be_neighbourhooded(IrisTest):
@@ -330,206 +276,51 @@ class Test_set_up_cubes_to_be_neighbourhooded(IrisTest):
         self.assertArrayEqual(result_nan_array, expected_nans)
 
 
-class Test__pad_and_calculate_neighbourhood(IrisTest):
-
-    """Test the padding and calculation of neighbourhood processing."""
-
-    def setUp(self):
-        """Set up a cube."""
-        self.cube = set_up_cube(
-            zero_point_indices=((0, 0, 1, 1),), num_time_points=1,
-            num_grid_points=3)
-        for sliced_cube in self.cube.slices(["projection_y_coordinate",
-                                             "projection_x_coordinate"]):
-            break
-        sliced_cube.remove_coord("realization")
-        sliced_cube.remove_coord("time")
-        self.cube = sliced_cube
-        self.mask = self.cube.copy()
-        self.mask.data[::] = 1.0
-        self.mask.rename('masked_data')
-
-    def test_basic(self):
-        """Test setting up cubes to be padded and then passed into
-        neighbourhood processing."""
-        expected_data = np.array(
-            [[0.85714286, 0.75, 0.83333333, 0.85714286, 0.75, 1., 0.85714286],
-             [0.85714286, 0.8, 0.75, 0.75, 0.5, np.nan, 0.75],
-             [0.75, 0.83333333, 0.75, 0.8, 0.66666667, 1., 0.8],
-             [0.8, 0.5, 0.83333333, 0.85714286, 0.75, 1., 0.85714286],
-             [0.85714286, 0.8, 0.75, 0.75, 0.5, np.nan, 0.75],
-             [0.75, 0.66666667, 1., 1., 1., np.nan, 1.],
-             [1., 1., 0.83333333, 0.85714286, 0.75, 1., 0.85714286]])
-
-        grid_cells_x = grid_cells_y = 1
-        cube = self.cube
-        mask_cube = cube.copy()
-        mask_cube.data[::] = 1.0
-        mask_cube.data[1, 2] = 0.0
-        mask_cube.data[2, 2] = 0.0
-        # set_up_cubes_to_be_neighbourhooded would set masked points to 0.0
-        cube.data[1, 2] = 0.0
-        cube.data[2, 2] = 0.0
-        mask_cube.rename('mask_data')
-
-        nbcube = (
-            SquareNeighbourhood()._pad_and_calculate_neighbourhood(
-                cube, mask_cube, grid_cells_x, grid_cells_y))
-        self.assertIsInstance(nbcube, Cube)
-        self.assertArrayAlmostEqual(nbcube.data, expected_data)
-
-    def test_complex(self):
-        """Test neighbourhooding with an array of complex wind directions"""
-        # set up cube with complex wind directions 30-60 degrees
-        a = 0.54066949+0.82535591j
-        b = 0.56100423+0.80502117j
-        c = 0.5+0.8660254j
-        d = 0.59150635+0.77451905j
-
-        expected_data_complex = np.array(
-            [[a, b, b, a, b, c, a],
-             [a, 0.55228934+0.81373606j, d, b, d, c, b],
-             [b, 0.54575318+0.82027223j, d, b, d, c, b],
-             [b, 0.62200847+0.74401694j, b, a, b, c, a],
-             [a, 0.55228934+0.81373606j, d, b, d, c, b],
-             [b, 0.57320508+0.79282032j, c, c, c, c, c],
-             [c, c, b, a, b, c, a]])
-
-        expected_data_deg = np.array(
-            [[56.77222443, 55.12808228, 55.12808228, 56.77222443, 55.12808228,
-              60.00000381, 56.77222443],
-             [56.77222443, 55.83494186, 52.63074112, 55.12808228, 52.63074112,
-              60.00000381, 55.12808228],
-             [55.12808228, 56.36291885, 52.63074112, 55.12808228, 52.63074112,
-              60.00000381, 55.12808228],
-             [55.12808228, 50.10391235, 55.12808228, 56.77222443, 55.12808228,
-              60.00000381, 56.77222443],
-             [56.77222443, 55.83494186, 52.63074112, 55.12808228, 52.63074112,
-              60.00000381, 55.12808228],
-             [55.12808228, 54.13326263, 60.00000381, 60.00000381, 60.00000381,
-              60.00000381, 60.00000381],
-             [60.00000381, 60.00000381, 55.12808228, 56.77222443, 55.12808228,
-              60.00000381, 56.77222443]],
-            dtype=np.float32
-        )
-
-        self.cube.data = WindDirection.deg_to_complex(30.*self.cube.data + 30.)
-        nbcube = (
-            SquareNeighbourhood()._pad_and_calculate_neighbourhood(
-                self.cube, self.mask, 1, 1))
-        self.assertTrue(np.any(np.iscomplex(nbcube.data)))
-        self.assertArrayAlmostEqual(nbcube.data, expected_data_complex)
-        self.assertArrayAlmostEqual(WindDirection.complex_to_deg(nbcube.data),
-                                    expected_data_deg)
-
-    def test_complex_masked(self):
-        """Test complex neighbourhooding works with a mask"""
-
-        mask_cube = self.cube.copy()
-        mask_cube.data[::] = 1.0
-        mask_cube.data[1, 2] = 0.0
-        mask_cube.data[2, 2] = 0.0
-
-        self.cube.data = WindDirection.deg_to_complex(30.*self.cube.data + 30.)
-
-        # set_up_cubes_to_be_neighbourhooded would set masked points to 0.0
-        self.cube.data[1, 2] = 0.0
-        self.cube.data[2, 2] = 0.0
-        mask_cube.rename('mask_data')
-
-        nbcube = (
-            SquareNeighbourhood()._pad_and_calculate_neighbourhood(
-                self.cube, mask_cube, 1, 1))
-        self.assertIsInstance(nbcube, Cube)
-
+class Test_set_up_arrays_to_be_neighbourhooded(IrisTest):
 
-class Test__remove_padding_and_mask(IrisTest):
-
-    """Test the removal of padding and dealing with masked data."""
+    """Test the set up of arrays prior to neighbourhooding."""
 
     def setUp(self):
-        """Set up a cube."""
-        self.padded_cube = set_up_cube(
-            zero_point_indices=((0, 0, 3, 3),), num_time_points=1,
-            num_grid_points=7)
-        self.padded_cube = iris.util.squeeze(self.padded_cube)
-        self.cube = set_up_cube(
-            zero_point_indices=((0, 0, 1, 1),), num_time_points=1,
-            num_grid_points=3)
-        self.cube = iris.util.squeeze(self.cube)
-        self.mask_cube = self.cube.copy()
-        masked_array = np.ones(self.mask_cube.data.shape)
-        masked_array[1, 2] = 0
-        masked_array[0, 1] = 0
-        self.mask_cube.data = masked_array
-        self.mask_cube.rename('mask_data')
-        self.no_mask = self.mask_cube.copy()
-        self.no_mask.data = np.ones(self.mask_cube.data.shape)
+        """Set up an array with leading dimensions."""
+        self.data = np.ones((2, 5, 5))
+        self.data[:, 2, 2] = 0.
 
     def test_without_masked_data(self):
-        """Test that removing a halo of points from the data on a cube
-        has worked as intended when the input data is not masked."""
-        expected = np.array(
-            [[1., 1., 1.],
-             [1., 0., 1.],
-             [1., 1., 1.]])
-        grid_cells_x = grid_cells_y = 1
-        nbcube = (
-            SquareNeighbourhood()._remove_padding_and_mask(
-                self.padded_cube, self.cube, self.no_mask,
-                grid_cells_x, grid_cells_y))
-        self.assertIsInstance(nbcube, Cube)
-        self.assertArrayAlmostEqual(nbcube.data, expected)
-
-    def test_with_masked_data(self):
-        """Test that removing a halo of points from the data on a cube
-        has worked as intended when the input data has an associated mask."""
-        expected = np.array(
-            [[1., 1., 1.],
-             [1., 0., 1.],
-             [1., 1., 1.]])
-        expected_mask = np.array(
-            [[False, True, False],
-             [False, False, True],
-             [False, False, False]])
-        grid_cells_x = grid_cells_y = 1
-        nbcube = (
-            SquareNeighbourhood()._remove_padding_and_mask(
-                self.padded_cube, self.cube, self.mask_cube,
-                grid_cells_x, grid_cells_y))
-        self.assertIsInstance(nbcube, Cube)
-        self.assertArrayAlmostEqual(nbcube.data.data, expected)
-        self.assertArrayAlmostEqual(nbcube.data.mask, expected_mask)
-
-    def test_with_masked_data_and_no_remasking(self):
-        """Test that removing halo works correctly with remask=False"""
-        expected = np.array(
-            [[1., 1., 1.],
-             [1., 0., 1.],
-             [1., 1., 1.]])
-        grid_cells_x = grid_cells_y = 1
-        nbcube = (
-            SquareNeighbourhood(re_mask=False)._remove_padding_and_mask(
-                self.padded_cube, self.cube, self.mask_cube,
-                grid_cells_x, grid_cells_y))
-        self.assertIsInstance(nbcube, Cube)
-        self.assertArrayAlmostEqual(nbcube.data, expected)
-
-    def test_clipping(self):
-        """Test that clipping is working"""
-        expected = np.array(
-            [[1., 1., 1.],
-             [1., 0., 1.],
-             [1., 1., 1.]])
-        grid_cells_x = grid_cells_y = 1
-        self.padded_cube.data[2, 2] = 1.1
-        self.padded_cube.data[3, 3] = -0.1
-        nbcube = (
-            SquareNeighbourhood(re_mask=False)._remove_padding_and_mask(
-                self.padded_cube, self.cube, self.mask_cube,
-                grid_cells_x, grid_cells_y))
-        self.assertIsInstance(nbcube, Cube)
-        self.assertArrayAlmostEqual(nbcube.data, expected)
+        """Test setting up an array that is not masked."""
+        data, mask, nan_array = (
+            SquareNeighbourhood.set_up_arrays_to_be_neighbourhooded(
+                self.data.copy()))
+        self.assertArrayEqual(data, self.data)
+        self.assertArrayEqual(mask, np.ones((2, 5, 5)))
+        self.assertFalse(nan_array.any())
+
+    def test_with_masked_data_and_nan(self):
+        """Test setting up a masked array containing NaNs."""
+        self.data[0, 1, 3] = np.nan
+        input_data = np.ma.masked_array(self.data.copy(), mask=False)
+        input_data.mask[1, 3, 3] = True
+        expected_mask = np.ones((2, 5, 5))
+        expected_mask[0, 1, 3] = 0.
+        expected_mask[1, 3, 3] = 0.
+        data, mask, nan_array = (
+            SquareNeighbourhood.set_up_arrays_to_be_neighbourhooded(
+                input_data))
+        expected_data = np.where(expected_mask, self.data, 0.)
+        self.assertNotIsInstance(data, np.ma.MaskedArray)
+        self.assertArrayEqual(data, expected_data)
+        self.assertArrayEqual(mask, expected_mask)
+        self.assertArrayEqual(np.argwhere(nan_array), [[0, 1, 3]])
+
+    def test_with_separate_mask(self):
+        """Test that a 2D mask is applied to every slice."""
+        mask_data = np.ones((5, 5), dtype=int)
+        mask_data[0, 0] = 0
+        expected_mask = np.broadcast_to(mask_data, (2, 5, 5))
+        data, mask, _ = (
+            SquareNeighbourhood.set_up_arrays_to_be_neighbourhooded(
+                self.data.copy(), mask_data=mask_data))
+        self.assertArrayEqual(data, self.data * expected_mask)
+        self.assertArrayEqual(mask, expected_mask)
 
 
 class Test_run(IrisTest):
@@ -860,6 +651,153 @@ class Test_run(IrisTest):
         self.assertTupleEqual(result.cell_methods, cube.cell_methods)
         self.assertDictEqual(result.attributes, cube.attributes)
 
+    def test_transposed_cube(self):
+        """Test that a cube with the x dimension before the y dimension
+        gives the same result as the untransposed cube."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2), (0, 1, 1, 3)),
+            num_time_points=2, num_grid_points=5)
+        expected = SquareNeighbourhood().run(cube, self.RADIUS)
+        cube.transpose([3, 1, 0, 2])
+        result = SquareNeighbourhood().run(cube, self.RADIUS)
+        self.assertEqual(result.shape, (5, 2, 1, 5))
+        self.assertArrayAlmostEqual(
+            result.data, expected.data.transpose([3, 1, 0, 2]))
+
+
+class Test_run_multiple_radii(IrisTest):
+
+    """Test the run_multiple_radii method on the SquareNeighbourhood
+    class."""
+
+    RADII = [4500, 2500, 6500]
+
+    def setUp(self):
+        """Set up a cube with masked data and NaNs at two times."""
+        self.cube = set_up_cube(
+            zero_point_indices=((0, 0, 3, 3), (0, 1, 2, 5)),
+            num_time_points=2, num_grid_points=9)
+        self.cube.data[0, 0, 0, 0] = np.nan
+        self.cube.data = np.ma.masked_array(self.cube.data, mask=False)
+        self.cube.data.mask[0, 1, 6, 6] = True
+
+    def test_matches_run(self):
+        """Test that the cube for each radius matches the result of the run
+        method, and that the cubes are returned in the order of the radii."""
+        plugin = SquareNeighbourhood()
+        result = plugin.run_multiple_radii(self.cube, self.RADII)
+        self.assertIsInstance(result, iris.cube.CubeList)
+        self.assertEqual(len(result), len(self.RADII))
+        for radius, result_cube in zip(self.RADII, result):
+            expected = plugin.run(self.cube, radius)
+            self.assertEqual(result_cube.metadata, expected.metadata)
+            self.assertArrayAlmostEqual(result_cube.data, expected.data)
+            self.assertArrayEqual(np.ma.getmaskarray(result_cube.data),
+                                  np.ma.getmaskarray(expected.data))
+
+    def test_matches_run_sum(self):
+        """Test that the sums for each radius match the result of the run
+        method, when the mask is not re-applied."""
+        plugin = SquareNeighbourhood(sum_or_fraction="sum", re_mask=False)
+        result = plugin.run_multiple_radii(self.cube, self.RADII)
+        for radius, result_cube in zip(self.RADII, result):
+            expected = plugin.run(self.cube, radius)
+            self.assertArrayAlmostEqual(result_cube.data, expected.data)
+
+    def test_cache(self):
+        """Test that the results with a cache match the results without,
+        and that the cached slices are not processed again."""
+        self.cube.data[0, 1] = self.cube.data[0, 0]
+        expected = SquareNeighbourhood().run_multiple_radii(
+            self.cube, self.RADII)
+        cache = NeighbourhoodResultCache()
+        plugin = SquareNeighbourhood(cache=cache)
+        result = plugin.run_multiple_radii(self.cube, self.RADII)
+        for result_cube, expected_cube in zip(result, expected):
+            self.assertArrayAlmostEqual(result_cube.data, expected_cube.data)
+            self.assertArrayEqual(np.ma.getmaskarray(result_cube.data),
+                                  np.ma.getmaskarray(expected_cube.data))
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.duplicates, 3)
+        plugin.run_multiple_radii(self.cube, self.RADII[:1])
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.duplicates, 4)
+
+
+class Test_run_radii_by_slice(IrisTest):
+
+    """Test the run_radii_by_slice method on the SquareNeighbourhood
+    class."""
+
+    def setUp(self):
+        """Set up a cube with three times."""
+        self.cube = set_up_cube(
+            zero_point_indices=((0, 0, 3, 3), (0, 1, 2, 5), (0, 2, 6, 1)),
+            num_time_points=3, num_grid_points=9)
+        self.cube.data[0, 1, 0, 0] = np.nan
+
+    def test_matches_run_by_time(self):
+        """Test that each time is processed with its own radius."""
+        radii = [2500, 4500, 6500]
+        plugin = SquareNeighbourhood()
+        result = plugin.run_radii_by_slice(self.cube, radii, "time")
+        self.assertEqual(result.shape, self.cube.shape)
+        self.assertNotIsInstance(result.data, np.ma.MaskedArray)
+        for index, (cube_slice, radius) in enumerate(
+                zip(self.cube.slices_over("time"), radii)):
+            expected = plugin.run(cube_slice, radius)
+            self.assertArrayAlmostEqual(result.data[:, index], expected.data)
+
+    def test_masked_data(self):
+        """Test that masked data is re-masked within the result."""
+        radii = [2500, 4500, 6500]
+        self.cube.data = np.ma.masked_array(self.cube.data, mask=False)
+        self.cube.data.mask[0, 2, 4, 4] = True
+        plugin = SquareNeighbourhood()
+        result = plugin.run_radii_by_slice(self.cube, radii, "time")
+        self.assertIsInstance(result.data, np.ma.MaskedArray)
+        self.assertArrayEqual(np.argwhere(result.data.mask), [[0, 2, 4, 4]])
+        for index, (cube_slice, radius) in enumerate(
+                zip(self.cube.slices_over("time"), radii)):
+            expected = plugin.run(cube_slice, radius)
+            self.assertArrayAlmostEqual(result.data[:, index], expected.data)
+
+    def test_cache(self):
+        """Test that the result with a cache and a mask cube matches the
+        result without a cache."""
+        radii = [2500, 4500, 6500]
+        mask_cube = self.cube[0, 0].copy(
+            data=np.ones(self.cube.shape[-2:], dtype=np.int64))
+        mask_cube.data[1, 1] = 0
+        expected = SquareNeighbourhood().run_radii_by_slice(
+            self.cube, radii, "time", mask_cube=mask_cube)
+        cache = NeighbourhoodResultCache()
+        result = SquareNeighbourhood(cache=cache).run_radii_by_slice(
+            self.cube, radii, "time", mask_cube=mask_cube)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertArrayEqual(np.ma.getmaskarray(result.data),
+                              np.ma.getmaskarray(expected.data))
+        self.assertEqual(len(cache), 3)
+
+    def test_scalar_coordinate(self):
+        """Test that a cube with a scalar time coordinate is processed with
+        the single radius provided."""
+        cube = self.cube[:, 0]
+        plugin = SquareNeighbourhood()
+        result = plugin.run_radii_by_slice(cube, [4500], "time")
+        expected = plugin.run(cube, 4500)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
+    def test_mismatched_radii(self):
+        """Test that an error is raised if the number of radii does not
+        match the number of points of the coordinate."""
+        msg = "does not match the number of points"
+        with self.assertRaisesRegex(ValueError, msg):
+            SquareNeighbourhood().run_radii_by_slice(
+                self.cube, [2500, 4500], "time")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -38,6 +38,7 @@ from iris.tests import IrisTest
 from iris.coords import DimCoord
 import numpy as np
 
+from improver.nbhood.nbhood import NeighbourhoodProcessing
 from improver.nbhood.use_nbhood import ApplyNeighbourhoodProcessingWithAMask
 from improver.tests.nbhood.nbhood.test_BaseNeighbourhoodProcessing import (
     set_up_cube)
@@ -279,6 +280,35 @@ class Test_process(IrisTest):
         for realization_slice in result.slices_over("realization"):
             self.assertArrayAlmostEqual(realization_slice.data, expected)
 
+    def test_matches_each_mask(self):
+        """Test that applying all masks at once gives the same result as
+        neighbourhood processing with each mask in turn, for every slice of
+        a cube with leading dimensions and differing slices, and when the
+        dimensions of the mask cube are in a different order."""
+        self.cube.remove_coord("realization")
+        cube = add_dimensions_to_cube(
+            self.cube, OrderedDict([("threshold", 2), ("realization", 2)]))
+        random_state = np.random.RandomState(0)
+        cube.data = random_state.uniform(size=cube.shape).astype(np.float32)
+        mask_cube = self.mask_cube.copy()
+        mask_cube.transpose([1, 0, 2])
+        coord_for_masking = "topographic_zone"
+        radii = 2000
+        result = ApplyNeighbourhoodProcessingWithAMask(
+            coord_for_masking, radii).process(cube, mask_cube)
+        for x_y_slice in cube.slices(["projection_y_coordinate",
+                                      "projection_x_coordinate"]):
+            constraint = iris.Constraint(
+                realization=x_y_slice.coord("realization").points[0],
+                threshold=x_y_slice.coord("threshold").points[0])
+            result_slice = result.extract(constraint)
+            for index, band_mask in enumerate(
+                    self.mask_cube.slices_over(coord_for_masking)):
+                expected = NeighbourhoodProcessing(
+                    "square", radii).process(x_y_slice, mask_cube=band_mask)
+                self.assertArrayAlmostEqual(result_slice.data[index],
+                                            expected.data)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -36,7 +36,7 @@ import unittest
 import iris
 from iris.tests import IrisTest
 from iris.exceptions import CoordinateNotFoundError
-from iris.coords import AuxCoord
+from iris.coords import AuxCoord, DimCoord
 
 import numpy as np
 
@@ -373,6 +373,35 @@ class Test_process(IrisTest):
         result = self.plugin.process(self.nbhooded_cube)
         self.assertArrayAlmostEqual(expected_result, result.data)
 
+    def test_NaNs_differ_between_slices(self):
+        """Test that the weights are renormalized separately for each slice
+        over a leading dimension, using the NaNs within that slice, and that
+        the weights cube is not modified."""
+        weights = self.weights_cube.data.copy()
+        data = np.stack([self.nbhooded_cube.data] * 2)
+        data[1, 0, 0:2, 0] = np.nan
+        data[1, 2, 3:, 4] = np.nan
+        threshold = DimCoord([1., 2.], long_name="threshold", units="1")
+        nbhooded_cube = iris.cube.Cube(
+            data, long_name="probability", units="1",
+            dim_coords_and_dims=[(threshold, 0)] + [
+                (coord, index + 1) for index, coord in
+                enumerate(self.nbhooded_cube.dim_coords)])
+        expected_result = np.array([[[0.12, 0.13, 0.2, 0.2, 0.2],
+                                     [0.13, 0.17, 0.2, 0.2, 0.2],
+                                     [0.17, 0.19, 0.2, 0.2, 0.2],
+                                     [0.2, 0.2, 0.2, 0.19, 0.15],
+                                     [0.2, 0.2, 0.2, 0.16, 0.12]],
+                                    [[0.2, 0.13, 0.2, 0.2, 0.2],
+                                     [0.2, 0.17, 0.2, 0.2, 0.2],
+                                     [0.17, 0.19, 0.2, 0.2, 0.2],
+                                     [0.2, 0.2, 0.2, 0.19, 0.2],
+                                     [0.2, 0.2, 0.2, 0.16, 0.2]]])
+        result = self.plugin.process(nbhooded_cube)
+        self.assertArrayAlmostEqual(expected_result, result.data)
+        self.assertEqual(result.coord_dims("threshold"), (0,))
+        self.assertArrayEqual(self.weights_cube.data, weights)
+
     def test_landsea_mask_in_weights(self):
         """Test that the final result from collapsing the nbhood retains the
            mask from weights input."""
@@ -220,6 +220,19 @@ class Test_load_cube(IrisTest):
         result = load_cube(self.filepath)
         self.assertTrue(result.has_lazy_data())
 
+    def test_no_spatial_coordinates(self):
+        """Test that a cube without spatial coordinates, such as a cube of
+        EMOS coefficients, can be loaded."""
+        cube = iris.cube.Cube(
+            np.arange(4, dtype=np.float32), long_name="emos_coefficients",
+            units="1", dim_coords_and_dims=[(DimCoord(
+                np.arange(4, dtype=np.int32), long_name="coefficient_index",
+                units="1"), 0)])
+        save_netcdf(cube, self.filepath)
+        result = load_cube(self.filepath)
+        self.assertArrayEqual(result.data, cube.data)
+        self.assertEqual(result.coord_dims("coefficient_index"), (0,))
+
 
 class Test_load_cubelist(IrisTest):
 
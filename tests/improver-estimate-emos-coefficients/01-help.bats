@@ -37,6 +37,12 @@ usage: improver estimate-emos-coefficients [-h] [--profile]
                                            [--profile_file PROFILE_FILE]
                                            [--units UNITS]
                                            [--predictor_of_mean PREDICTOR_OF_MEAN]
+                                           [--initial_guess_filepath INITIAL_GUESS_FILEPATH]
+                                           [--training_data_directory TRAINING_DATA_DIRECTORY]
+                                           [--window_length WINDOW_LENGTH]
+                                           [--minimisation_method MINIMISATION_METHOD]
+                                           [--point_by_point]
+                                           [--processes PROCESSES]
                                            DISTRIBUTION CYCLETIME
                                            HISTORIC_FILEPATH TRUTH_FILEPATH
                                            OUTPUT_FILEPATH
@@ -73,6 +79,36 @@ optional arguments:
                         forecast mean. Currently the ensemble mean ("mean")
                         and the ensemble realizations ("realizations") are
                         supported as options. Default: "mean".
+  --initial_guess_filepath INITIAL_GUESS_FILEPATH
+                        A path to an input NetCDF file containing previously
+                        estimated EMOS coefficients, e.g. from the previous
+                        day, which are used as the initial guess for the
+                        minimisation.
+  --training_data_directory TRAINING_DATA_DIRECTORY
+                        A directory in which the ensemble mean and variance of
+                        the historic forecasts and the truth are stored for
+                        each validity time. If provided, the historic forecast
+                        and truth are added to the stored training data, and
+                        the coefficients are estimated from the training data
+                        for the latest WINDOW_LENGTH validity times, so only
+                        the newest historic forecast and truth need to be
+                        provided. The predictor of the mean must be "mean".
+  --window_length WINDOW_LENGTH
+                        The number of validity times to keep in the training
+                        data directory. Default: 30.
+  --minimisation_method MINIMISATION_METHOD
+                        The method used to minimise the Continuous Ranked
+                        Probability Score. Currently "Nelder-Mead" and "BFGS",
+                        which uses the analytic gradient of the score, are
+                        supported. Default: "Nelder-Mead".
+  --point_by_point      If set, coefficients are estimated separately for each
+                        point using the historic forecast and truth at that
+                        point, rather than a single set of coefficients for
+                        the whole domain.
+  --processes PROCESSES
+                        The number of processes used to estimate the
+                        coefficients at each point, if --point_by_point is
+                        set. Default: 1.
 __HELP__
   [[ "$output" == "$expected" ]]
 }